@@ -0,0 +1,33 @@
+import re
+
+from ocr_service.utils.utils import setup_logging
+
+logger = setup_logging(component_name="ocr_service", configure_root=True)
+
+# imported once the root logger is configured, the app modules set up their loggers on import
+from ocr_service.app import create_app  # noqa: E402
+
+asgi_app = create_app()
+
+_BAD_URI = re.compile(r"(%2e%2e|%00|\${jndi:|/winnt/|/etc/passwd)", re.I)
+
+
+async def _reject(send, body: bytes) -> None:
+    await send({"type": "http.response.start", "status": 400,
+                "headers": [(b"content-type", b"text/plain")]})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def app(scope, receive, send):
+    """Native ASGI entrypoint (uvicorn workers), applies the same URI blocklist as `wsgi.app`."""
+    if scope["type"] == "http":
+        try:
+            raw_path = scope.get("raw_path") or scope.get("path", "").encode()
+            if _BAD_URI.search(raw_path.decode("latin-1")) or _BAD_URI.search(scope.get("path", "")):
+                await _reject(send, b"Bad Request: blocked")
+                return
+        except UnicodeDecodeError:
+            await _reject(send, b"Bad Request: malformed path")
+            return
+
+    await asgi_app(scope, receive, send)
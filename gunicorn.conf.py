@@ -1,12 +1,24 @@
+import os
+import shutil
 import time
 import traceback
-import os
+
 from ocr_service.settings import settings
-from ocr_service.utils.utils import sync_port_mapping, is_file_locked, cleanup_stale_lo_profiles
+from ocr_service.utils.utils import cleanup_stale_lo_profiles, is_file_locked, sync_port_mapping
 
+# prometheus_client picks its multiprocess mode when it is first imported, the workers inherit the variable
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", settings.METRICS_DIR)
+
+from prometheus_client import multiprocess
 
 counter: int = 0
 
+def on_starting(server):
+    # metric files of a previous run would be aggregated with the new workers' ones
+    metrics_dir = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
 def pre_fork(server, worker):
     global counter
 
@@ -23,6 +35,10 @@ def post_fork(server, worker):
     except Exception:
         server.log.exception(traceback.print_exc())
 
+def child_exit(server, worker):
+    # drops the live gauges (in-flight documents, queues, LibreOffice instances) of the exited worker
+    multiprocess.mark_process_dead(worker.pid)
+
 def on_exit(server):
     try:
         server.log.debug("cleaning up lo artifacts...")
@@ -2,16 +2,17 @@ from typing import Any
 
 import psutil
 from fastapi import APIRouter, Request, status
-from fastapi.responses import ORJSONResponse
+from fastapi.responses import ORJSONResponse, Response
 
 from ocr_service.dto.info_response import InfoResponse
+from ocr_service.utils.metrics import render_metrics
 from ocr_service.utils.utils import get_app_info
 
 health_api = APIRouter(prefix="/api")
 
 
 @health_api.get("/health", response_class=ORJSONResponse)
-def health() -> ORJSONResponse:
+async def health() -> ORJSONResponse:
     return ORJSONResponse(content={"status": "healthy"})
 
 
@@ -74,10 +75,53 @@ def ready(request: Request) -> ORJSONResponse:
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
         )
 
-    process_count = len(request.app.state.processor.loffice_process_list)
-    return ORJSONResponse(content={"status": "ready", "libreoffice_processes": process_count})
+    processor = request.app.state.processor
+    content: dict[str, Any] = {"status": "ready", "libreoffice_processes": len(processor.loffice_process_list)}
+
+    api_pool = getattr(getattr(processor, "ocr_engine", None), "api_pool", None)
+    if api_pool is not None:
+        content["tesseract_pool"] = api_pool.stats()
+
+    render_pool = getattr(getattr(processor, "converter", None), "render_pool", None)
+    if render_pool is not None:
+        content["render_pool"] = render_pool.stats()
+
+    office_pool = getattr(getattr(processor, "converter", None), "office_pool", None)
+    if office_pool is not None:
+        content["libreoffice_pool"] = office_pool.stats()
+
+    result_cache = getattr(processor, "result_cache", None)
+    if result_cache is not None:
+        content["result_cache"] = result_cache.stats()
+
+    admission = getattr(processor, "admission", None)
+    if admission is not None:
+        content["admission"] = admission.stats()
+
+    lanes = {
+        "documents": getattr(getattr(processor, "batch_executor", None), "lanes", None),
+        "ocr": getattr(getattr(processor, "ocr_engine", None), "lanes", None),
+        "render": getattr(render_pool, "lanes", None),
+    }
+    if any(scheduler is not None for scheduler in lanes.values()):
+        content["lanes"] = {name: scheduler.stats() for name, scheduler in lanes.items() if scheduler is not None}
+
+    return ORJSONResponse(content=content)
 
 
 @health_api.get("/info", response_model=InfoResponse, response_class=ORJSONResponse)
 def info() -> ORJSONResponse:
     return ORJSONResponse(content=get_app_info())
+
+
+@health_api.get("/metrics", response_class=Response)
+def metrics(request: Request) -> Response:
+    """Prometheus metrics of all workers (stage latencies, pages, fallbacks, cache, errors, queues)."""
+    office_pool = getattr(getattr(getattr(request.app.state, "processor", None), "converter", None),
+                          "office_pool", None)
+    if office_pool is not None:
+        # refreshes the LibreOffice instance gauges of this worker
+        office_pool.stats()
+
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
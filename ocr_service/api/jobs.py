@@ -0,0 +1,88 @@
+from fastapi import APIRouter, File, Request, UploadFile, status
+from fastapi.responses import ORJSONResponse
+
+from ocr_service.api.process import build_process_response, read_process_input
+from ocr_service.processor.jobs import JOB_DONE, JOB_FAILED, JobQueueFullError
+from ocr_service.processor.processor import Processor
+from ocr_service.settings import settings
+from ocr_service.utils.utils import setup_logging
+
+jobs_api = APIRouter(prefix="/api")
+log = setup_logging(__name__, log_level=settings.LOG_LEVEL)
+
+
+@jobs_api.post("/jobs", response_class=ORJSONResponse, status_code=status.HTTP_202_ACCEPTED)
+async def submit_job(request: Request, file: UploadFile | None = File(default=None)) -> ORJSONResponse:
+    """
+     Queues a document for background processing, accepts the same input as /api/process
+
+    Returns:
+        Response: 202 with the job id and the urls to poll for its status and result
+    """
+
+    process_input = await read_process_input(request, file)
+    if isinstance(process_input, ORJSONResponse):
+        return process_input
+
+    if not process_input.stream:
+        return ORJSONResponse(content={"detail": "No document to process"}, status_code=422)
+
+    processor: Processor = request.app.state.processor
+
+    try:
+        job = processor.job_scheduler.submit(process_input.stream, process_input.file_name, process_input.footer)
+    except JobQueueFullError as exc:
+        process_input.close()
+        log.warning(str(exc))
+        return ORJSONResponse(content={"detail": "Job queue is full, try again later"},
+                              status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                              headers={"Retry-After": "30"})
+
+    log.info(f"Queued job {job['job_id']} for file: {process_input.file_name}")
+
+    return ORJSONResponse(
+        content={
+            "job_id": job["job_id"],
+            "status": job["status"],
+            "status_url": str(request.url_for("get_job", job_id=job["job_id"]).path),
+            "result_url": str(request.url_for("get_job_result", job_id=job["job_id"]).path),
+        },
+        status_code=status.HTTP_202_ACCEPTED,
+    )
+
+
+@jobs_api.get("/jobs/{job_id}", response_class=ORJSONResponse)
+def get_job(request: Request, job_id: str) -> ORJSONResponse:
+    """Returns the state of a job: status (queued, running, done, failed) and page progress."""
+
+    processor: Processor = request.app.state.processor
+    job = processor.job_scheduler.store.get(job_id)
+    if job is None:
+        return ORJSONResponse(content={"detail": "Job not found"}, status_code=status.HTTP_404_NOT_FOUND)
+
+    return ORJSONResponse(content=job)
+
+
+@jobs_api.get("/jobs/{job_id}/result", response_class=ORJSONResponse)
+def get_job_result(request: Request, job_id: str) -> ORJSONResponse:
+    """Returns the result of a finished job in the /api/process response format (409 while it is unfinished,
+    500 for a failed job that produced a result)."""
+
+    processor: Processor = request.app.state.processor
+    store = processor.job_scheduler.store
+
+    job = store.get(job_id)
+    if job is None:
+        return ORJSONResponse(content={"detail": "Job not found"}, status_code=status.HTTP_404_NOT_FOUND)
+
+    job_result = store.get_result(job_id) if job["status"] in (JOB_DONE, JOB_FAILED) else None
+    if job_result is None and job["status"] != JOB_DONE:
+        return ORJSONResponse(content={"detail": f"Job is {job['status']}", "job": job},
+                              status_code=status.HTTP_409_CONFLICT)
+
+    if job_result is None:
+        return ORJSONResponse(content={"detail": "Job result not found"}, status_code=status.HTTP_404_NOT_FOUND)
+
+    response, code = build_process_response(job_result["text"], job_result["metadata"], footer=job_result["footer"])
+
+    return ORJSONResponse(content=response, status_code=code, media_type="application/json")
@@ -1,119 +1,256 @@
+import asyncio
 import base64
 import binascii
-import logging
-import traceback
 import uuid
-from multiprocessing import Pool
-from typing import IO, Any
+from collections.abc import Iterator
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from queue import Queue
+from typing import IO, Any, Literal, overload
 
 import orjson
-from fastapi import APIRouter, File, Request, UploadFile
-from fastapi.responses import ORJSONResponse, Response
+from fastapi import APIRouter, File, Request, UploadFile, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import ValidationError
-from starlette.datastructures import FormData
+from starlette.concurrency import run_in_threadpool
 
+from ocr_service.dto.page_result import PageResult
 from ocr_service.dto.process_request import ProcessRequest
-from ocr_service.dto.process_response import ProcessResponse
+from ocr_service.dto.process_response import ProcessRecordResponse, ProcessResponse
+from ocr_service.processor.admission import AdmissionRejectedError, AdmissionTicket
 from ocr_service.processor.processor import Processor
 from ocr_service.settings import settings
+from ocr_service.utils.request_body import (
+    DocumentBuffer,
+    decode_base64,
+    parse_json_body,
+    read_upload,
+    release_buffer,
+    spool_body,
+    spool_body_async,
+)
 from ocr_service.utils.utils import build_response, setup_logging
 
 process_api = APIRouter(prefix="/api")
 log = setup_logging(__name__, log_level=settings.LOG_LEVEL)
 
+# sentinel ending the event stream of /api/process_stream
+_END_OF_EVENTS = object()
 
-@process_api.post("/process", response_model=ProcessResponse, response_class=ORJSONResponse)
-def process(request: Request, file: UploadFile | None = File(default=None)) -> ORJSONResponse:
+
+@dataclass
+class ProcessInput:
+    """Document and passthrough data read from a `/api/process`-style request."""
+
+    stream: DocumentBuffer = b""
+    file_name: str = ""
+    footer: dict = field(default_factory=dict)
+    doc_metadata: dict = field(default_factory=dict)
+    # 422 detail of a record of a JSON array batch that could not be read
+    error: Any = None
+
+    def close(self) -> None:
+        """Release the spooled document once it has been processed."""
+        release_buffer(self.stream)
+
+
+def _decode_binary_data(encoded: str) -> bytes:
+    try:
+        stream = base64.b64decode(encoded, validate=True)
+        log.info("binary_data successfully base64-decoded")
+    except (binascii.Error, ValueError):
+        log.warning("binary_data is not valid base64; treating it as raw UTF-8 text")
+        stream = encoded.encode("utf-8")
+    return stream
+
+
+def _decode_binary_data_span(raw_body: DocumentBuffer, start: int, end: int) -> DocumentBuffer:
+    """Decode a record's binary_data string found at `raw_body[start:end]` by the JSON scan."""
+    try:
+        stream = decode_base64(raw_body, start, end)
+        log.info("binary_data successfully base64-decoded")
+        return stream
+    except (binascii.Error, ValueError):
+        # not plain base64 as sent: unescape the JSON string (e.g. "\/") and decode it the regular way
+        return _decode_binary_data(orjson.loads(raw_body[start - 1:end + 1]))
+
+
+async def read_request_body(request: Request) -> DocumentBuffer:
     """
-     Processes raw binary input stream, file, or
+     Spools the raw request body without blocking the event loop: from `wsgi.input` when served through
+        the WSGI bridge (gunicorn sync workers), otherwise chunk by chunk from the ASGI server
+    """
+
+    environ: dict | None = request.scope.get("wsgi_environ")
+    if environ is not None:
+        input_stream: IO[bytes] = environ["wsgi.input"]
+        return await run_in_threadpool(spool_body, input_stream)
+
+    return await spool_body_async(request.stream())
+
+
+@overload
+async def read_process_input(request: Request,
+                             file: UploadFile | None,
+                             batch: Literal[False] = False) -> ProcessInput | ORJSONResponse: ...
+
+
+@overload
+async def read_process_input(request: Request,
+                             file: UploadFile | None,
+                             batch: Literal[True]) -> ProcessInput | list[ProcessInput] | ORJSONResponse: ...
+
+
+async def read_process_input(request: Request,
+                             file: UploadFile | None,
+                             batch: bool = False) -> ProcessInput | list[ProcessInput] | ORJSONResponse:
+    """
+     Reads the document from a file upload, raw binary input stream, or
         JSON containing the binary_data field in base64 format
 
+    Request bodies above OCR_SERVICE_REQUEST_SPOOL_MB are spooled to a memory-mapped temp file and
+    their binary_data is located by a streaming scan and base64-decoded incrementally, so the document
+    is never held in memory more than once. The caller releases it with `ProcessInput.close()`.
+
+    With `batch`, a JSON array body gives one ProcessInput per record, a record that cannot be read carries
+    its 422 `error` instead of failing the others. Otherwise only the first record of an array is read.
+
     Returns:
-        Response: json with the result of the OCR processing
+        ProcessInput (list of them for a batch), or the 422 response to send back for an invalid JSON payload
     """
 
-    footer: dict = {}
-    file_name: str = ""
-    stream: bytes = b""
-    output_text: str = ""
-    doc_metadata: dict = {}
+    process_input = ProcessInput()
 
     if file:
-        file_name = file.filename if file.filename else ""
-        stream = file.file.read()
-        log.info(f"Processing file given via 'file' parameter, file name: {file_name}")
-    else:
-        file_name = uuid.uuid4().hex
-        log.info(f"Processing binary as data-binary, generated file name: {file_name}")
+        process_input.file_name = file.filename if file.filename else ""
+        process_input.stream = await run_in_threadpool(read_upload, file.file)
+        log.info(f"Processing file given via 'file' parameter, file name: {process_input.file_name}")
+        return process_input
+
+    process_input.file_name = uuid.uuid4().hex
+    log.info(f"Processing binary as data-binary, generated file name: {process_input.file_name}")
+
+    raw_body: DocumentBuffer = await read_request_body(request)
+
+    # scanning and decoding a large body is CPU bound
+    return await run_in_threadpool(_parse_process_body, raw_body, process_input, batch)
 
-        environ: dict = request.scope.get("wsgi_environ", {})
-        input_stream: IO[bytes] = environ.get("wsgi.input", {})
 
-        raw_body: bytes = input_stream.read()
+def _parse_process_body(raw_body: DocumentBuffer,
+                        process_input: ProcessInput,
+                        batch: bool = False) -> ProcessInput | list[ProcessInput] | ORJSONResponse:
+    """Fill `process_input` from a raw body: JSON record(s), a base64 string or the document itself."""
+
+    try:
+        body, binary_data_spans = parse_json_body(raw_body)
+    except ValueError:
+        log.warning("Stream does not contain valid JSON.")
 
         try:
-            record = orjson.loads(raw_body)
-            if isinstance(record, list) and len(record) > 0:
-                record = record[0]
-
-            log.info("Stream contains valid JSON.")
-
-            if not isinstance(record, dict):
-                return ORJSONResponse(content={"detail": "Invalid JSON payload"}, status_code=422)
-
-            try:
-                payload = ProcessRequest.model_validate(record)
-            except ValidationError as exc:
-                return ORJSONResponse(content={"detail": exc.errors()}, status_code=422)
-
-            footer = payload.footer or {}
-            encoded: str | None = payload.binary_data
-
-            if encoded is None:
-                doc_metadata = {
-                    "ocr_skipped": True,
-                    "skip_reason": "no_binary_data",
-                }
-                log.info("binary_data is null; OCR skipped")
-            elif encoded == "":
-                return ORJSONResponse(
-                    content={"detail": "binary_data cannot be an empty string"},
-                    status_code=422,
-                )
-            else:
-                try:
-                    stream = base64.b64decode(encoded, validate=True)
-                    log.info("binary_data successfully base64-decoded")
-                except (binascii.Error, ValueError):
-                    log.warning("binary_data is not valid base64; treating it as raw UTF-8 text")
-                    stream = encoded.encode("utf-8")
+            process_input.stream = decode_base64(raw_body)
+            log.info("Attempting to treat as base64 encoded string")
+        except (binascii.Error, ValueError):
+            log.info("Failed, forcing bytes")
+            process_input.stream = raw_body
+            return process_input
 
-        except Exception:
-            log.warning("Stream does not contain valid JSON." + str(traceback.format_exc()))
-
-            try:
-                try:
-                    stream = base64.b64decode(raw_body, validate=True)
-                    log.info("Attempting to treat as base64 encoded string")
-                except Exception:
-                    log.info("Failed, forcing bytes")
-                    stream = raw_body if isinstance(raw_body, bytes | bytearray) else str(raw_body).encode("utf-8")
-            except Exception:
-                stream = raw_body
-                log.warning("Could not convert raw body to utf-8, using raw input.")
+        release_buffer(raw_body)
+        return process_input
 
-    processor: Processor = request.app.state.processor
+    try:
+        log.info("Stream contains valid JSON.")
+
+        if batch and isinstance(body, list) and len(body) > 0:
+            log.info(f"Processing a batch of {len(body)} JSON records")
+            records = []
+            for index, record in enumerate(body):
+                record_input = ProcessInput(file_name=f"{process_input.file_name}_{index}")
+                _read_record(record, binary_data_spans.get(index), raw_body, record_input)
+                records.append(record_input)
+            return records
+
+        if isinstance(body, list) and len(body) > 1:
+            log.warning(f"Only the first of {len(body)} JSON records is processed by this endpoint")
+
+        record = body[0] if isinstance(body, list) and len(body) > 0 else body
+        _read_record(record, binary_data_spans.get(0), raw_body, process_input)
+        if process_input.error is not None:
+            return ORJSONResponse(content={"detail": process_input.error}, status_code=422)
+    finally:
+        release_buffer(raw_body)
+
+    return process_input
+
+
+def _read_record(record: Any,
+                 span: tuple[int, int] | None,
+                 raw_body: DocumentBuffer,
+                 process_input: ProcessInput) -> None:
+    """Decode the binary_data of one JSON record (found at `span` of `raw_body`) into `process_input`."""
+
+    if not isinstance(record, dict):
+        process_input.error = "Invalid JSON payload"
+        return
+
+    footer = record.get("footer")
+    process_input.footer = footer if isinstance(footer, dict) else {}
 
     try:
-        if stream:
-            output_text, doc_metadata = processor.process_stream(stream=stream, file_name=file_name)
-    except Exception:
-        return ORJSONResponse(content={"detail": "Service is busy, try again"}, status_code=503)
-    
-    log.debug(f"Stream size: {len(stream)} bytes")
+        payload = ProcessRequest.model_validate(record)
+    except ValidationError as exc:
+        process_input.error = exc.errors()
+        return
+
+    process_input.footer = payload.footer or {}
+
+    if payload.binary_data is None:
+        process_input.doc_metadata = {
+            "ocr_skipped": True,
+            "skip_reason": "no_binary_data",
+        }
+        log.info("binary_data is null; OCR skipped")
+    elif span is not None and span[0] < span[1]:
+        process_input.stream = _decode_binary_data_span(raw_body, *span)
+    elif payload.binary_data == "":
+        process_input.error = "binary_data cannot be an empty string"
+    else:
+        # binary_data the scan did not locate (e.g. a key written with escapes) was parsed as usual
+        process_input.stream = _decode_binary_data(payload.binary_data)
+
+
+async def admit(processor: Processor, process_inputs: list[ProcessInput]) -> AdmissionTicket | ORJSONResponse:
+    """
+     Reserves the estimated pages of the request in the worker's in-flight budget, probing the documents
+        off the event loop
+
+    Returns:
+        AdmissionTicket to release once processed, or the 429 response (documents already released)
+        telling the client when to retry
+    """
+
+    try:
+        return await run_in_threadpool(processor.admission.admit, [item.stream for item in process_inputs])
+    except AdmissionRejectedError as exc:
+        for item in process_inputs:
+            item.close()
+        return too_many_requests(exc)
+
+
+def too_many_requests(exc: AdmissionRejectedError) -> ORJSONResponse:
+    log.warning(f"Request rejected, worker is saturated: {exc}")
+    return ORJSONResponse(content={"detail": "Service is busy, try again later"},
+                          status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                          headers={"Retry-After": str(exc.retry_after)})
+
+
+def build_process_response(output_text: str,
+                           doc_metadata: dict,
+                           footer: dict | None = None,
+                           has_stream: bool = True) -> tuple[dict[Any, Any], int]:
+    """Wrap a processing result in the `/api/process` response body and pick its status code."""
 
     ocr_skipped = bool(doc_metadata.get("ocr_skipped"))
-    code = 200 if len(output_text) > 0 or not stream or ocr_skipped else 500
+    code = 200 if len(output_text) > 0 or not has_stream or ocr_skipped else 500
 
     response: dict[Any, Any] = {
         "result": build_response(
@@ -124,72 +261,270 @@ def process(request: Request, file: UploadFile | None = File(default=None)) -> O
         )
     }
 
+    return response, code
+
+
+@process_api.post("/process", response_model=ProcessResponse | list[ProcessRecordResponse],
+                  response_class=ORJSONResponse)
+async def process(request: Request, file: UploadFile | None = File(default=None)) -> ORJSONResponse:
+    """
+     Processes raw binary input stream, file, or
+        JSON containing the binary_data field in base64 format
+
+    A JSON array of records is processed as a batch: the records run concurrently within the worker's
+    document budget and the response is an array of `{"status", "result"}` in record order, a record
+    that fails does not fail the others.
+
+    Returns:
+        Response: json with the result of the OCR processing
+    """
+
+    processor: Processor = request.app.state.processor
+
+    process_input = await read_process_input(request, file, batch=True)
+    if isinstance(process_input, ORJSONResponse):
+        return process_input
+    if isinstance(process_input, list):
+        ticket = await admit(processor, process_input)
+        if isinstance(ticket, ORJSONResponse):
+            return ticket
+        # the records are queued before any is awaited, a cancelled request (e.g. the client disconnected)
+        # leaves each record to release its stream and its share of the ticket once it is processed
+        futures = _submit_records(processor, process_input, ticket.split())
+        results = await asyncio.gather(*(_record_result(record, future)
+                                         for record, future in zip(process_input, futures, strict=True)))
+        return ORJSONResponse(content=results, media_type="application/json")
+
+    ticket = await admit(processor, [process_input])
+    if isinstance(ticket, ORJSONResponse):
+        return ticket
+
+    stream = process_input.stream
+    stream_size = len(stream)
+    output_text: str = ""
+    doc_metadata: dict = process_input.doc_metadata
+
+    try:
+        # process_stream_async owns the stream and the ticket, it releases them once the document is done
+        if stream:
+            output_text, doc_metadata = await processor.process_stream_async(stream=stream,
+                                                                             file_name=process_input.file_name,
+                                                                             ticket=ticket, pages=ticket.cost)
+    except Exception:
+        return ORJSONResponse(content={"detail": "Service is busy, try again"}, status_code=503)
+    finally:
+        if stream_size == 0:
+            ticket.release()
+
+    log.debug(f"Stream size: {stream_size} bytes")
+
+    response, code = build_process_response(output_text, doc_metadata, footer=process_input.footer,
+                                            has_stream=stream_size > 0)
+
     return ORJSONResponse(content=response, status_code=code, media_type="application/json")
 
 
+def _submit_records(processor: Processor,
+                    records: list[ProcessInput],
+                    tickets: list[AdmissionTicket]) -> list[Future | None]:
+    """Queue the records of a JSON array batch, None for a record with nothing to process.
+
+    `tickets` are the records' shares of the admission ticket, a queued record releases its stream and its
+    share once processed (see `Processor.submit_stream`).
+    """
+    futures: list[Future | None] = []
+    try:
+        for record, record_ticket in zip(records, tickets, strict=True):
+            if record.error is None and len(record.stream) > 0:
+                futures.append(processor.submit_stream(record.stream, record.file_name, ticket=record_ticket,
+                                                       pages=record_ticket.cost))
+            else:
+                record_ticket.release()
+                futures.append(None)
+    except BaseException:
+        # the records not queued yet still hold their stream and their share
+        for record, record_ticket in zip(records[len(futures):], tickets[len(futures):], strict=True):
+            record.close()
+            record_ticket.release()
+        raise
+    return futures
+
+
+async def _record_result(process_input: ProcessInput, future: Future | None) -> dict[str, Any]:
+    """Wait for one record of a JSON array batch, see `_submit_records`, and build its `{"status", "result"}`
+    entry of the response."""
+
+    if process_input.error is not None:
+        result = build_response("", footer=process_input.footer, log_message="Invalid record.")
+        return {"status": 422, "detail": process_input.error, "result": result}
+
+    output_text: str = ""
+    doc_metadata: dict = process_input.doc_metadata
+
+    try:
+        if future is not None:
+            output_text, doc_metadata = await asyncio.wrap_future(future)
+    except Exception:
+        log.exception("Processing failed for batch record: " + process_input.file_name)
+        result = build_response("", footer=process_input.footer, log_message="Processing failed.")
+        return {"status": 500, "result": result}
+
+    response, code = build_process_response(output_text, doc_metadata, footer=process_input.footer,
+                                            has_stream=future is not None)
+    return {"status": code, **response}
+
+
+def _format_event(event: str, data: dict[str, Any], sse: bool) -> bytes:
+    if sse:
+        return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+    return orjson.dumps({"event": event, **data}) + b"\n"
+
+
+@process_api.post("/process_stream", response_model=None)
+async def process_streaming(request: Request,
+                            file: UploadFile | None = File(default=None)) -> StreamingResponse | ORJSONResponse:
+    """
+     Streaming variant of /api/process, accepts the same input
+
+    Every page is sent as soon as it is done (in completion order, not page order) as a `page` event:
+    `{"page", "source", "text", "confidence", "elapsed_time", "pages_done", "pages_total"}`, followed by a
+    final `summary` event holding the `status` and the /api/process `result`. Events are NDJSON lines
+    (`{"event": ..., ...}`), or Server-Sent Events when the request accepts `text/event-stream`.
+    """
+
+    process_input = await read_process_input(request, file)
+    if isinstance(process_input, ORJSONResponse):
+        return process_input
+
+    processor: Processor = request.app.state.processor
+    ticket = await admit(processor, [process_input])
+    if isinstance(ticket, ORJSONResponse):
+        return ticket
+
+    sse = "text/event-stream" in request.headers.get("accept", "")
+    events: Queue = Queue()
+
+    def page_callback(page_result: PageResult) -> None:
+        events.put(("page", page_result.model_dump()))
+
+    def finish(future: Future | None) -> None:
+        output_text: str = ""
+        doc_metadata: dict = process_input.doc_metadata
+        try:
+            if future is not None:
+                output_text, doc_metadata = future.result()
+            response, code = build_process_response(output_text, doc_metadata, footer=process_input.footer,
+                                                    has_stream=future is not None)
+            events.put(("summary", {"status": code, **response}))
+        except Exception:
+            log.exception("Streamed processing failed for file: " + process_input.file_name)
+            events.put(("summary", {"status": 503, "detail": "Service is busy, try again"}))
+        finally:
+            process_input.close()
+            ticket.release()
+            events.put(_END_OF_EVENTS)
+
+    # pages are sent while later ones are still in OCR on the worker's document executor
+    if process_input.stream:
+        processor.batch_executor.submit(process_input.stream, process_input.file_name, page_callback=page_callback,
+                                        pages=ticket.cost).add_done_callback(finish)
+    else:
+        finish(None)
+
+    def stream_events() -> Iterator[bytes]:
+        while (event := events.get()) is not _END_OF_EVENTS:
+            event_name, data = event
+            yield _format_event(event_name, data, sse=sse)
+
+    if sse:
+        return StreamingResponse(stream_events(), media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    return StreamingResponse(stream_events(), media_type="application/x-ndjson")
+
+
 @process_api.post("/process_file", response_model=ProcessResponse, response_class=ORJSONResponse)
-def process_file(request: Request, file: UploadFile = File(...)) -> ORJSONResponse:
+async def process_file(request: Request, file: UploadFile = File(...)) -> ORJSONResponse:
 
     file_name: str = file.filename if file.filename else ""
-    stream: bytes = file.file.read()
+    stream: DocumentBuffer = await run_in_threadpool(read_upload, file.file)
+    stream_size = len(stream)
     log.info(f"Processing file: {file_name}")
 
     processor: Processor = request.app.state.processor
+    ticket = await admit(processor, [ProcessInput(stream=stream, file_name=file_name)])
+    if isinstance(ticket, ORJSONResponse):
+        return ticket
 
     output_text: str = ""
     doc_metadata: dict = {}
 
     try:
+        # process_stream_async owns the stream and the ticket, it releases them once the document is done
         if stream:
-            output_text, doc_metadata = processor.process_stream(stream=stream, file_name=file_name)
+            output_text, doc_metadata = await processor.process_stream_async(stream=stream, file_name=file_name,
+                                                                             ticket=ticket, pages=ticket.cost)
     except Exception:
         return ORJSONResponse(content={"detail": "Service is busy, try again"}, status_code=503)
+    finally:
+        if stream_size == 0:
+            ticket.release()
 
-    ocr_skipped = bool(doc_metadata.get("ocr_skipped"))
-    code = 200 if len(output_text) > 0 or not stream or ocr_skipped else 500
-
-    response: dict[Any, Any] = {
-        "result": build_response(
-            output_text,
-            metadata=doc_metadata,
-            allow_empty_text=ocr_skipped,
-        )
-    }
+    response, code = build_process_response(output_text, doc_metadata, has_stream=stream_size > 0)
 
     return ORJSONResponse(content=response, status_code=code, media_type="application/json")
 
 
-@process_api.post("/process_bulk")
-def process_bulk(request: Request, files: list[UploadFile] = File(...)) -> Response:
+@process_api.post("/process_bulk", response_model=None)
+def process_bulk(request: Request,
+                 files: list[UploadFile] = File(...)) -> StreamingResponse | ORJSONResponse:
     """
         Processes multiple files in a single request (multipart/form-data with multiple 'files').
+
+    Files are processed concurrently within the worker's bulk concurrency budget, each under its own
+    deadline. One NDJSON line is streamed back per file as soon as it finishes (not in upload order):
+    `{"index": ..., "file_name": ..., "status": ..., "result": {...}}`, status 504 meaning the file timed out.
+    The whole request is answered 429 when its pages do not fit in the worker's admission budget.
     """
 
-    form: FormData | None = request._form
-    file_streams = {}
+    documents = []
+    for file in files:
+        documents.append((file.filename or uuid.uuid4().hex, read_upload(file.file)))
 
-    proc_results = list()
-    ocr_results = []
+    log.info(f"Processing {len(documents)} file(s) in bulk")
 
     processor: Processor = request.app.state.processor
 
-    if isinstance(form, FormData):
-        # collect uploaded files
-        for _name, file in form.items():
-            if isinstance(file, UploadFile):
-                content = file.read()
-                file_streams[file.filename] = content
-
-        with Pool(processes=settings.CPU_THREADS) as process_pool:
-            for file_name, file_stream in file_streams.items():
-                proc_results.append(process_pool.starmap_async(processor.process_stream,
-                                                               [(file_name, file_stream)],
-                                                               chunksize=1,
-                                                               error_callback=logging.error))
-            try:
-                for result in proc_results:
-                    ocr_results.append(result.get(timeout=settings.TESSERACT_TIMEOUT))
-            except Exception as exception:
-                raise Exception("OCR exception generated by worker: " + str(traceback.format_exc())) from exception
-
-    return Response(content={"response": "Not yet implemented"}, status_code=200)
+    try:
+        ticket = processor.admission.admit(stream for _, stream in documents)
+    except AdmissionRejectedError as exc:
+        for _, stream in documents:
+            release_buffer(stream)
+        return too_many_requests(exc)
+
+    tickets = ticket.split()
+
+    def document_done(index: int, _: Future) -> None:
+        # also called for documents reported as timed out, once their processing thread returns, and for
+        # documents cancelled when the client disconnects
+        release_buffer(documents[index][1])
+        tickets[index].release()
+
+    def stream_results() -> Iterator[bytes]:
+        for batch_result in processor.batch_executor.iter_results(documents, pages=ticket.costs,
+                                                                  on_done=document_done):
+            if batch_result.timed_out:
+                code = 504
+                result = build_response("", metadata={"timed_out": True})
+                result["metadata"]["log_message"] = "Processing deadline exceeded."
+            else:
+                response, code = build_process_response(batch_result.text, batch_result.metadata)
+                result = response["result"]
+
+            yield orjson.dumps({
+                "index": batch_result.index,
+                "file_name": batch_result.file_name,
+                "status": code,
+                "result": result,
+            }) + b"\n"
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
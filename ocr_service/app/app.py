@@ -11,9 +11,10 @@ from fastapi import FastAPI
 from fastapi.responses import ORJSONResponse
 
 from ocr_service.api import api
+from ocr_service.processor.page_bitmap import cleanup_stale_page_bitmaps
 from ocr_service.processor.processor import Processor
 from ocr_service.settings import settings
-from ocr_service.utils.utils import cleanup_stale_lo_profiles, get_assigned_port, terminate_hanging_process
+from ocr_service.utils.utils import cleanup_stale_lo_profiles, cpu_sizing, get_assigned_port, terminate_hanging_process
 
 # guard so LibreOffice startup runs only once per worker
 _started: bool = False
@@ -81,11 +82,14 @@ def start_office_converter_servers() -> dict[str, Any]:
         logging.debug (f"checking port match {_port_num} - {assigned_port}")
         if int(port_num) == assigned_port and settings.OCR_WEB_SERVICE_THREADS == 1:
             logging.debug("assigned_port matching, starting ....")
-            process = start_office_server(_port_num)
-            loffice_processes[_port_num] = process
-            logging.info("STARTED WORKER ON PORT: %s PID: %s ASSIGNED PORT: %s",
-            _port_num, os.getpid(), assigned_port,
-            )
+            # the worker owns LIBRE_OFFICE_INSTANCES_PER_WORKER consecutive ports from its assigned port
+            for instance_port in range(assigned_port, assigned_port + settings.LIBRE_OFFICE_INSTANCES_PER_WORKER):
+                _port_num = str(instance_port)
+                process = start_office_server(_port_num)
+                loffice_processes[_port_num] = process
+                logging.info("STARTED WORKER ON PORT: %s PID: %s ASSIGNED PORT: %s",
+                _port_num, os.getpid(), assigned_port,
+                )
             break
         elif (settings.OCR_WEB_SERVICE_WORKERS == 1 and settings.OCR_WEB_SERVICE_THREADS > 1):
             process = start_office_server(_port_num)
@@ -154,12 +158,24 @@ def create_app() -> FastAPI:
         # start once per worker
         if not _started:
             _started = True
+            sizing = cpu_sizing()
+            logging.info(
+                f"cpu sizing: {sizing['available_cpus']} CPUs available (host={sizing['host_cpus']}, "
+                f"cpuset={sizing['cpuset_cpus']}, quota={sizing['cpu_quota']}), "
+                f"workers={sizing['workers']}, cpu_threads={sizing['cpu_threads']} ({sizing['cpu_threads_mode']}), "
+                f"converter_threads={sizing['converter_threads']} ({sizing['converter_threads_mode']}), "
+                f"libreoffice_instances={sizing['libre_office_instances']}"
+            )
             # clean stale LibreOffice profiles before starting new processes
             cleanup_stale_lo_profiles()
+            # and page bitmap segments left behind by crashed workers
+            cleanup_stale_page_bitmaps()
             # Start LibreOffice unoserver processes
             loffice_processes = start_office_converter_servers()
             processor = Processor()
             processor.loffice_process_list.update(loffice_processes)
+            if settings.OPERATION_MODE != "NO_OCR":
+                processor.converter.render_pool.start()
             app.state.processor = processor
 
             # Start monitor thread
@@ -189,6 +205,7 @@ def create_app() -> FastAPI:
                         terminate_hanging_process(p.pid)
                     except Exception as e:
                         logging.error("error in when shutting down libreoffice process: " + str(e))
+            processor.close()
         
         atexit.register(cleanup)
 
@@ -0,0 +1,6 @@
+from .corpus import CORPUS, BenchmarkDocument, select_documents
+from .report import format_report, read_report, write_report
+from .runner import BenchmarkRunner
+
+__all__: list[str] = ['CORPUS', 'BenchmarkDocument', 'BenchmarkRunner', 'select_documents', 'format_report',
+                      'read_report', 'write_report']
@@ -0,0 +1,5 @@
+import sys
+
+from ocr_service.benchmark.cli import main
+
+sys.exit(main())
@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import math
+import re
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime
+from typing import Any
+
+from ocr_service.benchmark.load import LoadRequest, run_load
+from ocr_service.benchmark.report import format_table
+from ocr_service.benchmark.runner import RssSampler, environment
+from ocr_service.benchmark.service import REPO_ROOT, local_service
+from ocr_service.utils.cpu import cpu_limits
+
+ENV_TEMPLATE_PATH = REPO_ROOT / "env" / "ocr_service.env"
+
+# memory of the chosen combination over its measured peak, for the request and the limit
+MEMORY_REQUEST_HEADROOM = 1.25
+MEMORY_LIMIT_HEADROOM = 1.5
+MEMORY_STEP_MB = 256
+MIN_MEMORY_MB = 512
+
+
+@dataclass(frozen=True)
+class Candidate:
+    """One combination of the swept settings."""
+
+    workers: int
+    cpu_threads: int
+    converter_threads: int
+
+    @property
+    def name(self) -> str:
+        return f"workers={self.workers} cpu={self.cpu_threads} converter={self.converter_threads}"
+
+    @property
+    def cores(self) -> int:
+        """Cores the combination keeps busy: every worker OCRs on `cpu_threads` or renders and converts
+        on `converter_threads` cores."""
+        return self.workers * max(self.cpu_threads, self.converter_threads)
+
+    def env(self) -> dict[str, str]:
+        return {
+            "OCR_WEB_SERVICE_WORKERS": str(self.workers),
+            "OCR_SERVICE_CPU_THREADS": str(self.cpu_threads),
+            "OCR_SERVICE_CONVERTER_THREADS": str(self.converter_threads),
+        }
+
+
+def _powers_of_two_up_to(limit: int) -> list[int]:
+    values = {1 << exponent for exponent in range(limit.bit_length()) if 1 << exponent <= limit}
+    return sorted(values | {max(limit, 1)})
+
+
+def candidate_grid(cores: int,
+                   workers: list[int] | None = None,
+                   cpu_threads: list[int] | None = None,
+                   converter_threads: list[int] | None = None,
+                   oversubscription: float = 1.0) -> list[Candidate]:
+    """Combinations to sweep on a machine of `cores` cores.
+
+    Values not given are powers of two up to the cores (plus the core count itself). Combinations that
+    keep more than `cores * oversubscription` cores busy are left out, they only add contention.
+    """
+    default = _powers_of_two_up_to(cores)
+    return [
+        Candidate(worker_count, cpu_count, converter_count)
+        for worker_count in workers or default
+        for cpu_count in cpu_threads or default
+        for converter_count in converter_threads or default
+        if worker_count * max(cpu_count, converter_count) <= cores * oversubscription
+    ]
+
+
+def choose(results: list[dict[str, Any]],
+           max_p95: float | None = None,
+           max_error_rate: float = 0.01) -> tuple[dict[str, Any] | None, bool]:
+    """Pick the result with the highest docs/s among those within the p95 latency and error (including
+    503 and 429) rate limits, ties going to the lower p95. When none is within the limits the highest
+    docs/s overall is returned; the flag tells whether the limits were met."""
+
+    def within_limits(result: dict[str, Any]) -> bool:
+        failed = result["error_rate"] + result["rate_503"] + result["rate_429"]
+        return failed <= max_error_rate and (max_p95 is None or result["p95"] <= max_p95)
+
+    def ranking(result: dict[str, Any]) -> tuple[float, float]:
+        return result["docs_per_sec"], -result["p95"]
+
+    eligible = [result for result in results if within_limits(result)]
+    if eligible:
+        return max(eligible, key=ranking), True
+    return (max(results, key=ranking) if results else None), False
+
+
+def _round_up_mb(value_mb: float) -> int:
+    return max(MIN_MEMORY_MB, int(math.ceil(value_mb / MEMORY_STEP_MB) * MEMORY_STEP_MB))
+
+
+def recommend_resources(candidate: Candidate, peak_rss_mb: float) -> dict[str, dict[str, str]]:
+    """Kubernetes resources of the chosen combination, CPU from the cores it keeps busy and memory from
+    the peak RSS measured under load, with headroom."""
+    cpu = str(candidate.cores)
+    return {
+        "limits": {"cpu": cpu, "memory": f"{_round_up_mb(peak_rss_mb * MEMORY_LIMIT_HEADROOM)}Mi"},
+        "requests": {"cpu": cpu, "memory": f"{_round_up_mb(peak_rss_mb * MEMORY_REQUEST_HEADROOM)}Mi"},
+    }
+
+
+def render_env_file(template: str, values: dict[str, str], header: str) -> str:
+    """`template` (the contents of env/ocr_service.env) with the `values` assignments replaced, values
+    missing from the template are appended."""
+    remaining = dict(values)
+
+    def replace(match: re.Match[str]) -> str:
+        name = match.group(1)
+        return f"{name}={remaining.pop(name)}" if name in remaining else match.group(0)
+
+    text = re.sub(r"^([A-Z][A-Z0-9_]*)=.*$", replace, template, flags=re.MULTILINE)
+    if remaining:
+        text = text.rstrip("\n") + "\n\n" + "\n".join(f"{name}={value}" for name, value in remaining.items()) + "\n"
+    return header + text
+
+
+def render_values_file(candidate: Candidate, resources: dict[str, dict[str, str]], header: str) -> str:
+    """Helm values overlay (`-f`) with the resources and the env of the chosen combination."""
+    lines = [header.rstrip("\n"), "resources:"]
+    for section in ("limits", "requests"):
+        lines += [f"  {section}:", f"    cpu: \"{resources[section]['cpu']}\"",
+                  f"    memory: {resources[section]['memory']}"]
+    lines.append("env:")
+    lines += [f"  {name}: \"{value}\"" for name, value in candidate.env().items()]
+    return "\n".join(lines) + "\n"
+
+
+def docker_env(candidate: Candidate, resources: dict[str, dict[str, str]]) -> dict[str, str]:
+    """The swept settings plus the docker-compose resource variables of env/ocr_service.env."""
+    return {
+        **candidate.env(),
+        "OCR_SERVICE_DOCKER_CPU_MAX": f"{float(resources['limits']['cpu']):.1f}",
+        "OCR_SERVICE_DOCKER_CPU_MIN": f"{float(resources['requests']['cpu']):.1f}",
+        "OCR_SERVICE_DOCKER_RAM_MAX": resources["limits"]["memory"].replace("Mi", "m"),
+        "OCR_SERVICE_DOCKER_RAM_MIN": resources["requests"]["memory"].replace("Mi", "m"),
+    }
+
+
+def measure_candidate(candidate: Candidate,
+                      requests: list[LoadRequest],
+                      concurrency: int,
+                      duration: float,
+                      warmup: float,
+                      port: int = 8090,
+                      log_path: str | None = None) -> dict[str, Any]:
+    """Start the service with the candidate's settings, warm it up, then load it at `concurrency` for
+    `duration` seconds and return its figures."""
+    with local_service(env=candidate.env(), port=port, log_path=log_path) as (base_url, process):
+        if warmup > 0:
+            run_load(base_url, requests, duration=warmup, concurrency=concurrency)
+        with RssSampler(interval=0.5, pid=process.pid) as rss:
+            report = run_load(base_url, requests, duration=duration, concurrency=concurrency)
+
+    client = report["client"]
+    return {
+        **asdict(candidate),
+        "name": candidate.name,
+        "cores": candidate.cores,
+        "requests": client["requests"],
+        "docs_per_sec": client["docs_per_sec"],
+        "pages_per_sec": client["pages_per_sec"],
+        "p50": client["latency"]["p50"],
+        "p95": client["latency"]["p95"],
+        "p99": client["latency"]["p99"],
+        "error_rate": client["error_rate"],
+        "rate_503": client["rate_503"],
+        "rate_429": client["rate_429"],
+        "peak_rss_mb": round(rss.peak / (1024 * 1024), 1),
+        "server_stages": report["server"]["stages"],
+    }
+
+
+def calibrate_capacity(candidates: list[Candidate],
+                       requests: list[LoadRequest],
+                       concurrency: int,
+                       duration: float,
+                       warmup: float,
+                       max_p95: float | None = None,
+                       max_error_rate: float = 0.01,
+                       measure: Callable[..., dict[str, Any]] = measure_candidate,
+                       **measure_args: Any) -> dict[str, Any]:
+    """Measure every candidate and return the calibration report with the recommended settings."""
+    results = [measure(candidate, requests, concurrency, duration, warmup, **measure_args)
+               for candidate in candidates]
+    chosen, constraints_met = choose(results, max_p95=max_p95, max_error_rate=max_error_rate)
+
+    report: dict[str, Any] = {
+        "created": datetime.now(UTC).isoformat(timespec="seconds"),
+        "environment": environment(),
+        "load": {"concurrency": concurrency, "duration": duration, "warmup": warmup},
+        "limits": {"max_p95": max_p95, "max_error_rate": max_error_rate},
+        "results": results,
+        "recommendation": None,
+    }
+    if chosen is not None:
+        candidate = Candidate(chosen["workers"], chosen["cpu_threads"], chosen["converter_threads"])
+        resources = recommend_resources(candidate, chosen["peak_rss_mb"])
+        report["recommendation"] = {
+            "candidate": chosen["name"],
+            "constraints_met": constraints_met,
+            "env": docker_env(candidate, resources),
+            "resources": resources,
+        }
+    return report
+
+
+def recommendation_header(report: dict[str, Any]) -> str:
+    environment_info = report["environment"]
+    chosen = next(result for result in report["results"]
+                  if result["name"] == report["recommendation"]["candidate"])
+    return (f"# recommended by `python -m ocr_service.benchmark calibrate` on {environment_info['host']} "
+            f"({environment_info['cpu_count']} CPUs), {report['created']}\n"
+            f"# {chosen['docs_per_sec']:g} docs/s, p95 {chosen['p95']:g}s, peak RSS {chosen['peak_rss_mb']:g} MB "
+            f"at concurrency {report['load']['concurrency']}\n")
+
+
+def format_calibration(report: dict[str, Any]) -> str:
+    rows = [(result["name"], result["cores"], result["docs_per_sec"], result["pages_per_sec"], result["p50"],
+             result["p95"], result["p99"], f"{result['error_rate'] + result['rate_503'] + result['rate_429']:.2%}",
+             result["peak_rss_mb"])
+            for result in sorted(report["results"], key=lambda result: -result["docs_per_sec"])]
+    lines = [format_table(rows, ("combination", "cores", "docs/s", "pages/s", "p50", "p95", "p99", "failed",
+                                 "rss MB"))]
+    recommendation = report["recommendation"]
+    if recommendation is not None:
+        lines.append("")
+        lines.append(f"Recommended: {recommendation['candidate']}"
+                     + ("" if recommendation["constraints_met"] else " (no combination met the limits)"))
+    return "\n".join(lines)
+
+
+def default_cores() -> int:
+    """CPUs of the container the calibration runs in (cgroup quota and cpuset), not of the host."""
+    return cpu_limits().available
@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+from ocr_service.benchmark.calibrate import (
+    ENV_TEMPLATE_PATH,
+    calibrate_capacity,
+    candidate_grid,
+    default_cores,
+    format_calibration,
+    recommendation_header,
+    render_env_file,
+    render_values_file,
+)
+from ocr_service.benchmark.corpus import CORPUS, select_documents
+from ocr_service.benchmark.load import (
+    DEFAULT_DOCUMENT_WEIGHTS,
+    DEFAULT_KIND_WEIGHTS,
+    KINDS,
+    LoadRequest,
+    build_requests,
+    format_load_report,
+    parse_weights,
+    run_load,
+)
+from ocr_service.benchmark.perf_check import DEFAULT_BASELINE_PATH, compare, format_comparisons, run_perf_scenarios
+from ocr_service.benchmark.report import format_report, read_report, write_report
+from ocr_service.benchmark.runner import MODES, PATHS, BenchmarkRunner
+from ocr_service.benchmark.service import in_process_service, local_service
+
+
+def run(args: argparse.Namespace) -> int:
+    documents = select_documents(args.documents)
+    with in_process_service(startup_wait=args.startup_wait) as (processor, client):
+        runner = BenchmarkRunner(processor, client, iterations=args.iterations, warmup=args.warmup)
+        report = runner.run(documents, modes=args.modes, paths=args.paths)
+
+    print(format_report(report))
+    if args.output:
+        write_report(report, args.output)
+        print(f"Report written to {args.output}")
+    return 0
+
+
+def check(args: argparse.Namespace) -> int:
+    baseline_path = Path(args.baseline)
+    baseline = read_report(baseline_path) if baseline_path.exists() else {}
+    if not baseline.get("scenarios"):
+        raise ValueError(f"No baseline results in {baseline_path}, record them with the update-baseline command")
+
+    with in_process_service(startup_wait=args.startup_wait) as (processor, client):
+        current = run_perf_scenarios(processor, client)
+
+    if args.output:
+        write_report(current, args.output)
+    comparisons = compare(current, baseline)
+    print(format_comparisons(comparisons))
+
+    unbaselined = [comparison for comparison in comparisons if comparison.baseline is None]
+    if unbaselined:
+        print(f"{len(unbaselined)} metric(s) have no baseline in {baseline_path} and were not checked",
+              file=sys.stderr)
+
+    regressions = [comparison for comparison in comparisons if comparison.is_regression]
+    if regressions:
+        print(f"{len(regressions)} regression(s) against {baseline_path}", file=sys.stderr)
+        return 1
+    print(f"No regressions against {baseline_path}")
+    return 0
+
+
+def update_baseline(args: argparse.Namespace) -> int:
+    baseline_path = Path(args.baseline)
+    with in_process_service(startup_wait=args.startup_wait) as (processor, client):
+        baseline = run_perf_scenarios(processor, client)
+
+    # tolerances tuned by hand in the committed baseline are kept
+    if baseline_path.exists():
+        tolerances = read_report(baseline_path).get("tolerances")
+        if tolerances:
+            baseline["tolerances"] = tolerances
+    write_report(baseline, baseline_path)
+    print(f"Baseline written to {baseline_path}")
+    return 0
+
+
+def parse_env(items: list[str] | None) -> dict[str, str]:
+    env: dict[str, str] = {}
+    for item in items or []:
+        name, separator, value = item.partition("=")
+        if not separator or not name:
+            raise ValueError(f"Invalid --env {item!r}, expected NAME=VALUE")
+        env[name] = value
+    return env
+
+
+def format_weights(weights: dict[str, int]) -> str:
+    return ",".join(f"{name}={weight}" for name, weight in weights.items())
+
+
+def load_requests(args: argparse.Namespace) -> list[LoadRequest]:
+    return build_requests(args.pool_size, seed=args.seed,
+                          kind_weights=parse_weights(args.mix, KINDS),
+                          document_weights=parse_weights(args.documents, [doc.name for doc in CORPUS]))
+
+
+def load(args: argparse.Namespace) -> int:
+    requests = load_requests(args)
+    load_args = {"duration": args.duration, "concurrency": args.concurrency, "rate": args.rate,
+                 "max_in_flight": args.max_in_flight, "max_requests": args.max_requests, "timeout": args.timeout}
+
+    if args.url:
+        report = run_load(args.url, requests, **load_args)
+    else:
+        with local_service(env=parse_env(args.env), port=args.port, keep_cache=args.keep_cache,
+                           log_path=args.service_log) as (base_url, _):
+            report = run_load(base_url, requests, **load_args)
+        report["service_env"] = parse_env(args.env)
+
+    print(format_load_report(report))
+    if args.output:
+        write_report(report, args.output)
+        print(f"Report written to {args.output}")
+    return 0
+
+
+def calibrate(args: argparse.Namespace) -> int:
+    cores = args.cores or default_cores()
+    candidates = candidate_grid(cores, workers=args.workers, cpu_threads=args.cpu_threads,
+                                converter_threads=args.converter_threads, oversubscription=args.oversubscription)
+    if not candidates:
+        raise ValueError(f"No combination of the given settings fits {cores} cores")
+    print(f"Calibrating {len(candidates)} combination(s) on {cores} cores")
+
+    report = calibrate_capacity(candidates, load_requests(args), concurrency=args.concurrency or 2 * cores,
+                                duration=args.duration, warmup=args.warmup, max_p95=args.max_p95,
+                                max_error_rate=args.max_error_rate, port=args.port, log_path=args.service_log)
+    print(format_calibration(report))
+    if args.output:
+        write_report(report, args.output)
+        print(f"Report written to {args.output}")
+
+    recommendation = report["recommendation"]
+    if recommendation is None:
+        return 1
+    header = recommendation_header(report)
+    env_file = render_env_file(ENV_TEMPLATE_PATH.read_text(), recommendation["env"], header)
+    values_file = render_values_file(
+        candidate=next(candidate for candidate in candidates if candidate.name == recommendation["candidate"]),
+        resources=recommendation["resources"],
+        header=header,
+    )
+    for path, text in ((args.env_output, env_file), (args.values_output, values_file)):
+        if path:
+            Path(path).write_text(text)
+            print(f"Written {path}")
+        else:
+            print("\n" + text)
+    return 0
+
+
+def add_corpus_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--pool-size", type=int, default=200,
+                        help="Distinct requests built and replayed in a cycle (default 200).")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic corpus (default 0).")
+    parser.add_argument("--mix", default=format_weights(DEFAULT_KIND_WEIGHTS),
+                        help="Weights of the request kinds (default %(default)s).")
+    parser.add_argument("--documents", default=format_weights(DEFAULT_DOCUMENT_WEIGHTS),
+                        help="Weights of the corpus documents (default %(default)s).")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m ocr_service.benchmark",
+                                     description="Benchmarks of the OCR service over the test corpus.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Process the corpus directly and through the HTTP app.")
+    run_parser.add_argument("--documents", nargs="+", metavar="NAME",
+                            help=f"Corpus documents (default all): {', '.join(doc.name for doc in CORPUS)}.")
+    run_parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES),
+                            help="Operation modes (default all).")
+    run_parser.add_argument("--paths", nargs="+", choices=PATHS, default=list(PATHS),
+                            help="direct: Processor.process_stream, http: POST /api/process (default both).")
+    run_parser.add_argument("--iterations", type=int, default=3, help="Measured runs per scenario (default 3).")
+    run_parser.add_argument("--warmup", type=int, default=1, help="Unmeasured runs per scenario (default 1).")
+    run_parser.add_argument("--startup-wait", type=float, default=15.0,
+                            help="Seconds given to LibreOffice to start (default 15).")
+    run_parser.add_argument("--output", help="Write the JSON report to this file.")
+    run_parser.set_defaults(handler=run)
+
+    for name, handler, help_text in (
+        ("check", check, "Run the perf scenarios and fail on regressions against the baseline."),
+        ("update-baseline", update_baseline, "Run the perf scenarios and store them as the baseline."),
+    ):
+        perf_parser = commands.add_parser(name, help=help_text)
+        perf_parser.add_argument("--baseline", default=str(DEFAULT_BASELINE_PATH),
+                                 help="Baseline JSON (default: the baseline committed with the package).")
+        perf_parser.add_argument("--startup-wait", type=float, default=15.0,
+                                 help="Seconds given to LibreOffice to start (default 15).")
+        if name == "check":
+            perf_parser.add_argument("--output", help="Also write the results of this run to this file.")
+        perf_parser.set_defaults(handler=handler)
+
+    load_parser = commands.add_parser("load", help="Replay a synthetic NiFi-style corpus against the service.")
+    target = load_parser.add_mutually_exclusive_group()
+    target.add_argument("--url", help="Base URL of a running service (default: start one locally with gunicorn).")
+    target.add_argument("--env", action="append", metavar="NAME=VALUE",
+                        help="Environment of the locally started service, e.g. OCR_WEB_SERVICE_WORKERS=4.")
+    load_parser.add_argument("--port", type=int, default=8090, help="Port of the locally started service.")
+    load_parser.add_argument("--keep-cache", action="store_true",
+                             help="Keep the result cache of the locally started service enabled.")
+    load_parser.add_argument("--service-log", help="Append the output of the locally started service here.")
+    arrival = load_parser.add_mutually_exclusive_group(required=True)
+    arrival.add_argument("--concurrency", type=int, help="Clients sending requests back to back.")
+    arrival.add_argument("--rate", type=float, help="Requests started per second, whatever the response times.")
+    load_parser.add_argument("--duration", type=float, default=60.0, help="Seconds of load (default 60).")
+    load_parser.add_argument("--max-requests", type=int, help="Stop after this many requests.")
+    load_parser.add_argument("--max-in-flight", type=int, default=64,
+                             help="Requests in flight at most with --rate (default 64).")
+    add_corpus_arguments(load_parser)
+    load_parser.add_argument("--timeout", type=float, default=300.0, help="Client timeout in seconds.")
+    load_parser.add_argument("--output", help="Write the JSON report to this file.")
+    load_parser.set_defaults(handler=load)
+
+    calibrate_parser = commands.add_parser(
+        "calibrate", help="Sweep workers, CPU and converter threads and recommend the settings of this machine.")
+    calibrate_parser.add_argument("--cores", type=int, help="Cores to size for (default: the CPUs of this machine).")
+    calibrate_parser.add_argument("--workers", type=int, nargs="+", help="OCR_WEB_SERVICE_WORKERS values.")
+    calibrate_parser.add_argument("--cpu-threads", type=int, nargs="+", help="OCR_SERVICE_CPU_THREADS values.")
+    calibrate_parser.add_argument("--converter-threads", type=int, nargs="+",
+                                  help="OCR_SERVICE_CONVERTER_THREADS values.")
+    calibrate_parser.add_argument("--oversubscription", type=float, default=1.0,
+                                  help="Busy cores allowed per core in a combination (default 1).")
+    calibrate_parser.add_argument("--concurrency", type=int, help="Clients of the load (default 2 x cores).")
+    calibrate_parser.add_argument("--duration", type=float, default=60.0,
+                                  help="Seconds of measured load per combination (default 60).")
+    calibrate_parser.add_argument("--warmup", type=float, default=15.0,
+                                  help="Seconds of unmeasured load per combination (default 15).")
+    calibrate_parser.add_argument("--max-p95", type=float, help="Highest acceptable p95 latency in seconds.")
+    calibrate_parser.add_argument("--max-error-rate", type=float, default=0.01,
+                                  help="Highest acceptable share of failed, 503 and 429 responses (default 0.01).")
+    add_corpus_arguments(calibrate_parser)
+    calibrate_parser.add_argument("--port", type=int, default=8090, help="Port of the started services.")
+    calibrate_parser.add_argument("--service-log", help="Append the output of the started services here.")
+    calibrate_parser.add_argument("--output", help="Write the JSON report to this file.")
+    calibrate_parser.add_argument("--env-output", help="Write the recommended env file here (default: print).")
+    calibrate_parser.add_argument("--values-output",
+                                  help="Write the recommended Helm values overlay here (default: print).")
+    calibrate_parser.set_defaults(handler=calibrate)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        return int(args.handler(args))
+    except (ValueError, RuntimeError, TimeoutError) as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 2
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+from pathlib import Path
+
+DOCS_ROOT = Path(__file__).resolve().parents[1] / "tests" / "resources" / "docs"
+
+
+@dataclass(frozen=True)
+class BenchmarkDocument:
+    """One document of the benchmark corpus."""
+
+    name: str
+    """Stable identifier used in scenario keys and on the command line."""
+
+    path: Path
+    format: str
+
+    def read(self) -> bytes:
+        return self.path.read_bytes()
+
+
+# the test fixtures, one document per supported format plus a long document and a scanned PDF
+CORPUS: tuple[BenchmarkDocument, ...] = (
+    BenchmarkDocument("doc", DOCS_ROOT / "generic" / "pat_id_1.doc", "doc"),
+    BenchmarkDocument("docx", DOCS_ROOT / "generic" / "pat_id_1.docx", "docx"),
+    BenchmarkDocument("odt", DOCS_ROOT / "generic" / "pat_id_1.odt", "odt"),
+    BenchmarkDocument("rtf", DOCS_ROOT / "generic" / "pat_id_1.rtf", "rtf"),
+    BenchmarkDocument("html", DOCS_ROOT / "generic" / "pat_id_1.html", "html"),
+    BenchmarkDocument("pdf", DOCS_ROOT / "generic" / "pat_id_1.pdf", "pdf"),
+    BenchmarkDocument("png", DOCS_ROOT / "generic" / "pat_id_1.png", "png"),
+    BenchmarkDocument("docx_20_pages", DOCS_ROOT / "generic" / "synthetic_medical_text_approx_20_pages.docx", "docx"),
+    BenchmarkDocument("scanned_pdf", DOCS_ROOT / "pdf" / "ex2_ocr.pdf", "pdf"),
+)
+
+
+def select_documents(names: Iterable[str] | None = None) -> list[BenchmarkDocument]:
+    """Documents of the corpus with the given names, in the order given, or the whole corpus."""
+    if not names:
+        return list(CORPUS)
+
+    by_name = {document.name: document for document in CORPUS}
+    unknown = [name for name in names if name not in by_name]
+    if unknown:
+        raise ValueError(f"Unknown benchmark document(s): {', '.join(unknown)}, "
+                         f"expected one of: {', '.join(by_name)}")
+    return [by_name[name] for name in names]
@@ -0,0 +1,389 @@
+from __future__ import annotations
+
+import base64
+import contextlib
+import itertools
+import random
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+import httpx
+import orjson
+from prometheus_client.parser import text_string_to_metric_families
+
+from ocr_service.benchmark.corpus import CORPUS, BenchmarkDocument
+from ocr_service.benchmark.report import format_table
+from ocr_service.benchmark.runner import environment, percentile
+from ocr_service.utils.metrics import STAGE_BUCKETS
+
+KIND_RECORD = "record"
+KIND_ARRAY = "array"
+KIND_MULTIPART = "multipart"
+KINDS = (KIND_RECORD, KIND_ARRAY, KIND_MULTIPART)
+
+DEFAULT_KIND_WEIGHTS: dict[str, int] = {KIND_RECORD: 6, KIND_ARRAY: 2, KIND_MULTIPART: 2}
+
+# share of the traffic per corpus document, mostly short letters and reports with some long documents and scans
+DEFAULT_DOCUMENT_WEIGHTS: dict[str, int] = {
+    "html": 4, "rtf": 2, "docx": 4, "doc": 2, "odt": 1, "pdf": 4, "png": 2, "docx_20_pages": 1, "scanned_pdf": 1,
+}
+
+ARRAY_RECORDS = (2, 5)
+PROCESS_ENDPOINT = "/api/process"
+METRICS_ENDPOINT = "/api/metrics"
+INFO_ENDPOINT = "/api/info"
+
+# samples of the service metrics summed up by a load run: sample name -> (group, label the group is keyed by)
+SERVER_SAMPLES: dict[str, tuple[str, str]] = {
+    "ocr_service_stage_duration_seconds_count": ("stage_count", "stage"),
+    "ocr_service_stage_duration_seconds_sum": ("stage_sum", "stage"),
+    "ocr_service_fallbacks_total": ("fallbacks", "reason"),
+    "ocr_service_errors_total": ("errors", "stage"),
+    "ocr_service_cache_lookups_total": ("cache", "result"),
+}
+
+# response time buckets of the latency histogram, from the stage histogram of the service
+LATENCY_BUCKETS = STAGE_BUCKETS
+
+
+@dataclass(frozen=True)
+class LoadRequest:
+    """One pre-built request of the synthetic corpus."""
+
+    kind: str
+    documents: tuple[str, ...]
+    content: bytes | None = None
+    """JSON body of record and array requests."""
+
+    file: tuple[str, bytes] | None = None
+    """(file name, bytes) of multipart uploads."""
+
+
+@dataclass(frozen=True)
+class LoadResult:
+    kind: str
+    status: int
+    """HTTP status, 0 when the request failed without a response (connection error, client timeout)."""
+
+    latency: float
+    documents: int
+    pages: int = 0
+
+
+def nifi_footer(document: BenchmarkDocument, rng: random.Random) -> dict[str, Any]:
+    """Footer of a record in the shape NiFi sends (see tests/resources/payloads)."""
+    start = datetime(2014, 1, 1, tzinfo=UTC) + timedelta(minutes=rng.randrange(10 * 365 * 24 * 60))
+    return {
+        "cid": rng.randrange(1, 100_000),
+        "id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "start": start.isoformat(),
+        "stop": (start + timedelta(minutes=rng.randrange(5, 60))).isoformat(),
+        "patient": str(uuid.UUID(int=rng.getrandbits(128))),
+        "code": str(rng.randrange(100_000_000, 999_999_999)),
+        "description": "Encounter for check up (procedure)",
+        "cost": round(rng.uniform(50, 500), 2),
+        "reasoncode": None,
+        "reasondescription": None,
+        "document": None,
+        "file_name": document.path.name,
+    }
+
+
+def build_requests(count: int,
+                   seed: int = 0,
+                   kind_weights: dict[str, int] | None = None,
+                   document_weights: dict[str, int] | None = None) -> list[LoadRequest]:
+    """Build `count` requests mixing the request kinds and corpus documents by weight, deterministic for
+    a given `seed`. Bodies are encoded here so building them is not part of the measured load."""
+    rng = random.Random(seed)
+    kind_weights = kind_weights or DEFAULT_KIND_WEIGHTS
+    document_weights = document_weights or DEFAULT_DOCUMENT_WEIGHTS
+    documents = [document for document in CORPUS if document_weights.get(document.name)]
+    contents = {document.name: document.read() for document in documents}
+    encoded: dict[str, str] = {}
+
+    def pick_document() -> BenchmarkDocument:
+        return rng.choices(documents, weights=[document_weights[document.name] for document in documents])[0]
+
+    def record(document: BenchmarkDocument) -> dict[str, Any]:
+        if document.name not in encoded:
+            encoded[document.name] = base64.b64encode(contents[document.name]).decode("ascii")
+        return {"binary_data": encoded[document.name], "footer": nifi_footer(document, rng)}
+
+    requests: list[LoadRequest] = []
+    for _ in range(count):
+        kind = rng.choices(list(kind_weights), weights=list(kind_weights.values()))[0]
+        if kind == KIND_MULTIPART:
+            document = pick_document()
+            requests.append(LoadRequest(kind, (document.name,), file=(document.path.name, contents[document.name])))
+        elif kind == KIND_ARRAY:
+            batch = [pick_document() for _ in range(rng.randint(*ARRAY_RECORDS))]
+            requests.append(LoadRequest(kind, tuple(document.name for document in batch),
+                                        content=orjson.dumps([record(document) for document in batch])))
+        else:
+            document = pick_document()
+            requests.append(LoadRequest(kind, (document.name,), content=orjson.dumps(record(document))))
+    return requests
+
+
+def parse_weights(value: str, known: tuple[str, ...] | list[str]) -> dict[str, int]:
+    """Parse `name=weight,name=weight` (e.g. `record=6,array=2,multipart=2`)."""
+    weights: dict[str, int] = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        name, _, weight = item.partition("=")
+        if name not in known or not weight.isdigit():
+            raise ValueError(f"Invalid weight {item!r}, expected name=integer with name one of: {', '.join(known)}")
+        weights[name] = int(weight)
+    if not any(weights.values()):
+        raise ValueError(f"No positive weight in {value!r}")
+    return weights
+
+
+def _result_pages(request: LoadRequest, body: Any) -> int:
+    results = body if request.kind == KIND_ARRAY else [body]
+    return sum(int(((result or {}).get("result") or {}).get("metadata", {}).get("pages") or 0)
+               for result in results if isinstance(result, dict))
+
+
+def send(client: httpx.Client, request: LoadRequest) -> tuple[int, int]:
+    """Send one request, return its status and the pages of its documents."""
+    if request.file is not None:
+        response = client.post(PROCESS_ENDPOINT, files={"file": request.file})
+    else:
+        response = client.post(PROCESS_ENDPOINT, content=request.content,
+                               headers={"Content-Type": "application/json"})
+    pages = 0
+    if response.status_code == 200:
+        with contextlib.suppress(ValueError):
+            pages = _result_pages(request, response.json())
+    return response.status_code, pages
+
+
+class LoadGenerator:
+    """Replays pre-built requests against a running service.
+
+    With `concurrency` set, that many clients send requests back to back (closed loop). With `rate` set,
+    requests are started at a fixed rate whatever the response times (open loop), up to `max_in_flight`
+    at once; a request's latency then counts from its scheduled start, so time spent waiting for a free
+    client when the service falls behind is included.
+    """
+
+    def __init__(self,
+                 client: httpx.Client,
+                 requests: list[LoadRequest],
+                 concurrency: int | None = None,
+                 rate: float | None = None,
+                 max_in_flight: int = 64,
+                 max_requests: int | None = None,
+                 sender: Callable[[httpx.Client, LoadRequest], tuple[int, int]] = send) -> None:
+        if (concurrency is None) == (rate is None):
+            raise ValueError("Set either a concurrency or an arrival rate")
+        self.client = client
+        self.requests = requests
+        self.concurrency = concurrency
+        self.rate = rate
+        self.max_in_flight = max_in_flight
+        self.max_requests = max_requests
+        self.sender = sender
+        self.results: list[LoadResult] = []
+        self._lock = threading.Lock()
+
+    def _send(self, request: LoadRequest, scheduled_at: float) -> None:
+        try:
+            status, pages = self.sender(self.client, request)
+        except httpx.HTTPError:
+            status, pages = 0, 0
+        result = LoadResult(request.kind, status, time.perf_counter() - scheduled_at, len(request.documents), pages)
+        with self._lock:
+            self.results.append(result)
+
+    def _next_request(self, index: int) -> LoadRequest | None:
+        if self.max_requests is not None and index >= self.max_requests:
+            return None
+        return self.requests[index % len(self.requests)]
+
+    def _closed_loop(self, deadline: float) -> None:
+        cursor = itertools.count()
+        cursor_lock = threading.Lock()
+
+        def client_loop() -> None:
+            while time.perf_counter() < deadline:
+                with cursor_lock:
+                    request = self._next_request(next(cursor))
+                if request is None:
+                    return
+                self._send(request, time.perf_counter())
+
+        threads = [threading.Thread(target=client_loop, name=f"load_client_{index}", daemon=True)
+                   for index in range(self.concurrency or 1)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def _open_loop(self, deadline: float) -> None:
+        interval = 1.0 / float(self.rate or 1.0)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="load_client") as executor:
+            for index in itertools.count():
+                scheduled_at = started + index * interval
+                request = self._next_request(index)
+                if request is None or scheduled_at >= deadline:
+                    break
+                time.sleep(max(scheduled_at - time.perf_counter(), 0.0))
+                executor.submit(self._send, request, scheduled_at)
+
+    def run(self, duration: float) -> float:
+        """Send requests for `duration` seconds (or until `max_requests` were sent), cycling through the
+        pre-built requests, and return the wall time until the last response."""
+        started = time.perf_counter()
+        deadline = started + duration
+        if self.rate is not None:
+            self._open_loop(deadline)
+        else:
+            self._closed_loop(deadline)
+        return time.perf_counter() - started
+
+
+def latency_histogram(latencies: list[float], buckets: tuple[float, ...] = LATENCY_BUCKETS) -> dict[str, int]:
+    """Cumulative counts of latencies up to each bucket bound, Prometheus style."""
+    histogram = {f"le_{bound:g}": sum(1 for latency in latencies if latency <= bound) for bound in buckets}
+    histogram["le_inf"] = len(latencies)
+    return histogram
+
+
+def summarise_load(results: list[LoadResult], wall_time: float) -> dict[str, Any]:
+    """Throughput, status rates and latencies of a load run."""
+    wall_time = max(wall_time, 1e-9)
+    total = max(len(results), 1)
+    statuses = Counter(result.status for result in results)
+    latencies = [result.latency for result in results]
+    ok = [result for result in results if result.status == 200]
+
+    return {
+        "requests": len(results),
+        "requests_per_sec": round(len(results) / wall_time, 4),
+        "docs_per_sec": round(sum(result.documents for result in ok) / wall_time, 4),
+        "pages_per_sec": round(sum(result.pages for result in ok) / wall_time, 4),
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        # 429 (admission control) and 503 (busy) are reported apart from the other failures
+        "error_rate": round(sum(count for status, count in statuses.items()
+                                if status not in (200, 429, 503)) / total, 4),
+        "rate_503": round(statuses[503] / total, 4),
+        "rate_429": round(statuses[429] / total, 4),
+        "latency": {
+            "mean": round(sum(latencies) / total, 4),
+            "p50": round(percentile(latencies, 50), 4),
+            "p95": round(percentile(latencies, 95), 4),
+            "p99": round(percentile(latencies, 99), 4),
+            "max": round(max(latencies, default=0.0), 4),
+        },
+        "latency_histogram": latency_histogram(latencies),
+        "by_kind": {
+            kind: {"requests": len(kind_latencies), "p50": round(percentile(kind_latencies, 50), 4),
+                   "p95": round(percentile(kind_latencies, 95), 4)}
+            for kind in KINDS
+            if (kind_latencies := [result.latency for result in results if result.kind == kind])
+        },
+    }
+
+
+def scrape_metrics(client: httpx.Client) -> dict[tuple[str, tuple[tuple[str, str], ...]], float]:
+    """Samples of the service's `/api/metrics`, empty when they cannot be scraped."""
+    try:
+        response = client.get(METRICS_ENDPOINT)
+        response.raise_for_status()
+    except httpx.HTTPError:
+        return {}
+    return {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for family in text_string_to_metric_families(response.text)
+        for sample in family.samples
+    }
+
+
+def server_metrics(before: dict[tuple[str, tuple], float], after: dict[tuple[str, tuple], float]) -> dict[str, Any]:
+    """Server side figures of a load run from two metrics scrapes: documents and mean seconds per stage,
+    text fallbacks, errors and cache lookups."""
+    deltas: defaultdict[str, defaultdict[str, float]] = defaultdict(lambda: defaultdict(float))
+    for (name, labels), value in after.items():
+        if name in SERVER_SAMPLES:
+            group, label = SERVER_SAMPLES[name]
+            deltas[group][dict(labels)[label]] += value - before.get((name, labels), 0.0)
+
+    return {
+        "stages": {
+            stage: {"count": int(count), "mean": round(deltas["stage_sum"][stage] / count, 4)}
+            for stage, count in sorted(deltas["stage_count"].items()) if count > 0
+        },
+        **{group: {key: int(count) for key, count in sorted(deltas[group].items()) if count}
+           for group in ("fallbacks", "errors", "cache")},
+    }
+
+
+def service_info(client: httpx.Client) -> dict[str, Any]:
+    try:
+        response = client.get(INFO_ENDPOINT)
+        response.raise_for_status()
+        return response.json()
+    except (httpx.HTTPError, ValueError):
+        return {}
+
+
+def run_load(base_url: str,
+             requests: list[LoadRequest],
+             duration: float,
+             concurrency: int | None = None,
+             rate: float | None = None,
+             max_in_flight: int = 64,
+             max_requests: int | None = None,
+             timeout: float = 300.0) -> dict[str, Any]:
+    """Drive the service at `base_url` with `requests` and return the load report."""
+    with httpx.Client(base_url=base_url, timeout=timeout,
+                      limits=httpx.Limits(max_connections=max(concurrency or 0, max_in_flight))) as client:
+        info = service_info(client)
+        metrics_before = scrape_metrics(client)
+        generator = LoadGenerator(client, requests, concurrency=concurrency, rate=rate, max_in_flight=max_in_flight,
+                                  max_requests=max_requests)
+        wall_time = generator.run(duration)
+        metrics_after = scrape_metrics(client)
+
+    return {
+        "created": datetime.now(UTC).isoformat(timespec="seconds"),
+        "environment": environment(),
+        "target": base_url,
+        "service": info,
+        "load": {"concurrency": concurrency, "rate": rate, "duration": duration, "max_in_flight": max_in_flight,
+                 "max_requests": max_requests},
+        "wall_time": round(wall_time, 4),
+        "client": summarise_load(generator.results, wall_time),
+        "server": server_metrics(metrics_before, metrics_after),
+    }
+
+
+def format_load_report(report: dict[str, Any]) -> str:
+    """Summary of a load report: client side figures, then the server side time per stage."""
+    client = report["client"]
+    lines = [
+        f"{client['requests']} requests in {report['wall_time']:g}s: {client['requests_per_sec']:g} req/s, "
+        f"{client['docs_per_sec']:g} docs/s, {client['pages_per_sec']:g} pages/s",
+        f"errors {client['error_rate']:.2%}, 503 {client['rate_503']:.2%}, 429 {client['rate_429']:.2%}, "
+        f"statuses {client['statuses']}",
+        "",
+        format_table([(kind, figures["requests"], figures["p50"], figures["p95"])
+                      for kind, figures in client["by_kind"].items()]
+                     + [("all", client["requests"], client["latency"]["p50"], client["latency"]["p95"])],
+                     ("requests", "count", "p50", "p95")),
+    ]
+    stages = report["server"]["stages"]
+    if stages:
+        lines += ["", format_table([(stage, figures["count"], figures["mean"]) for stage, figures in stages.items()],
+                                   ("server stage", "count", "mean"))]
+    return "\n".join(lines)
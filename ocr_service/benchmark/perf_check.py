@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from ocr_service.benchmark.corpus import select_documents
+from ocr_service.benchmark.report import format_table
+from ocr_service.benchmark.runner import PATH_DIRECT, PATH_HTTP, BenchmarkRunner, environment
+
+DEFAULT_BASELINE_PATH = Path(__file__).resolve().parent / "perf_baseline.json"
+
+# fixed subset of the benchmark, covering the converter (LibreOffice, PDF text) and the OCR engine paths
+PERF_SCENARIOS: tuple[tuple[str, str, str], ...] = (
+    ("pdf", "NO_OCR", PATH_DIRECT),
+    ("docx", "NO_OCR", PATH_DIRECT),
+    ("docx_20_pages", "NO_OCR", PATH_DIRECT),
+    ("docx", "OCR", PATH_DIRECT),
+    ("png", "OCR", PATH_DIRECT),
+    ("scanned_pdf", "OCR", PATH_DIRECT),
+    ("pdf", "HYBRID", PATH_DIRECT),
+    ("pdf", "OCR", PATH_HTTP),
+)
+PERF_ITERATIONS = 5
+PERF_WARMUP = 1
+
+CALIBRATION_ROUNDS = 5
+_CALIBRATION_DATA = bytes(range(256)) * 4096
+
+
+@dataclass(frozen=True)
+class Tolerance:
+    """A metric regresses when `current > baseline * (1 + relative) + absolute`, the absolute slack
+    keeps the noise of very short scenarios from failing the check."""
+
+    relative: float
+    absolute: float = 0.0
+
+    def limit(self, baseline: float) -> float:
+        return baseline * (1 + self.relative) + self.absolute
+
+
+# latencies are in calibration units (seconds / calibration seconds), see `calibrate`
+DEFAULT_TOLERANCES: dict[str, Tolerance] = {
+    "latency_p50": Tolerance(0.25, 0.5),
+    "latency_p95": Tolerance(0.40, 0.5),
+    "peak_rss_mb": Tolerance(0.20, 50.0),
+    "errors": Tolerance(0.0),
+}
+
+
+@dataclass(frozen=True)
+class Comparison:
+    scenario: str
+    metric: str
+    baseline: float | None
+    current: float | None
+    limit: float | None
+
+    @property
+    def status(self) -> str:
+        """`MISSING` when the run lacks a metric of the baseline, `NO BASELINE` when the baseline lacks a
+        metric of the run (not a regression, record it with the update-baseline command)."""
+        if self.current is None:
+            return "MISSING"
+        if self.baseline is None or self.limit is None:
+            return "NO BASELINE"
+        return "REGRESSION" if self.current > self.limit else "ok"
+
+    @property
+    def is_regression(self) -> bool:
+        return self.status in ("REGRESSION", "MISSING")
+
+
+def _calibration_workload() -> None:
+    # interpreter-bound and native-bound work, like the Python glue and the native libraries of the pipeline
+    total = 0
+    for value in range(200_000):
+        total += value * value % 7
+    for level in (1, 6, 9):
+        zlib.compress(_CALIBRATION_DATA, level)
+
+
+def calibrate(rounds: int = CALIBRATION_ROUNDS) -> float:
+    """Seconds taken by a fixed workload on this machine (best of `rounds`), the unit latencies are
+    normalised to so that results of different machines are comparable."""
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        _calibration_workload()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def perf_metrics(report: dict[str, Any], calibration_seconds: float) -> dict[str, dict[str, float]]:
+    """Metrics compared by the check for each scenario of a benchmark report."""
+    return {
+        key: {
+            "latency_p50": round(scenario["latency"]["p50"] / calibration_seconds, 3),
+            "latency_p95": round(scenario["latency"]["p95"] / calibration_seconds, 3),
+            "peak_rss_mb": scenario["peak_rss_mb"],
+            "errors": scenario["errors"],
+        }
+        for key, scenario in report["scenarios"].items()
+    }
+
+
+def run_perf_scenarios(processor: Any, client: Any) -> dict[str, Any]:
+    """Run the perf scenarios and return their results in the format of the baseline file."""
+    calibration_seconds = calibrate()
+    runner = BenchmarkRunner(processor, client, iterations=PERF_ITERATIONS, warmup=PERF_WARMUP)
+    scenarios = [(select_documents([document])[0], mode, path) for document, mode, path in PERF_SCENARIOS]
+    report = runner.run_scenarios(scenarios)
+    return {
+        "environment": environment(),
+        "calibration_seconds": round(calibration_seconds, 6),
+        "iterations": PERF_ITERATIONS,
+        "scenarios": perf_metrics(report, calibration_seconds),
+    }
+
+
+def tolerances_of(baseline: dict[str, Any]) -> dict[str, Tolerance]:
+    """Default tolerances, overridden by the `tolerances` of the baseline file."""
+    overrides = {metric: Tolerance(**values) for metric, values in baseline.get("tolerances", {}).items()}
+    return {**DEFAULT_TOLERANCES, **overrides}
+
+
+def compare(current: dict[str, Any], baseline: dict[str, Any]) -> list[Comparison]:
+    """Compare the metrics of every scenario of the baseline and of the current run."""
+    tolerances = tolerances_of(baseline)
+    comparisons: list[Comparison] = []
+
+    for key in sorted(set(baseline["scenarios"]) | set(current["scenarios"])):
+        baseline_metrics = baseline["scenarios"].get(key, {})
+        current_metrics = current["scenarios"].get(key, {})
+        for metric, tolerance in tolerances.items():
+            if metric not in baseline_metrics and metric not in current_metrics:
+                continue
+            baseline_value = baseline_metrics.get(metric)
+            comparisons.append(Comparison(
+                scenario=key,
+                metric=metric,
+                baseline=baseline_value,
+                current=current_metrics.get(metric),
+                limit=tolerance.limit(baseline_value) if baseline_value is not None else None,
+            ))
+
+    return comparisons
+
+
+def _format_value(value: float | None) -> str:
+    return "-" if value is None else f"{value:g}"
+
+
+def _format_change(comparison: Comparison) -> str:
+    baseline, current = comparison.baseline, comparison.current
+    # no relative change without both values, nor from a zero baseline
+    if baseline is None or current is None or baseline == 0:
+        return "-"
+    return f"{(current - baseline) / baseline:+.1%}"
+
+
+def format_comparisons(comparisons: list[Comparison]) -> str:
+    rows = [
+        (comparison.scenario, comparison.metric, _format_value(comparison.baseline),
+         _format_value(comparison.current), _format_change(comparison), _format_value(comparison.limit),
+         comparison.status)
+        for comparison in comparisons
+    ]
+    return format_table(rows, ("scenario", "metric", "baseline", "current", "change", "limit", "status"))
+
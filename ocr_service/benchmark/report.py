@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+
+import orjson
+
+TABLE_COLUMNS = ("scenario", "runs", "errors", "docs/s", "pages/s", "p50", "p95", "p99", "rss MB")
+
+
+def write_report(report: dict[str, Any], path: str | Path) -> None:
+    """Write a report as indented JSON with sorted keys, so two runs can be compared with a plain diff."""
+    Path(path).write_bytes(orjson.dumps(report, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS) + b"\n")
+
+
+def read_report(path: str | Path) -> dict[str, Any]:
+    return orjson.loads(Path(path).read_bytes())
+
+
+def format_table(rows: list[tuple[Any, ...]], columns: tuple[str, ...]) -> str:
+    """Left-aligned text table of `rows` under `columns`."""
+    cells = [tuple(str(value) for value in row) for row in [columns, *rows]]
+    widths = [max(len(row[index]) for row in cells) for index in range(len(columns))]
+    return "\n".join("  ".join(value.ljust(width) for value, width in zip(row, widths, strict=True)).rstrip()
+                     for row in cells)
+
+
+def format_report(report: dict[str, Any]) -> str:
+    """Summary table of the scenarios of a benchmark report, latencies in seconds."""
+    rows = [
+        (key, scenario["runs"], scenario["errors"], scenario["docs_per_sec"], scenario["pages_per_sec"],
+         scenario["latency"]["p50"], scenario["latency"]["p95"], scenario["latency"]["p99"],
+         scenario["peak_rss_mb"])
+        for key, scenario in report["scenarios"].items()
+    ]
+    return format_table(rows, TABLE_COLUMNS)
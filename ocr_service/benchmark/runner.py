@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import contextlib
+import math
+import os
+import platform
+import threading
+import time
+from collections.abc import Iterator
+from datetime import UTC, datetime
+from typing import Any
+
+import psutil
+
+from ocr_service.benchmark.corpus import BenchmarkDocument
+from ocr_service.settings import settings
+
+PATH_DIRECT = "direct"
+PATH_HTTP = "http"
+PATHS = (PATH_DIRECT, PATH_HTTP)
+MODES = ("OCR", "NO_OCR", "HYBRID")
+
+PROCESS_ENDPOINT = "/api/process"
+
+# settings that shape the figures of a run, recorded with the results so runs can be compared
+RECORDED_SETTINGS = (
+    "OCR_WEB_SERVICE_WORKERS",
+    "OCR_WEB_SERVICE_THREADS",
+    "OCR_SERVICE_CPU_THREADS",
+    "OCR_SERVICE_CONVERTER_THREADS",
+    "OCR_SERVICE_IMAGE_DPI",
+    "OCR_SERVICE_TESSERACT_LANG",
+    "OCR_SERVICE_LIBRE_OFFICE_INSTANCES",
+)
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Percentile `pct` (0-100) of `values`, linearly interpolated between the closest ranks."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    lower, upper = math.floor(rank), math.ceil(rank)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+class RssSampler:
+    """Samples the resident memory of a process (this one by default) and its children (workers,
+    LibreOffice, PDF render processes) in a background thread and keeps the peak of their sum."""
+
+    def __init__(self, interval: float = 0.05, pid: int | None = None) -> None:
+        self.interval = interval
+        self.peak = 0
+        self._process = psutil.Process(pid if pid is not None else os.getpid())
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def sample(self) -> None:
+        rss = self._process.memory_info().rss
+        for child in self._process.children(recursive=True):
+            with contextlib.suppress(psutil.Error):
+                rss += child.memory_info().rss
+        self.peak = max(self.peak, rss)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def __enter__(self) -> RssSampler:
+        self.sample()
+        self._thread = threading.Thread(target=self._run, name="benchmark_rss_sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.sample()
+
+
+@contextlib.contextmanager
+def operation_mode(mode: str) -> Iterator[None]:
+    """Process the documents of the block in operation `mode`, restoring the configured mode after."""
+    previous = settings.OCR_SERVICE_OPERATION_MODE
+    settings.OCR_SERVICE_OPERATION_MODE = mode  # type: ignore[assignment]
+    try:
+        yield
+    finally:
+        settings.OCR_SERVICE_OPERATION_MODE = previous
+
+
+def environment() -> dict[str, Any]:
+    """Machine and settings a report was produced with."""
+    return {
+        "host": platform.node(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "available_cpus": settings.AVAILABLE_CPUS,
+        "version": settings.OCR_SERVICE_VERSION,
+        "settings": {name: getattr(settings, name) for name in RECORDED_SETTINGS},
+    }
+
+
+def scenario_key(document: str, mode: str, path: str) -> str:
+    return f"{document}/{mode}/{path}"
+
+
+def summarise(latencies: list[float],
+              pages: list[int],
+              stages: list[dict[str, Any]],
+              wall_time: float,
+              errors: int,
+              peak_rss: int) -> dict[str, Any]:
+    """Figures of one scenario from the latency, page count and `timings` stages of each run."""
+    stage_names = sorted({name for run_stages in stages for name in run_stages})
+    runs = max(len(latencies), 1)
+    wall_time = max(wall_time, 1e-9)
+
+    return {
+        "runs": len(latencies),
+        "errors": errors,
+        "docs_per_sec": round(len(latencies) / wall_time, 4),
+        "pages_per_sec": round(sum(pages) / wall_time, 4),
+        "pages": max(pages, default=0),
+        "latency": {
+            "mean": round(sum(latencies) / runs, 4),
+            "p50": round(percentile(latencies, 50), 4),
+            "p95": round(percentile(latencies, 95), 4),
+            "p99": round(percentile(latencies, 99), 4),
+            "max": round(max(latencies, default=0.0), 4),
+        },
+        # mean seconds per document spent in each stage
+        "stages": {
+            name: round(sum(run_stages.get(name, {}).get("wall", 0.0) for run_stages in stages) / runs, 4)
+            for name in stage_names
+        },
+        "peak_rss_mb": round(peak_rss / (1024 * 1024), 1),
+    }
+
+
+class BenchmarkRunner:
+    """Runs the benchmark scenarios (document x operation mode x path) against one processor.
+
+    The `direct` path calls `Processor.process_stream`, the `http` path posts the document to
+    `/api/process` through `client` (a `TestClient` of the app holding the same processor), so the
+    difference between them is the cost of the HTTP layer. Results are reported per scenario, keyed
+    `document/mode/path`, with the stage times taken from the `timings` block of the metadata, which
+    is why `OCR_SERVICE_STAGE_TIMINGS` has to be on for the processor.
+    """
+
+    def __init__(self, processor: Any, client: Any = None, iterations: int = 3, warmup: int = 1) -> None:
+        self.processor = processor
+        self.client = client
+        self.iterations = iterations
+        self.warmup = warmup
+
+    def _run_direct(self, document: BenchmarkDocument, stream: bytes) -> tuple[bool, dict[str, Any]]:
+        output_text, doc_metadata = self.processor.process_stream(stream, document.path.name)
+        return len(output_text) > 0 or bool(doc_metadata.get("ocr_skipped")), doc_metadata
+
+    def _run_http(self, document: BenchmarkDocument, stream: bytes) -> tuple[bool, dict[str, Any]]:
+        response = self.client.post(PROCESS_ENDPOINT, files={"file": (document.path.name, stream)})
+        if response.status_code != 200:
+            return False, {}
+        return True, response.json()["result"]["metadata"]
+
+    def run_scenario(self, document: BenchmarkDocument, mode: str, path: str) -> dict[str, Any]:
+        run_once = self._run_http if path == PATH_HTTP else self._run_direct
+        stream = document.read()
+        latencies: list[float] = []
+        pages: list[int] = []
+        stages: list[dict[str, Any]] = []
+        errors = 0
+
+        with operation_mode(mode):
+            for _ in range(self.warmup):
+                run_once(document, stream)
+
+            with RssSampler() as rss:
+                started = time.perf_counter()
+                for _ in range(self.iterations):
+                    run_started = time.perf_counter()
+                    ok, doc_metadata = run_once(document, stream)
+                    latencies.append(time.perf_counter() - run_started)
+                    if not ok:
+                        errors += 1
+                    pages.append(int(doc_metadata.get("pages") or 0))
+                    stages.append(doc_metadata.get("timings", {}).get("stages", {}))
+                wall_time = time.perf_counter() - started
+
+        return {
+            "document": document.name,
+            "format": document.format,
+            "mode": mode,
+            "path": path,
+            **summarise(latencies, pages, stages, wall_time, errors, rss.peak),
+        }
+
+    def run(self,
+            documents: list[BenchmarkDocument],
+            modes: tuple[str, ...] | list[str] = MODES,
+            paths: tuple[str, ...] | list[str] = PATHS) -> dict[str, Any]:
+        """Run every combination of the documents, modes and paths and return the report, see `write_report`."""
+        return self.run_scenarios([(document, mode, path) for mode in modes for path in paths
+                                   for document in documents])
+
+    def run_scenarios(self, scenarios: list[tuple[BenchmarkDocument, str, str]]) -> dict[str, Any]:
+        """Run the (document, mode, path) scenarios in order and return the report."""
+        if self.client is None and any(path == PATH_HTTP for _, _, path in scenarios):
+            raise ValueError("The http path needs a client of the app")
+
+        results = {scenario_key(document.name, mode, path): self.run_scenario(document, mode, path)
+                   for document, mode, path in scenarios}
+
+        return {
+            "created": datetime.now(UTC).isoformat(timespec="seconds"),
+            "environment": environment(),
+            "iterations": self.iterations,
+            "warmup": self.warmup,
+            "scenarios": results,
+        }
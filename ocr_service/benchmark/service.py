@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import contextlib
+import os
+import signal
+import subprocess
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import httpx
+from fastapi.testclient import TestClient
+
+from ocr_service.settings import settings
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+START_SCRIPT = REPO_ROOT / "start_service_production.sh"
+READY_ENDPOINT = "/api/ready"
+
+
+@contextlib.contextmanager
+def in_process_service(startup_wait: float = 15.0) -> Iterator[tuple[Any, TestClient]]:
+    """Start the app in this process, as a single worker with its LibreOffice instances, and yield its
+    processor and a client of it.
+
+    The result cache is disabled so every run processes its document, and stage timings are turned on
+    so results carry their `timings` block. `startup_wait` seconds are given to LibreOffice to start.
+    """
+    # imported here, creating the app starts LibreOffice and the render processes
+    from ocr_service.app import create_app
+    from ocr_service.utils.utils import sync_port_mapping
+
+    settings.OCR_SERVICE_RESULT_CACHE_ENTRIES = 0
+    settings.OCR_SERVICE_RESULT_CACHE_DISK_MB = 0
+    settings.OCR_SERVICE_STAGE_TIMINGS = True
+
+    sync_port_mapping(worker_id=0, worker_pid=os.getpid())
+    app = create_app()
+    with TestClient(app, raise_server_exceptions=False) as client:
+        time.sleep(startup_wait)
+        yield app.state.processor, client
+
+
+def wait_until_ready(base_url: str, timeout: float, process: subprocess.Popen | None = None) -> None:
+    """Poll `/api/ready` until the service answers 200, raise `TimeoutError` after `timeout` seconds or
+    `RuntimeError` if `process` exits first."""
+    deadline = time.monotonic() + timeout
+    with httpx.Client(base_url=base_url, timeout=5.0) as client:
+        while time.monotonic() < deadline:
+            if process is not None and process.poll() is not None:
+                raise RuntimeError(f"The service exited with code {process.returncode} before it was ready")
+            with contextlib.suppress(httpx.HTTPError):
+                if client.get(READY_ENDPOINT).status_code == 200:
+                    return
+            time.sleep(1.0)
+    raise TimeoutError(f"The service at {base_url} was not ready after {timeout:g} seconds")
+
+
+@contextlib.contextmanager
+def local_service(env: dict[str, str] | None = None,
+                  port: int = 8090,
+                  ready_timeout: float = 180.0,
+                  keep_cache: bool = False,
+                  log_path: str | Path | None = None) -> Iterator[tuple[str, subprocess.Popen]]:
+    """Start the service with `start_service_production.sh` (gunicorn, as in the container) and yield
+    its base URL and process (the gunicorn master), stopping it on exit.
+
+    `env` overrides the environment of the service, e.g. `{"OCR_WEB_SERVICE_WORKERS": "4"}`. The result
+    cache is disabled unless `keep_cache` is set, replayed documents would be answered from it.
+    """
+    service_env = {**os.environ, "OCR_SERVICE_PORT": str(port), "OCR_SERVICE_HOST": "127.0.0.1"}
+    if not keep_cache:
+        service_env.update({"OCR_SERVICE_RESULT_CACHE_ENTRIES": "0", "OCR_SERVICE_RESULT_CACHE_DISK_MB": "0"})
+    service_env.update(env or {})
+    base_url = f"http://127.0.0.1:{port}"
+
+    with contextlib.ExitStack() as stack:
+        log_file = stack.enter_context(open(log_path, "ab")) if log_path else subprocess.DEVNULL
+        # own process group, so gunicorn, its workers and their LibreOffice instances are stopped together
+        process = subprocess.Popen(["bash", str(START_SCRIPT)], cwd=REPO_ROOT, env=service_env,
+                                   stdout=log_file, stderr=subprocess.STDOUT, start_new_session=True)
+        try:
+            wait_until_ready(base_url, ready_timeout, process)
+            yield base_url, process
+        finally:
+            with contextlib.suppress(ProcessLookupError):
+                os.killpg(process.pid, signal.SIGTERM)
+            try:
+                process.wait(timeout=60)
+            except subprocess.TimeoutExpired:
+                with contextlib.suppress(ProcessLookupError):
+                    os.killpg(process.pid, signal.SIGKILL)
+                process.wait()
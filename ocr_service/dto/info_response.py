@@ -1,3 +1,5 @@
+from typing import Any
+
 from pydantic import BaseModel, Field
 
 
@@ -8,3 +10,4 @@ class InfoResponse(BaseModel):
     service_version: str = Field(..., description="Service version string.")
     service_model: str = Field(..., description="Tesseract model path/prefix.")
     config: str = Field(..., description="Reserved config field.")
+    sizing: dict[str, Any] = Field(default_factory=dict, description="Available CPUs and the thread counts from them.")
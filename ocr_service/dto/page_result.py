@@ -0,0 +1,17 @@
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+
+class PageResult(BaseModel):
+    """Result of a single page, reported to `ProcessContext.page_callback` as soon as the page is done."""
+
+    page: int = Field(..., description="One-based page number.")
+    source: Literal["ocr", "text", "blank"] = Field(
+        ..., description="How the page text was produced: OCR, the PDF text layer, or skipped as blank."
+    )
+    text: str = Field("", description="Text of the page.")
+    confidence: float | None = Field(default=None, description="Mean Tesseract word confidence (OCR pages only).")
+    elapsed_time: float = Field(0.0, description="Seconds spent recognising the page.")
+    pages_done: int = Field(..., description="Pages of the document finished so far, this one included.")
+    pages_total: int = Field(..., description="Pages of the document.")
@@ -1,11 +1,15 @@
 from __future__ import annotations
 
+from collections.abc import Callable
 from typing import Any
 
 from PIL import Image
-from pydantic import BaseModel, ConfigDict, Field, PrivateAttr
+from pydantic import BaseModel, ConfigDict, Field
 
-from ocr_service.utils.utils import TextChecks
+from ocr_service.dto.page_result import PageResult
+from ocr_service.utils.request_body import DocumentBuffer
+from ocr_service.utils.sniffer import ContentInfo
+from ocr_service.utils.timings import StageTimings
 
 
 class ProcessContext(BaseModel):
@@ -17,8 +21,8 @@ class ProcessContext(BaseModel):
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
-    stream: bytes
-    """Raw document bytes provided by the caller."""
+    stream: DocumentBuffer
+    """Raw document provided by the caller, bytes or a memory-mapped spool of a large request body."""
 
     file_name: str
     """Normalized filename used for temp files and type inference."""
@@ -26,24 +30,41 @@ class ProcessContext(BaseModel):
     file_type: object | None
     """Detected file type from the filetype library (or None if unknown)."""
 
+    content: ContentInfo | None = None
+    """Classification of `stream` by the content sniffer, sniffed by the converter when not given."""
+
     output_text: str = ""
     """Accumulated extracted/OCR'd text for the current request."""
 
     images: list[Image.Image] = Field(default_factory=list)
     """Image pages prepared for OCR (empty if not applicable)."""
 
+    render_pages: list[int] = Field(default_factory=list)
+    """Zero-based pages of `pdf_stream` still to be rendered and OCR'd, streamed page by page."""
+
+    lane: str = "small"
+    """Scheduling lane (`LANE_SMALL` or `LANE_LARGE`) of the document in the worker's shared OCR and render
+    pools. Spelled out here, importing `ocr_service.processor.lanes` would import the processor package."""
+
+    page_texts: dict[int, str] = Field(default_factory=dict)
+    """Text of PDF pages taken from their text layer (HYBRID mode), merged with OCR'd pages in page order."""
+
     metadata: dict[str, Any] = Field(default_factory=dict)
     """Document metadata such as content-type, pages, confidence, and timing."""
 
-    pdf_stream: bytes = b""
-    """Intermediate PDF bytes used for downstream conversion/OCR."""
+    pdf_stream: DocumentBuffer = b""
+    """Intermediate PDF (the input itself for PDF documents) used for downstream conversion/OCR."""
+
+    text_fallback: dict[str, bool] | None = None
+    """Text extraction flags (`is_html`, `is_xml`, `is_rtf`) of a document whose converted PDF falls back to
+    text extraction when it cannot be rendered or OCR'd, None when the document has no such fallback."""
+
+    page_callback: Callable[[PageResult], None] | None = None
+    """Optional hook called with the `PageResult` of each page as soon as it has been processed."""
 
-    _checks: TextChecks | None = PrivateAttr(default=None)
-    """Lazy text-type detection cache. Initialized on first access."""
+    timings: StageTimings = Field(default_factory=StageTimings)
+    """Wall/CPU time of the processing stages of the document, see `StageTimings.stage`."""
 
-    @property
-    def checks(self) -> TextChecks:
-        """Return cached text-type checks for the current stream."""
-        if self._checks is None:
-            self._checks = TextChecks(self.stream)
-        return self._checks
+    def model_post_init(self, __context: Any) -> None:
+        # stage observations are labelled with the content-type of the document as it is resolved
+        self.timings.metadata = self.metadata
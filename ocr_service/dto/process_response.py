@@ -17,3 +17,10 @@ class ProcessResponse(BaseModel):
     """Response payload for /api/process endpoints."""
 
     result: ProcessResult = Field(..., description="OCR processing result.")
+
+
+class ProcessRecordResponse(ProcessResponse):
+    """Entry of the /api/process response to a JSON array of records, one per record in request order."""
+
+    status: int = Field(..., description="Status code of the record, as /api/process would return for it alone.")
+    detail: Any = Field(default=None, description="Validation error of a record that could not be read.")
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import logging
+import math
+import time
+from collections import deque
+from collections.abc import Iterable
+from threading import Lock
+
+from ocr_service.processor.converter import DocumentConverter
+from ocr_service.settings import settings
+from ocr_service.utils.request_body import DocumentBuffer
+from ocr_service.utils.sniffer import sniff_content
+from ocr_service.utils.utils import setup_logging
+
+# rough size of a page of a non-PDF document (office, html, text), converted documents are costed by size
+BYTES_PER_PAGE = 64 * 1024
+# throughput assumed per OCR thread until pages have been completed on this worker
+DEFAULT_PAGES_PER_SECOND = 1.0
+# completed documents the current throughput is measured over
+THROUGHPUT_WINDOW = 32
+
+log = setup_logging(__name__, log_level=settings.LOG_LEVEL)
+
+
+def estimate_pages(stream: DocumentBuffer) -> int:
+    """Estimate the pages of work in a document without converting or rendering it, at least 1.
+
+    PDFs are counted by pdfium, images are a single page and other documents are costed by size.
+    """
+    content = sniff_content(stream)
+    if content.is_pdf:
+        try:
+            return max(1, DocumentConverter._pdf_page_count(stream))
+        except Exception:
+            log.warning("Could not read the PDF page count, costing the document by size")
+    elif content.is_image:
+        return 1
+    return max(1, math.ceil(len(stream) / BYTES_PER_PAGE))
+
+
+class AdmissionRejectedError(Exception):
+    """Raised when a request would push the worker past its in-flight page budget."""
+
+    def __init__(self, cost: int, in_flight: int, page_budget: int, retry_after: int) -> None:
+        super().__init__(f"{cost} page(s) requested with {in_flight} of {page_budget} page(s) already in flight")
+        self.cost = cost
+        self.in_flight = in_flight
+        self.page_budget = page_budget
+        self.retry_after = retry_after
+
+
+class AdmissionTicket:
+    """Pages admitted for one request, returned to the budget by `release()` once the work is done.
+
+    `costs` holds the estimated pages of each document of the request (0 for an empty one), in request
+    order, so the estimate can be reused to schedule the documents without probing them again.
+    """
+
+    def __init__(self, controller: AdmissionController | None, costs: list[int]) -> None:
+        self.controller = controller
+        self.costs = costs
+        self.cost = sum(costs)
+        self._released = False
+
+    def release(self) -> None:
+        if self._released or self.controller is None:
+            return
+        self._released = True
+        self.controller._release(self)
+
+    def split(self) -> list[AdmissionTicket]:
+        """One ticket per document, each returning the document's pages to the budget once it is processed.
+
+        This ticket is released through them, releasing it afterwards is a no-op.
+        """
+        self._released = True
+        # empty documents hold no pages and are not counted as completed work
+        return [AdmissionTicket(self.controller if cost > 0 else None, [cost]) for cost in self.costs]
+
+
+class AdmissionController:
+    """Admits requests against the worker's in-flight page budget before any conversion or OCR is done.
+
+    The cost of a document is estimated from cheap probes: PDFs by their page count (read by pdfium
+    without rendering), images as one page and other documents by size. A request that would take the
+    in-flight pages past `page_budget` is rejected with a retry delay derived from the pages per second
+    recently completed by the worker. An idle worker admits any request, however large, and a
+    `page_budget` of 0 disables admission control.
+    """
+
+    def __init__(self, log: logging.Logger, page_budget: int | None = None) -> None:
+        self.log = log
+        self.page_budget = settings.ADMISSION_PAGE_BUDGET if page_budget is None else page_budget
+        self._lock = Lock()
+        self._in_flight = 0
+        self._busy_seconds = 0.0
+        self._busy_since = 0.0
+        # (busy clock, pages) of the most recently completed requests
+        self._completed: deque[tuple[float, int]] = deque(maxlen=THROUGHPUT_WINDOW)
+        self._admitted = 0
+        self._rejected = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.page_budget > 0
+
+    def estimate_cost(self, stream: DocumentBuffer) -> int:
+        """Estimated pages of work for `stream`, at least 1."""
+        return estimate_pages(stream)
+
+    def pages_per_second(self) -> float:
+        with self._lock:
+            return self._pages_per_second()
+
+    def _busy_clock(self) -> float:
+        # seconds this worker had pages in flight, idle gaps do not dilute the measured throughput
+        if self._in_flight > 0:
+            return self._busy_seconds + time.monotonic() - self._busy_since
+        return self._busy_seconds
+
+    def _pages_per_second(self) -> float:
+        if len(self._completed) >= 2:
+            busy_time = self._completed[-1][0] - self._completed[0][0]
+            pages = sum(pages for _, pages in list(self._completed)[1:])
+            if busy_time > 0 and pages > 0:
+                return pages / busy_time
+        return DEFAULT_PAGES_PER_SECOND * settings.CPU_THREADS
+
+    def admit(self, streams: Iterable[DocumentBuffer]) -> AdmissionTicket:
+        """Reserve the estimated pages of the documents of a request.
+
+        The documents are estimated even when admission control is disabled, the ticket carries their
+        costs for the scheduling lanes. Probing a PDF opens it with pdfium, call this off the event loop.
+
+        Raises:
+            AdmissionRejectedError: the worker is busy and the pages do not fit in its remaining budget.
+        """
+        costs = [self.estimate_cost(stream) if len(stream) > 0 else 0 for stream in streams]
+        if not self.enabled:
+            return AdmissionTicket(None, costs)
+
+        cost = sum(costs)
+
+        with self._lock:
+            if self._in_flight > 0 and self._in_flight + cost > self.page_budget:
+                self._rejected += 1
+                excess = self._in_flight + cost - self.page_budget
+                retry_after = max(1, min(settings.ADMISSION_MAX_RETRY_AFTER,
+                                         math.ceil(excess / self._pages_per_second())))
+                raise AdmissionRejectedError(cost, self._in_flight, self.page_budget, retry_after)
+            if self._in_flight == 0:
+                self._busy_since = time.monotonic()
+            self._in_flight += cost
+            self._admitted += 1
+
+        return AdmissionTicket(self, costs)
+
+    def _release(self, ticket: AdmissionTicket) -> None:
+        with self._lock:
+            busy_clock = self._busy_clock()
+            self._in_flight = max(0, self._in_flight - ticket.cost)
+            if self._in_flight == 0:
+                self._busy_seconds = busy_clock
+            self._completed.append((busy_clock, ticket.cost))
+
+    def stats(self) -> dict[str, int | float]:
+        with self._lock:
+            return {
+                "page_budget": self.page_budget,
+                "pages_in_flight": self._in_flight,
+                "pages_per_second": round(self._pages_per_second(), 4),
+                "admitted": self._admitted,
+                "rejected": self._rejected,
+            }
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import functools
+import logging
+import time
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Any
+
+from ocr_service.dto.page_result import PageResult
+from ocr_service.processor.admission import estimate_pages
+from ocr_service.processor.lanes import LANES, LaneScheduler, lane_for
+from ocr_service.settings import settings
+from ocr_service.utils.metrics import QUEUE_DEPTH
+from ocr_service.utils.request_body import DocumentBuffer
+from ocr_service.utils.timings import queued_for
+
+
+@dataclass(frozen=True)
+class BatchResult:
+    """Outcome of one document of a batch; `timed_out` results carry no text."""
+
+    index: int
+    file_name: str
+    text: str = ""
+    metadata: dict[str, Any] = field(default_factory=dict)
+    timed_out: bool = False
+
+
+class BatchExecutor:
+    """Runs documents of one or more batches concurrently under a per-worker concurrency budget.
+
+    All batches of a worker, and the single documents offloaded by async endpoints, share the same
+    `concurrency` threads, so a large batch queues behind the budget instead of oversubscribing the OCR
+    and render pools. Queued documents are started by lane (see `LaneScheduler`): small documents are not
+    held up behind large ones waiting for a thread. Each document of a batch has its own deadline, counted
+    from the moment it starts processing.
+    """
+
+    def __init__(self,
+                 log: logging.Logger,
+                 process_stream: Callable[..., tuple[str, dict]],
+                 concurrency: int | None = None) -> None:
+        self.log = log
+        self.process_stream = process_stream
+        self.concurrency = max(1, int(concurrency if concurrency is not None else settings.BULK_CONCURRENCY))
+        self.lanes = LaneScheduler(self.concurrency)
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = Lock()
+        # (future, fn, args, enqueue time) of the documents waiting for a thread, per lane
+        self._queued: dict[str, deque[tuple[Future, Callable[..., Any], tuple, float]]] = {
+            lane: deque() for lane in LANES
+        }
+        self._dispatch_lock = Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="ocr_batch")
+            return self._executor
+
+    def _enqueue(self, stream: DocumentBuffer, pages: int | None, fn: Callable[..., Any], *args: Any) -> Future:
+        future: Future = Future()
+        # the admission estimate when the caller has it, probing a PDF here would block an event loop caller
+        lane = lane_for(estimate_pages(stream) if pages is None else pages)
+        with self._dispatch_lock:
+            self._queued[lane].append((future, fn, args, time.monotonic()))
+        self._dispatch()
+        return future
+
+    def _dispatch(self) -> None:
+        # start queued documents while the lanes grant slots
+        with self._dispatch_lock:
+            while (lane := self.lanes.try_acquire(lane for lane in LANES if self._queued[lane])) is not None:
+                future, fn, args, enqueued_at = self._queued[lane].popleft()
+                if not future.set_running_or_notify_cancel():
+                    self.lanes.release(lane)
+                    continue
+                self._get_executor().submit(self._run, lane, future, fn, args, enqueued_at)
+            QUEUE_DEPTH.labels("documents").set(sum(len(queued) for queued in self._queued.values()))
+
+    def _run(self, lane: str, future: Future, fn: Callable[..., Any], args: tuple, enqueued_at: float) -> None:
+        try:
+            with queued_for(time.monotonic() - enqueued_at):
+                result = fn(*args)
+        except BaseException as exc:
+            future.set_exception(exc)
+        else:
+            future.set_result(result)
+        finally:
+            self.lanes.release(lane)
+            self._dispatch()
+
+    def _process(self,
+                 stream: DocumentBuffer,
+                 file_name: str,
+                 page_callback: Callable[[PageResult], None] | None) -> tuple[str, dict]:
+        if page_callback is None:
+            return self.process_stream(stream, file_name)
+        return self.process_stream(stream, file_name, page_callback=page_callback)
+
+    def submit(self,
+               stream: DocumentBuffer,
+               file_name: str,
+               page_callback: Callable[[PageResult], None] | None = None,
+               pages: int | None = None) -> Future:
+        """Queue a single document within the budget, the future resolves to `(text, metadata)`.
+
+        `pages` is the estimated page count of the document (e.g. its admission cost) and picks its lane,
+        the document is estimated here when it is not given.
+        """
+        return self._enqueue(stream, pages, self._process, stream, file_name, page_callback)
+
+    def iter_results(self,
+                     documents: Iterable[tuple[str, DocumentBuffer]],
+                     file_timeout: float | None = None,
+                     pages: list[int] | None = None,
+                     on_done: Callable[[int, Future], None] | None = None) -> Iterator[BatchResult]:
+        """Process `(file_name, stream)` documents, yielding one `BatchResult` per document as each finishes.
+
+        `pages` are the estimated page counts of the documents (e.g. the admission costs), see `submit`.
+        `on_done` is called with the index and the future of each document once its processing thread
+        returned or it was cancelled, also for the documents reported as timed out.
+
+        A document still running `file_timeout` seconds after it started is reported as timed out; it keeps
+        its budget slot until the processing thread returns. Closing the iterator cancels queued documents.
+        """
+        file_timeout = settings.BULK_FILE_TIMEOUT if file_timeout is None else file_timeout
+        started_at: dict[int, float] = {}
+
+        def run(index: int, file_name: str, stream: DocumentBuffer) -> BatchResult:
+            started_at[index] = time.monotonic()
+            output_text, doc_metadata = self.process_stream(stream, file_name)
+            return BatchResult(index=index, file_name=file_name, text=output_text, metadata=doc_metadata)
+
+        pending: dict[Future, tuple[int, str]] = {}
+        try:
+            for index, (file_name, stream) in enumerate(documents):
+                document_pages = pages[index] if pages is not None else None
+                future = self._enqueue(stream, document_pages, run, index, file_name, stream)
+                if on_done is not None:
+                    future.add_done_callback(functools.partial(on_done, index))
+                pending[future] = (index, file_name)
+
+            while pending:
+                running_deadlines = [started_at[index] + file_timeout
+                                     for index, _ in pending.values() if index in started_at]
+                # until a document of this batch is running, re-check shortly for its deadline to start
+                timeout = max(0.0, min(running_deadlines) - time.monotonic()) if running_deadlines else 0.5
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    index, file_name = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception:
+                        self.log.exception("Batch document %s (%s) failed", index, file_name)
+                        result = BatchResult(index=index, file_name=file_name)
+                    yield result
+
+                now = time.monotonic()
+                for future, (index, file_name) in list(pending.items()):
+                    if index in started_at and now - started_at[index] >= file_timeout and not future.done():
+                        del pending[future]
+                        self.log.warning("Batch document %s (%s) exceeded its %ss deadline",
+                                         index, file_name, file_timeout)
+                        yield BatchResult(index=index, file_name=file_name, timed_out=True)
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def shutdown(self) -> None:
+        with self._dispatch_lock:
+            for queued in self._queued.values():
+                while queued:
+                    queued.popleft()[0].cancel()
+            QUEUE_DEPTH.labels("documents").set(0)
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
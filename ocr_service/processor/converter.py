@@ -1,35 +1,50 @@
 from __future__ import annotations
 
-import atexit
-import multiprocessing
 import os
 import re
 import time
 import traceback
 import uuid
+import xml.etree.ElementTree as ET
 import zipfile
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
 from html import unescape
 from io import BytesIO
-from subprocess import PIPE, Popen
-from threading import Timer
-from typing import Any, cast
+from itertools import islice
+from typing import Any
+from xmlrpc.client import Fault
 
 import pypdfium2 as pdfium
+import pypdfium2.raw as pdfium_c
 from bs4 import BeautifulSoup
-from filetype.types import DOCUMENT, IMAGE, archive
 from PIL import Image
 from striprtf.striprtf import rtf_to_text
 
 from ocr_service.dto.process_context import ProcessContext
+from ocr_service.processor.lanes import LANE_SMALL
+from ocr_service.processor.office_pool import LibreOfficePool
+from ocr_service.processor.page_bitmap import SharedPageBitmap, new_segment_name, unlink_segments
+from ocr_service.processor.render_pool import PdfRenderPool
+from ocr_service.processor.unoserver_client import UnoserverClient
 from ocr_service.settings import settings
-from ocr_service.utils.utils import (
-    INPUT_FILTERS,
-    delete_tmp_files,
-    is_encrypted_office_document,
-    terminate_hanging_process,
-)
+from ocr_service.utils.metrics import FALLBACKS, STAGE_LIBREOFFICE_CONVERSION, STAGE_PDF_RENDER
+from ocr_service.utils.request_body import DocumentBuffer, MappedBufferReader
+from ocr_service.utils.sniffer import sniff_content
+from ocr_service.utils.timings import StageTimings
+from ocr_service.utils.utils import INPUT_FILTERS, delete_tmp_files
 
-CURRENT_PDF_FILE: pdfium.PdfDocument | None = None
+
+def _open_pdf(stream: DocumentBuffer) -> pdfium.PdfDocument:
+    # pdfium loads bytes directly, spooled (memory-mapped) documents are read through a stream
+    return pdfium.PdfDocument(stream if isinstance(stream, bytes) else MappedBufferReader(stream))
+
+
+def _unlink_rendered_page(segment_name: str, _: Future) -> None:
+    unlink_segments([segment_name])
 
 
 class DocumentConverter:
@@ -40,6 +55,15 @@ class DocumentConverter:
     def __init__(self, log, loffice_process_list: dict[str, Any]) -> None:
         self.log = log
         self.loffice_process_list = loffice_process_list
+        self.render_pool = PdfRenderPool(log, size=settings.CONVERTER_THREAD_NUM)
+        self.office_pool = LibreOfficePool(log, loffice_process_list)
+        # one persistent XML-RPC client per unoserver port
+        self.unoserver_clients: dict[str, UnoserverClient] = {}
+
+    def close(self) -> None:
+        self.render_pool.shutdown()
+        for client in list(self.unoserver_clients.values()):
+            client.close()
 
     @staticmethod
     def _build_conversion_paths(file_name: str, uid: str | None = None) -> tuple[str, str]:
@@ -118,73 +142,86 @@ class DocumentConverter:
             self.log.warning("Failed to extract %s from %s during fallback", xml_path, file_name)
             return ""
 
-    @staticmethod
-    def initialize_pdf_worker(stream: bytes) -> None:
-        # we are making this a global so that we can use it in the process pool
-        # since Pypdfium2 PdfDocument objects are not thread-safe
-        global CURRENT_PDF_FILE
-        CURRENT_PDF_FILE = pdfium.PdfDocument(stream)
-
-        def _close_pdf():
-            global CURRENT_PDF_FILE
-            if CURRENT_PDF_FILE is not None:
-                CURRENT_PDF_FILE.close()
-
-        atexit.register(_close_pdf)
-
-    @staticmethod
-    def render_page(page_num: int) -> Image.Image:
-        if CURRENT_PDF_FILE is None:
-            raise RuntimeError("PDF worker not initialized")
-        scale = int(settings.OCR_SERVICE_IMAGE_DPI / 72)
-        page = CURRENT_PDF_FILE.get_page(page_num)
-        img = page.render(
-            scale=scale,
-            may_draw_forms=False,
-            no_smoothtext=True,
-            no_smoothimage=True,
-            no_smoothpath=True,
-            rotation=0,
-            crop=(0, 0, 0, 0),
-            grayscale=settings.OCR_CONVERT_GRAYSCALE_IMAGES,
-        ).to_pil()
-
-
-        page.close()
-
-        return img
-
-    def _pdf_to_img(self, stream: bytes) -> tuple[list[Image.Image], dict]:
-
-        pdf_image_pages = []
-        doc_metadata: dict[str, Any] = {}
-
-        pdf = pdfium.PdfDocument(stream)
-        page_count = len(pdf)
-        pdf.close()
-
-        doc_metadata["pages"] = page_count
+    def _submit_page(self, doc_path: str, page_num: int, lane: str) -> tuple[int, str, Future]:
+        segment_name = new_segment_name(page_num)
+        return page_num, segment_name, self.render_pool.submit(doc_path, [page_num], [segment_name], lane=lane)
+
+    def iter_pdf_pages(self,
+                       stream: DocumentBuffer,
+                       page_numbers: list[int],
+                       lane: str = LANE_SMALL,
+                       timings: StageTimings | None = None) -> Iterator[tuple[int, SharedPageBitmap]]:
+        """Render the given PDF pages lazily, yielding `(page_number, bitmap)` in page order.
+
+        Pages are rendered by the worker's persistent render pool, at most twice its size ahead of the
+        consumer, so peak memory depends on how fast pages are consumed rather than on the page count.
+        Render slots are shared with the other documents of the worker through the document's `lane`, the
+        render time of the document is recorded in its `timings`.
+        Bitmaps are handed over in shared memory, the consumer must `release()` every yielded page.
+        A render pool broken by a crashed process is restarted and the outstanding pages resubmitted once.
+        """
+        if not page_numbers:
+            return
 
+        timings = StageTimings() if timings is None else timings
         pdf_conversion_start_time = time.time()
+        render_ahead = 2 * min(self.render_pool.size, len(page_numbers))
+        doc_path = self.render_pool.store_document(stream)
 
-        ctx = multiprocessing.get_context("spawn")
+        try:
+            pending: deque[tuple[int, str, Future]] = deque()
+            remaining_pages = iter(page_numbers)
+            resubmitted = False
 
-        with ctx.Pool(processes=min(settings.CONVERTER_THREAD_NUM, page_count),
-                      initializer=DocumentConverter.initialize_pdf_worker,
-                      initargs=(stream,)) as pool:
-            pdf_image_pages = list(pool.imap_unordered(DocumentConverter.render_page, range(page_count), chunksize=1))
+            for page_num in islice(remaining_pages, render_ahead):
+                pending.append(self._submit_page(doc_path, page_num, lane))
+
+            while pending:
+                page_num, segment_name, render_future = pending[0]
+                try:
+                    page_bitmap = SharedPageBitmap(render_future.result()[0])
+                except BrokenProcessPool:
+                    if resubmitted:
+                        raise
+                    resubmitted = True
+                    self.log.warning("PDF render process crashed; resubmitting %s page(s)", len(pending))
+                    unlink_segments([name for _, name, _ in pending])
+                    self.render_pool.restart()
+                    pending = deque(self._submit_page(doc_path, num, lane) for num, _, _ in pending)
+                    continue
+
+                pending.popleft()
+                next_page_num = next(remaining_pages, None)
+                if next_page_num is not None:
+                    pending.append(self._submit_page(doc_path, next_page_num, lane))
+
+                yield page_num, page_bitmap
+        finally:
+            for _, segment_name, render_future in pending:
+                # pages still being rendered are unlinked as soon as their render finishes
+                if not render_future.cancel():
+                    render_future.add_done_callback(partial(_unlink_rendered_page, segment_name))
+            delete_tmp_files([doc_path])
 
         pdf_conversion_end_time = time.time()
+        timings.add("render", pdf_conversion_end_time - pdf_conversion_start_time, metric=STAGE_PDF_RENDER)
 
         self.log.info("PDF conversion to image(s) finished | Elapsed : " +
                       str(pdf_conversion_end_time - pdf_conversion_start_time) + " seconds")
-        return pdf_image_pages, doc_metadata
 
-    def _pdf_to_text(self, stream: bytes) -> tuple[str, dict]:
+    @staticmethod
+    def _pdf_page_count(stream: DocumentBuffer) -> int:
+        pdf = _open_pdf(stream)
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
+
+    def _pdf_to_text(self, stream: DocumentBuffer) -> tuple[str, dict]:
         doc_metadata = {}
         output_text = ""
 
-        pdf = pdfium.PdfDocument(stream)
+        pdf = _open_pdf(stream)
         _page_number = -1
 
         try:
@@ -210,26 +247,95 @@ class DocumentConverter:
 
         return output_text, doc_metadata
 
-    def _preprocess_pdf_to_img(self, stream: bytes) -> tuple[list[Image.Image], dict]:
-        """Converts a stream of bytes from a PDF file into images."""
-        self.log.info("pre-processing pdf...")
+    @staticmethod
+    def _text_layer_stats(page: pdfium.PdfPage, textpage: pdfium.PdfTextPage, text: str) -> dict[str, float]:
+        """Cheap text-layer quality signals for a single PDF page.
+
+        - chars: non-whitespace characters extracted from the text layer
+        - printable_ratio: share of those characters that are printable and mapped to unicode
+        - glyph_coverage: area of the text boxes relative to text boxes + image objects on the page,
+          low values mean the page is mostly a scanned image with little (e.g. header-only) text
+        """
+        visible_chars = [char for char in text if not char.isspace()]
+        char_count = len(visible_chars)
+        printable_count = sum(1 for char in visible_chars if char.isprintable() and char != "\ufffd")
+
+        text_area = 0.0
+        for rect_index in range(textpage.count_rects()):
+            left, bottom, right, top = textpage.get_rect(rect_index)
+            text_area += abs(right - left) * abs(top - bottom)
+
+        image_area = 0.0
+        for image_obj in page.get_objects(filter=(pdfium_c.FPDF_PAGEOBJ_IMAGE,)):
+            left, bottom, right, top = image_obj.get_bounds()
+            image_area += abs(right - left) * abs(top - bottom)
+
+        content_area = text_area + image_area
+
+        return {
+            "chars": char_count,
+            "printable_ratio": printable_count / char_count if char_count else 0.0,
+            "glyph_coverage": text_area / content_area if content_area else 0.0,
+        }
 
-        pdf_image_pages: list[Image.Image] = []
-        doc_metadata: dict[str, Any] = {}
+    @staticmethod
+    def _is_text_layer_usable(stats: dict[str, float]) -> bool:
+        return (
+            stats["chars"] >= settings.OCR_SERVICE_HYBRID_MIN_PAGE_CHARS
+            and stats["printable_ratio"] >= settings.OCR_SERVICE_HYBRID_MIN_PRINTABLE_RATIO
+            and stats["glyph_coverage"] >= settings.OCR_SERVICE_HYBRID_MIN_GLYPH_COVERAGE
+        )
+
+    def _split_pdf_pages_by_text_layer(self, stream: DocumentBuffer) -> tuple[dict[int, str], list[int], int]:
+        """Return (text of pages with a usable text layer, pages that need OCR, page count)."""
+        text_pages: dict[int, str] = {}
+        ocr_pages: list[int] = []
+
+        pdf = _open_pdf(stream)
 
         try:
-            pdf_image_pages, doc_metadata = self._pdf_to_img(stream)
-        except Exception:
-            self.log.error("preprocessing_pdf exception: " + str(traceback.format_exc()))
+            page_count = len(pdf)
 
-        return pdf_image_pages, doc_metadata
+            for page_number in range(page_count):
+                page = pdf[page_number]
+                textpage: Any | None = None
+                try:
+                    textpage = page.get_textpage()
+                    text = textpage.get_text_bounded()
+                    stats = self._text_layer_stats(page, textpage, text)
+                    self.log.debug("text layer stats for page %s: %s", page_number + 1, stats)
 
-    def _preprocess_doc(self, stream: bytes, file_name: str) -> bytes:
+                    if self._is_text_layer_usable(stats):
+                        text_pages[page_number] = text
+                    else:
+                        ocr_pages.append(page_number)
+                finally:
+                    try:
+                        if textpage is not None:
+                            textpage.close()
+                    finally:
+                        page.close()
+        finally:
+            pdf.close()
+
+        return text_pages, ocr_pages, page_count
+
+    def _get_unoserver_client(self, port_num: str) -> UnoserverClient:
+        client = self.unoserver_clients.get(port_num)
+        if client is None:
+            client = self.unoserver_clients.setdefault(
+                port_num,
+                UnoserverClient(settings.LIBRE_OFFICE_NETWORK_INTERFACE,
+                                port_num,
+                                timeout=float(settings.LIBRE_OFFICE_PROCESS_TIMEOUT)),
+            )
+        return client
+
+    def _preprocess_doc(self, stream: bytes, file_name: str, timings: StageTimings | None = None) -> bytes:
         """Pre-processing step for non-pdf office docs via LibreOffice."""
+        timings = StageTimings() if timings is None else timings
         pdf_stream = b""
-        doc_file_path = ""
-        pdf_file_path = ""
-        used_port_num = None
+        used_port_num: str | None = None
 
         ext = os.path.splitext(file_name)[1].lower()
 
@@ -237,110 +343,40 @@ class DocumentConverter:
         input_filter = INPUT_FILTERS.get(ext)
 
         try:
-            doc_file_path, pdf_file_path = self._build_conversion_paths(file_name)
-
-            with open(file=doc_file_path, mode="wb") as tmp_doc_file:
-                tmp_doc_file.write(stream)
-                os.fsync(tmp_doc_file)
-
             conversion_time_start = time.time()
 
-            loffice_subprocess = None
-
-            for port_num, loffice_process in self.loffice_process_list.items():
-                if loffice_process["used"] is False:
-                    used_port_num = str(port_num)
-                    lo_python = cast(str, settings.LIBRE_OFFICE_PYTHON_PATH)
-                    converter_bootstrap = "from unoserver.client import converter_main; converter_main()"
-                    _args = [
-                        lo_python,
-                        "-c",
-                        converter_bootstrap,
-                        doc_file_path,
-                        pdf_file_path,
-                        "--host",
-                        settings.LIBRE_OFFICE_NETWORK_INTERFACE,
-                        "--port",
-                        str(used_port_num),
-                        "--convert-to",
-                        "pdf"
-                    ]
-
-                    if input_filter:
-                        _args += ["--input-filter", input_filter]
-
-                    self.log.debug("starting unoserver subprocess with args: " + str(_args))
-                    loffice_subprocess = Popen(
-                        args=_args,
-                        cwd=settings.TMP_FILE_DIR,
-                        close_fds=True,
-                        shell=False,
-                        stdout=PIPE,
-                        stderr=PIPE,
-                    )
-                    self.loffice_process_list[used_port_num]["used"] = True
-                    break
-
-            if loffice_subprocess is not None and used_port_num is not None:
-                loffice_timer = Timer(
-                    interval=float(settings.LIBRE_OFFICE_PROCESS_TIMEOUT),
-                    function=loffice_subprocess.kill,
-                )
-                soffice_timer = Timer(
-                    interval=float(settings.LIBRE_OFFICE_PROCESS_TIMEOUT),
-                                      function=terminate_hanging_process,
-                    args=[self.loffice_process_list[used_port_num]["process"].pid],
-                )
+            with self.office_pool.acquire(timeout=settings.LIBRE_OFFICE_CHECKOUT_TIMEOUT) as used_port_num:
+                timings.details["libreoffice_port"] = used_port_num
                 try:
-                    loffice_timer.start()
-                    stdout, stderr = loffice_subprocess.communicate()
-                    soffice_timer.start()
-
-                    rc = loffice_subprocess.returncode
-                    if rc != 0:
-                        self.log.error(
-                            "unoserver failed rc=%s for %s -> %s\nstdout=%s\nstderr=%s",
-                            rc, doc_file_path, pdf_file_path,
-                            stdout.decode("utf-8", "ignore"),
-                            stderr.decode("utf-8", "ignore"),
-                        )
-
-                finally:
-                    loffice_timer.cancel()
-                    soffice_timer.cancel()
-                    if loffice_subprocess and loffice_subprocess.poll() is None:
-                        loffice_subprocess.kill()
-
-                    if os.path.isfile(pdf_file_path) and os.path.getsize(pdf_file_path) > 0:
-                        with open(file=pdf_file_path, mode="rb") as tmp_pdf_file:
-                            os.fsync(tmp_pdf_file.fileno())
-                            pdf_stream = tmp_pdf_file.read()
-                            
-                            if not pdf_stream.startswith(b"%PDF-"):
-                                self.log.warning("invalid pdf header for file %s", pdf_file_path)
-                                pdf_stream = b""
-                    else:
-                        self.log.info("libre office did not produce any output for file: " +
-                                      str(pdf_file_path) + " | port:" + str(used_port_num))
-
-            else:
-                self.log.error("could not find libre office server process on port:" + str(used_port_num))
+                    pdf_stream = self._get_unoserver_client(used_port_num).convert(stream, "pdf", input_filter)
+                except TimeoutError:
+                    # the monitor thread restarts unhealthy unoserver/soffice processes
+                    self.log.error("unoserver did not convert %s within %s seconds | port: %s; marking it unhealthy",
+                                   file_name, settings.LIBRE_OFFICE_PROCESS_TIMEOUT, used_port_num)
+                    self.office_pool.report_failure(used_port_num, unhealthy=True)
+                except Fault as fault:
+                    self.log.error("unoserver failed for %s | port: %s | %s",
+                                   file_name, used_port_num, fault.faultString)
+                    self.office_pool.report_failure(used_port_num)
+
+            if pdf_stream and not pdf_stream.startswith(b"%PDF-"):
+                self.log.warning("invalid pdf header for file %s", file_name)
+                pdf_stream = b""
+            elif not pdf_stream:
+                self.log.info("libre office did not produce any output for file: " +
+                              str(file_name) + " | port:" + str(used_port_num))
 
             conversion_time_end = time.time()
+            timings.add("convert", conversion_time_end - conversion_time_start, metric=STAGE_LIBREOFFICE_CONVERSION)
             self.log.info("doc conversion to PDF finished | Elapsed : " +
                           str(conversion_time_end - conversion_time_start) + " seconds")
 
-        except Exception:
-            self.log.exception(
-                "doc name: %s | tmp_file internal name: %s | preprocessing_doc failed",
-                file_name,
-                doc_file_path,
-            )
+        except TimeoutError:
+            self.log.error("no libre office server process became available for %s within %s seconds",
+                           file_name, settings.LIBRE_OFFICE_CHECKOUT_TIMEOUT)
 
-        finally:
-            if used_port_num:
-                self.loffice_process_list[used_port_num]["used"] = False
-            delete_tmp_files([doc_file_path, pdf_file_path])
+        except Exception:
+            self.log.exception("doc name: %s | preprocessing_doc failed", file_name)
 
         return pdf_stream
 
@@ -389,8 +425,6 @@ class DocumentConverter:
         return [image]
     
     def _xml_to_text(self, ctx: ProcessContext) -> str:
-        
-        import xml.etree.ElementTree as ET
 
         root = ET.fromstring(ctx.stream)
         parts = []
@@ -408,6 +442,11 @@ class DocumentConverter:
         return " ".join(parts)
 
 
+    @staticmethod
+    def _document_bytes(ctx: ProcessContext) -> bytes:
+        # the processor only keeps PDFs memory-mapped, other documents already arrive as bytes (no copy)
+        return ctx.stream if isinstance(ctx.stream, bytes) else bytes(ctx.stream)
+
     def _apply_text_fallback(
         self,
         ctx: ProcessContext,
@@ -424,10 +463,14 @@ class DocumentConverter:
         )
         ctx.pdf_stream = b""
         ctx.images = []
-        ctx.output_text = self._extract_office_zip_text_fallback(ctx.stream, ctx.file_name)
+        ctx.render_pages = []
+        ctx.page_texts = {}
+        ctx.metadata.pop("page_sources", None)
+        stream = self._document_bytes(ctx)
+        ctx.output_text = self._extract_office_zip_text_fallback(stream, ctx.file_name)
         if not ctx.output_text:
             ctx.output_text = self._extract_text_fallback(
-                ctx.stream,
+                stream,
                 is_html=is_html,
                 is_xml=is_xml,
                 is_rtf=is_rtf,
@@ -435,22 +478,61 @@ class DocumentConverter:
         ctx.metadata["pages"] = 1
         ctx.metadata["content-type"] = "text/plain"
         ctx.metadata["fallback_reason"] = reason
+        FALLBACKS.labels(reason).inc()
 
 
+    def apply_converted_pdf_fallback(self, ctx: ProcessContext) -> None:
+        """Fall back to text extraction for a document whose converted PDF failed to render or OCR.
+
+        Pages are rendered lazily while they are OCR'd, after `prepare`, so the caller applies it when OCR
+        fails for a document with a text fallback (`ctx.text_fallback`).
+        """
+        self.log.exception("Converted PDF rendering/OCR failed for %s; trying text fallback", ctx.file_name)
+        self._apply_text_fallback(ctx, **(ctx.text_fallback or {}), reason="converted_pdf_handling_failed")
+
     def _handle_pdf_stream(self, ctx: ProcessContext) -> None:
-        if settings.OPERATION_MODE == "OCR":
-            ctx.images, pdf_metadata = self._preprocess_pdf_to_img(ctx.pdf_stream)
-            ctx.metadata.update(pdf_metadata)
-        elif settings.OPERATION_MODE == "NO_OCR":
+        if settings.OPERATION_MODE == "NO_OCR":
             ctx.output_text, pdf_metadata = self._pdf_to_text(ctx.pdf_stream)
             ctx.metadata.update(pdf_metadata)
+            return
+
+        try:
+            self._plan_pdf_pages(ctx)
+        except Exception:
+            # converted documents fall back to their text, see `prepare`
+            if ctx.text_fallback is not None:
+                raise
+            self.log.error("preprocessing_pdf exception: " + str(traceback.format_exc()))
+
+    def _plan_pdf_pages(self, ctx: ProcessContext) -> None:
+        """Pages of the PDF to render for OCR, and in HYBRID mode the text of the pages that need none."""
+        if settings.OPERATION_MODE == "OCR":
+            self.log.info("pre-processing pdf...")
+            page_count = self._pdf_page_count(ctx.pdf_stream)
+            ctx.render_pages = list(range(page_count))
+            ctx.metadata["pages"] = page_count
+        elif settings.OPERATION_MODE == "HYBRID":
+            ctx.page_texts, ctx.render_pages, page_count = self._split_pdf_pages_by_text_layer(ctx.pdf_stream)
+            ctx.metadata["pages"] = page_count
+            ctx.metadata["page_sources"] = [
+                "text" if page_number in ctx.page_texts else "ocr" for page_number in range(page_count)
+            ]
+            self.log.info(
+                "HYBRID mode: %s page(s) taken from the text layer, %s page(s) sent to OCR",
+                len(ctx.page_texts),
+                len(ctx.render_pages),
+            )
 
 
     def prepare(self, ctx: ProcessContext) -> None:
 
         self.log.info("Checking file type for doc id: %s", ctx.file_name)
 
-        if is_encrypted_office_document(ctx.stream):
+        if ctx.content is None:
+            ctx.content = sniff_content(ctx.stream)
+        content = ctx.content
+
+        if content.is_encrypted:
             self.log.warning(
                 "Encrypted Office document detected for %s; skipping LibreOffice conversion",
                 ctx.file_name,
@@ -461,26 +543,34 @@ class DocumentConverter:
             ctx.metadata["pages"] = 0
             return
 
-        _is_pdf = type(ctx.file_type) is archive.Pdf
-        _is_rtf = type(ctx.file_type) is archive.Rtf or ctx.checks.is_rtf()
-        _is_html = ctx.checks.is_html()
-        _is_xml = ctx.checks.is_xml() and not _is_html
-        _is_plain = ctx.checks.is_plain_text()
+        _is_pdf = content.is_pdf
+        _is_rtf = content.is_rtf
+        _is_html = content.is_html
+        _is_xml = content.is_xml
+        _is_plain = content.is_plain_text
         _has_office_zip_fallback = os.path.splitext(ctx.file_name)[1].lower() in {".docx", ".odt"}
         text_fallback_allowed = _is_xml or _is_rtf or _has_office_zip_fallback
 
+        # PDFs are rendered and text-extracted from the (possibly memory-mapped) input, the other converters
+        # take bytes
+        stream = b"" if _is_pdf else self._document_bytes(ctx)
+
         if _is_pdf:
             ctx.pdf_stream = ctx.stream
 
         elif _is_xml:
             ctx.metadata["content-type"] = "text/xml"
             if settings.OPERATION_MODE == "NO_OCR":
-                ctx.output_text = self._xml_to_text(ctx)
+                try:
+                    ctx.output_text = self._xml_to_text(ctx)
+                except ET.ParseError:
+                    # the sniffer only checks a bounded prefix, the rest of the document may be malformed
+                    ctx.output_text = self._extract_text_fallback(stream, is_xml=True)
                 ctx.metadata["pages"] = 1
             else:
                 self.log.info("Detected XML content; converting to PDF...")
                 ctx.pdf_stream = self._preprocess_xml_to_pdf(
-                    ctx.stream,
+                    stream,
                     file_name=ctx.file_name,
                 )
                 if not ctx.pdf_stream:
@@ -489,44 +579,48 @@ class DocumentConverter:
                         ctx.file_name,
                     )
                     ctx.pdf_stream = self._preprocess_doc(
-                        ctx.stream,
+                        stream,
                         file_name=ctx.file_name,
+                        timings=ctx.timings,
                     )
 
         elif _is_html:
             ctx.metadata["content-type"] = "text/html"
             if settings.OPERATION_MODE == "NO_OCR":
                 self.log.info("Detected HTML content, handling via fallback, NO_OCR mode")
-                ctx.output_text = self._extract_text_fallback(ctx.stream, is_html=True)
+                ctx.output_text = self._extract_text_fallback(stream, is_html=True)
                 ctx.metadata["pages"] = 1
             else:
                 self.log.info("Detected HTML content; converting to PDF via unoserver/LO")
-                ctx.pdf_stream = self._preprocess_doc(ctx.stream, file_name=ctx.file_name)
+                ctx.pdf_stream = self._preprocess_doc(stream, file_name=ctx.file_name,
+                                                      timings=ctx.timings)
 
-        elif ctx.file_type in DOCUMENT or _is_rtf:
+        elif content.is_document or _is_rtf:
             if settings.OPERATION_MODE == "NO_OCR" and _is_rtf:
-                ctx.output_text = self._extract_text_fallback(ctx.stream, is_rtf=True)
+                ctx.output_text = self._extract_text_fallback(stream, is_rtf=True)
                 ctx.metadata["pages"] = 1
                 ctx.metadata["content-type"] = "text/plain"
             else:
-                ctx.pdf_stream = self._preprocess_doc(ctx.stream, file_name=ctx.file_name)
+                ctx.pdf_stream = self._preprocess_doc(stream, file_name=ctx.file_name,
+                                                      timings=ctx.timings)
 
-        elif ctx.file_type in IMAGE:
+        elif content.is_image:
             ctx.images = self._handle_image_stream(ctx)
 
         elif _is_plain:
             self.log.info(
                 "Unknown text-like content; treating as plain text, skipping unoserver/LO conversion"
             )
-            ctx.output_text = ctx.stream.decode("utf-8", "ignore")
+            ctx.output_text = stream.decode("utf-8", "ignore")
             ctx.metadata["pages"] = 1
             ctx.metadata["content-type"] = "text/plain"
 
         else:
             self.log.info("Unknown file type; attempting to convert to PDF via unoserver/LO")
-            ctx.pdf_stream = self._preprocess_doc(ctx.stream, file_name=ctx.file_name)
+            ctx.pdf_stream = self._preprocess_doc(stream, file_name=ctx.file_name,
+                                                  timings=ctx.timings)
 
-        if not ctx.pdf_stream and not ctx.output_text and (ctx.checks.is_text_like() or _has_office_zip_fallback):
+        if not ctx.pdf_stream and not ctx.output_text and (content.is_text_like or _has_office_zip_fallback):
             self._apply_text_fallback(
                 ctx,
                 is_html=_is_html,
@@ -535,6 +629,9 @@ class DocumentConverter:
                 reason="no_pdf_produced",
             )
 
+        if text_fallback_allowed:
+            ctx.text_fallback = {"is_html": _is_html, "is_xml": _is_xml, "is_rtf": _is_rtf}
+
         if ctx.pdf_stream:
             try:
                 self._handle_pdf_stream(ctx)
@@ -553,7 +650,13 @@ class DocumentConverter:
                     reason="converted_pdf_handling_failed",
                 )
             else:
-                if text_fallback_allowed and not ctx.output_text and not ctx.images:
+                if (
+                    text_fallback_allowed
+                    and not ctx.output_text
+                    and not ctx.images
+                    and not ctx.render_pages
+                    and not ctx.page_texts
+                ):
                     self._apply_text_fallback(
                         ctx,
                         is_html=_is_html,
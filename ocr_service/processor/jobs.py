@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import contextlib
+import logging
+import os
+import re
+import time
+import uuid
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Any
+
+import orjson
+import psutil
+
+from ocr_service.dto.page_result import PageResult
+from ocr_service.settings import settings
+from ocr_service.utils.metrics import QUEUE_DEPTH
+from ocr_service.utils.request_body import DocumentBuffer, release_buffer
+from ocr_service.utils.timings import queued_for
+
+JOB_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+class JobQueueFullError(Exception):
+    """Raised when a worker already holds `JOB_QUEUE_SIZE` unfinished jobs."""
+
+
+class JobStore:
+    """Job state and results kept as JSON files under `JOBS_DIR`.
+
+    Jobs run in the worker that accepted them, but are stored on disk so that any gunicorn worker
+    can answer status and result requests. Files are replaced atomically on every update.
+    """
+
+    def __init__(self, jobs_dir: str | None = None, retention: int | None = None) -> None:
+        self.jobs_dir = jobs_dir or settings.JOBS_DIR
+        self.retention = settings.JOB_RETENTION if retention is None else retention
+        os.makedirs(self.jobs_dir, exist_ok=True)
+
+    def _path(self, job_id: str, kind: str = "job") -> str:
+        return os.path.join(self.jobs_dir, f"{job_id}.{kind}.json")
+
+    def _write(self, path: str, content: dict[str, Any]) -> None:
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as job_file:
+            job_file.write(orjson.dumps(content))
+        os.replace(tmp_path, path)
+
+    def _read(self, path: str) -> dict[str, Any] | None:
+        try:
+            with open(path, "rb") as job_file:
+                return orjson.loads(job_file.read())
+        except (FileNotFoundError, orjson.JSONDecodeError):
+            return None
+
+    def create(self, file_name: str) -> dict[str, Any]:
+        now = time.time()
+        job: dict[str, Any] = {
+            "job_id": uuid.uuid4().hex,
+            "status": JOB_QUEUED,
+            "file_name": file_name,
+            "pages_done": 0,
+            "pages_total": None,
+            "created_at": now,
+            "updated_at": now,
+            "expires_at": None,
+            "worker_pid": os.getpid(),
+        }
+        self._write(self._path(job["job_id"]), job)
+        return job
+
+    def update(self, job_id: str, **fields: Any) -> dict[str, Any] | None:
+        job = self._read(self._path(job_id))
+        if job is None:
+            return None
+        job.update(fields)
+        job["updated_at"] = time.time()
+        if job["status"] in (JOB_DONE, JOB_FAILED):
+            job["expires_at"] = job["updated_at"] + self.retention
+        self._write(self._path(job_id), job)
+        return job
+
+    def get(self, job_id: str) -> dict[str, Any] | None:
+        if not JOB_ID_PATTERN.match(job_id):
+            return None
+        job = self._read(self._path(job_id))
+        if job is None:
+            return None
+        if job["status"] in (JOB_QUEUED, JOB_RUNNING) and not psutil.pid_exists(job["worker_pid"]):
+            # the worker running the job died (crash, timeout kill or restart)
+            job = self.update(job_id, status=JOB_FAILED, error="worker_lost") or job
+        return job
+
+    def save_result(self, job_id: str, result: dict[str, Any]) -> None:
+        self._write(self._path(job_id, "result"), result)
+
+    def get_result(self, job_id: str) -> dict[str, Any] | None:
+        if not JOB_ID_PATTERN.match(job_id):
+            return None
+        return self._read(self._path(job_id, "result"))
+
+    def delete(self, job_id: str) -> None:
+        for kind in ("job", "result"):
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(self._path(job_id, kind))
+
+    def purge_expired(self) -> None:
+        now = time.time()
+        with os.scandir(self.jobs_dir) as dir_entries:
+            job_ids = [dir_entry.name.split(".", 1)[0] for dir_entry in dir_entries
+                       if dir_entry.name.endswith(".job.json")]
+        for job_id in job_ids:
+            job = self._read(self._path(job_id))
+            if job is not None and job.get("expires_at") and job["expires_at"] <= now:
+                self.delete(job_id)
+
+
+class JobScheduler:
+    """In-process queue running submitted documents in the background on `JOB_CONCURRENCY` threads.
+
+    `process_stream` processes one document into `(text, metadata)`; progress is written to the job store
+    as pages complete so pollers on any worker can follow it.
+    """
+
+    def __init__(self,
+                 log: logging.Logger,
+                 process_stream: Callable[[DocumentBuffer, str, Callable[[PageResult], None]], tuple[str, dict]],
+                 store: JobStore | None = None,
+                 concurrency: int | None = None,
+                 queue_size: int | None = None) -> None:
+        self.log = log
+        self.process_stream = process_stream
+        self.store = store or JobStore()
+        self.concurrency = max(1, settings.JOB_CONCURRENCY if concurrency is None else concurrency)
+        self.queue_size = settings.JOB_QUEUE_SIZE if queue_size is None else queue_size
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = Lock()
+        self._unfinished = 0
+        self._running = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="ocr_job")
+        return self._executor
+
+    def submit(self, stream: DocumentBuffer, file_name: str, footer: dict | None = None) -> dict[str, Any]:
+        """Queue a document and return its job record straight away, the job releases `stream` once it is done."""
+        with self._lock:
+            if self._unfinished >= self.queue_size:
+                raise JobQueueFullError(f"{self._unfinished} jobs are already queued or running on this worker")
+            self._unfinished += 1
+            self._publish_queue_depth()
+            executor = self._get_executor()
+
+        try:
+            self.store.purge_expired()
+            job = self.store.create(file_name)
+            executor.submit(self._run, job["job_id"], stream, file_name, footer or {}, time.monotonic())
+        except Exception:
+            with self._lock:
+                self._unfinished -= 1
+                self._publish_queue_depth()
+            raise
+        return job
+
+    def _publish_queue_depth(self) -> None:
+        QUEUE_DEPTH.labels("jobs").set(self._unfinished - self._running)
+
+    def _run(self, job_id: str, stream: DocumentBuffer, file_name: str, footer: dict, queued_at: float) -> None:
+        last_update = [0.0]
+
+        def page_callback(page_result: PageResult) -> None:
+            # throttle progress writes for documents with many small pages
+            now = time.monotonic()
+            if page_result.pages_done == page_result.pages_total or now - last_update[0] >= 0.5:
+                last_update[0] = now
+                self.store.update(job_id, pages_done=page_result.pages_done, pages_total=page_result.pages_total)
+
+        with self._lock:
+            self._running += 1
+            self._publish_queue_depth()
+
+        try:
+            self.store.update(job_id, status=JOB_RUNNING, started_at=time.time())
+            with queued_for(time.monotonic() - queued_at):
+                output_text, doc_metadata = self.process_stream(stream, file_name, page_callback)
+            self.store.save_result(job_id, {"text": output_text, "metadata": doc_metadata, "footer": footer})
+            pages = doc_metadata.get("pages")
+            progress = {"pages_done": pages, "pages_total": pages} if pages is not None else {}
+            # process_stream reports failures as an empty result, answered 500 like /api/process
+            if output_text or doc_metadata.get("ocr_skipped"):
+                self.store.update(job_id, status=JOB_DONE, **progress)
+            else:
+                self.log.warning("Job %s (%s) produced no text", job_id, file_name)
+                self.store.update(job_id, status=JOB_FAILED, error="no_text_generated", **progress)
+        except Exception as exc:
+            self.log.exception("Job %s (%s) failed", job_id, file_name)
+            self.store.update(job_id, status=JOB_FAILED, error=repr(exc))
+        finally:
+            release_buffer(stream)
+            with self._lock:
+                self._unfinished -= 1
+                self._running -= 1
+                self._publish_queue_depth()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"concurrency": self.concurrency, "queue_size": self.queue_size, "unfinished": self._unfinished}
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
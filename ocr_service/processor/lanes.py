@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import contextlib
+from collections.abc import Iterable, Iterator
+from threading import Condition
+
+from ocr_service.settings import settings
+
+LANE_SMALL = "small"
+LANE_LARGE = "large"
+# lanes in tie-break order
+LANES = (LANE_SMALL, LANE_LARGE)
+
+
+def lane_for(pages: int) -> str:
+    """Lane of a document of `pages` (estimated) pages, weighted by the render DPI: the pixels to render
+    and recognise per page grow with its square."""
+    weighted_pages = pages * (settings.OCR_SERVICE_IMAGE_DPI / 200) ** 2
+    return LANE_LARGE if weighted_pages > settings.LANE_LARGE_PAGES else LANE_SMALL
+
+
+class LaneScheduler:
+    """Weighted sharing of `slots` (documents, OCR handles or render processes) between the small and large lanes.
+
+    A free slot goes to the waiting lane granted the least so far relative to its weight (stride scheduling):
+    while both lanes wait, small work gets `LANE_SMALL_WEIGHT` slots for every `LANE_LARGE_WEIGHT` large one,
+    so small documents are not stuck behind a large one and large documents keep making progress. Large work
+    never holds the `reserved` slots, which stay free for small documents.
+    """
+
+    def __init__(self,
+                 slots: int,
+                 weights: dict[str, int] | None = None,
+                 reserved: int | None = None) -> None:
+        self.slots = max(1, int(slots))
+        self.weights = weights or {LANE_SMALL: settings.LANE_SMALL_WEIGHT, LANE_LARGE: settings.LANE_LARGE_WEIGHT}
+        reserved = settings.LANE_SMALL_RESERVED if reserved is None else reserved
+        # with a single slot large work has to share it
+        self.large_limit = max(1, self.slots - reserved)
+        self._cond = Condition()
+        self._running = dict.fromkeys(LANES, 0)
+        self._waiting = dict.fromkeys(LANES, 0)
+        self._granted = dict.fromkeys(LANES, 0)
+        self._pass = dict.fromkeys(LANES, 0.0)
+
+    def _runnable(self, lane: str) -> bool:
+        if sum(self._running.values()) >= self.slots:
+            return False
+        return lane != LANE_LARGE or self._running[LANE_LARGE] < self.large_limit
+
+    def _next_lane(self, lanes: Iterable[str]) -> str | None:
+        runnable = [lane for lane in LANES if lane in lanes and self._runnable(lane)]
+        return min(runnable, key=lambda lane: (self._pass[lane], LANES.index(lane)), default=None)
+
+    def _activate(self, lane: str) -> None:
+        # a lane that was idle does not bank the slots it did not use
+        if self._waiting[lane] or self._running[lane]:
+            return
+        active = [self._pass[other] for other in LANES if self._waiting[other] or self._running[other]]
+        if active:
+            self._pass[lane] = max(self._pass[lane], min(active))
+
+    def _grant(self, lane: str) -> None:
+        self._running[lane] += 1
+        self._granted[lane] += 1
+        self._pass[lane] += 1.0 / self.weights[lane]
+
+    def acquire(self, lane: str, timeout: float | None = None) -> None:
+        """Block until `lane` is granted a slot.
+
+        Raises:
+            TimeoutError: no slot was granted within `timeout` seconds.
+        """
+        def is_next() -> bool:
+            return self._next_lane([other for other in LANES if self._waiting[other]]) == lane
+
+        with self._cond:
+            self._activate(lane)
+            self._waiting[lane] += 1
+            try:
+                if not self._cond.wait_for(is_next, timeout):
+                    raise TimeoutError(f"No {lane} lane slot became available within {timeout} seconds")
+                self._grant(lane)
+            finally:
+                self._waiting[lane] -= 1
+                self._cond.notify_all()
+
+    def try_acquire(self, lanes: Iterable[str]) -> str | None:
+        """Grant a slot to whichever of `lanes` (the lanes with queued work) is next, without blocking."""
+        candidates = list(lanes)
+        with self._cond:
+            for candidate in candidates:
+                self._activate(candidate)
+            lane = self._next_lane(candidates)
+            if lane is not None:
+                self._grant(lane)
+            return lane
+
+    def release(self, lane: str) -> None:
+        with self._cond:
+            self._running[lane] = max(0, self._running[lane] - 1)
+            self._cond.notify_all()
+
+    @contextlib.contextmanager
+    def slot(self, lane: str, timeout: float | None = None) -> Iterator[None]:
+        self.acquire(lane, timeout)
+        try:
+            yield
+        finally:
+            self.release(lane)
+
+    def stats(self) -> dict[str, int | dict[str, int]]:
+        with self._cond:
+            return {
+                "slots": self.slots,
+                "large_limit": self.large_limit,
+                "running": dict(self._running),
+                "waiting": dict(self._waiting),
+                "granted": dict(self._granted),
+            }
@@ -1,15 +1,27 @@
 from __future__ import annotations
 
-from enum import Enum
 import logging
 import time
-import traceback
-from multiprocessing.dummy import Pool, Queue
+from collections.abc import Callable, Iterable, Iterator
+from enum import Enum
+from itertools import chain
+from queue import Full, Queue
+from threading import Event, Lock, Thread
+from typing import Any
 
 from tesserocr import PyTessBaseAPI
 
+from ocr_service.dto.page_result import PageResult
 from ocr_service.dto.process_context import ProcessContext
+from ocr_service.processor.lanes import LANE_SMALL, LaneScheduler
+from ocr_service.processor.page_bitmap import SharedPageBitmap
+from ocr_service.processor.tesseract_pool import TesseractApiPool
 from ocr_service.settings import settings
+from ocr_service.utils.metrics import STAGE_OCR_PAGE
+from ocr_service.utils.utils import is_blank_image
+
+# sentinel telling an OCR consumer thread that no more pages will be queued
+_END_OF_PAGES = object()
 
 
 class OcrPipeline(str, Enum):
@@ -21,14 +33,19 @@ class OcrPipeline(str, Enum):
 class OcrEngine:
     def __init__(self, log: logging.Logger) -> None:
         self.log = log
-
-    def _init_tesseract_api_worker(self) -> PyTessBaseAPI:
-        tesseract_api = PyTessBaseAPI(path=settings.TESSDATA_PREFIX, lang=settings.TESSERACT_LANGUAGE)  # type: ignore
-        self.log.debug("Initialised pytesseract api worker for language:" + str(settings.TESSERACT_LANGUAGE))
-        return tesseract_api
+        self.api_pool = TesseractApiPool(log, size=settings.CPU_THREADS)
+        # pages of small documents are recognised ahead of those of large ones when the handles are contended
+        self.lanes = LaneScheduler(settings.CPU_THREADS)
 
     def _process_image(self, img, img_id: int, tesseract_api: PyTessBaseAPI) -> tuple[str, int, dict]:
-        tesseract_api.SetImage(img)
+        if isinstance(img, SharedPageBitmap):
+            page_bitmap = img.page_bitmap
+            tesseract_api.SetImageBytes(img.to_bytes(), page_bitmap.width, page_bitmap.height,
+                                        page_bitmap.bytes_per_pixel, page_bitmap.stride)
+        else:
+            tesseract_api.SetImage(img)
+        if not tesseract_api.Recognize(timeout=settings.TESSERACT_TIMEOUT * 1000):
+            raise TimeoutError(f"Tesseract did not recognise img {img_id} within {settings.TESSERACT_TIMEOUT}s")
         output_str = tesseract_api.GetUTF8Text()
 
         tess_data = {}
@@ -40,42 +57,201 @@ class OcrEngine:
 
         return output_str, img_id, tess_data
 
-    def run(self, ctx: ProcessContext) -> None:
-        image_count = len(ctx.images)
-        tess_data = []
+    def _process_pooled_image(self, img, img_id: int) -> tuple[str, int, dict]:
+        with self.api_pool.acquire(timeout=settings.TESSERACT_TIMEOUT) as tesseract_api:
+            return self._process_image(img, img_id, tesseract_api)
 
-        if image_count == 0:
-            return
+    @staticmethod
+    def _release_page(img: Any) -> None:
+        if isinstance(img, SharedPageBitmap):
+            img.release()
+
+    @staticmethod
+    def _is_blank_page(img: Any) -> bool:
+        return is_blank_image(img.to_array() if isinstance(img, SharedPageBitmap) else img)
+
+    def _produce_pages(self,
+                       pages: Iterator[tuple[int, Any]],
+                       page_queue: Queue,
+                       stop_event: Event,
+                       errors: list[BaseException],
+                       consumer_count: int,
+                       blank_pages: list[int],
+                       page_done: Callable[..., None]) -> None:
+        try:
+            for page in pages:
+                if self._is_blank_page(page[1]):
+                    self.log.info("skipping blank img: " + str(page[0]))
+                    blank_pages.append(page[0])
+                    self._release_page(page[1])
+                    page_done(page[0], "blank")
+                    continue
+                while not stop_event.is_set():
+                    try:
+                        page_queue.put(page, timeout=0.1)
+                        break
+                    except Full:
+                        continue
+                if stop_event.is_set():
+                    self._release_page(page[1])
+                    break
+        except Exception as render_exception:
+            self.log.exception("Page rendering failed")
+            errors.append(render_exception)
+            stop_event.set()
+        finally:
+            # stops any render workers still producing pages for an abandoned document
+            close_pages = getattr(pages, "close", None)
+            if callable(close_pages):
+                close_pages()
+            for _ in range(consumer_count):
+                page_queue.put(_END_OF_PAGES)
+
+    def _consume_pages(self,
+                       page_queue: Queue,
+                       results: dict[int, tuple[str, dict]],
+                       stop_event: Event,
+                       errors: list[BaseException],
+                       page_done: Callable[..., None],
+                       lane: str = LANE_SMALL) -> None:
+        while True:
+            page = page_queue.get()
+            if page is _END_OF_PAGES:
+                return
+            img_id, img = page
+            # keep draining after a failure so the producer is never blocked on a full queue
+            if stop_event.is_set():
+                self._release_page(img)
+                continue
 
-        self.log.info("A total of " + str(image_count) + " images have been generated from " + ctx.file_name)
-        ocr_start_time = time.time()
-        proc_results = list()
-
-        with Pool(processes=settings.CPU_THREADS) as process_pool:
-            tess_api_q: Queue = Queue()
-            for count, img in enumerate(ctx.images):
-                tesseract_api_worker = self._init_tesseract_api_worker()
-                tess_api_q.put(tesseract_api_worker)
-                proc_results.append(process_pool.starmap_async(self._process_image,
-                                                               [(img, count, tess_api_q.get(),)],
-                                                               chunksize=1,
-                                                               error_callback=logging.error))
             try:
-                for result in proc_results:
-                    result_data = result.get(timeout=settings.TESSERACT_TIMEOUT)
-                    _output_text, _, _tess_data = result_data[0][0], result_data[0][1], result_data[0][2]
-                    ctx.output_text += str(_output_text)
-                    tess_data.append(_tess_data)
+                with self.lanes.slot(lane):
+                    page_start_time = time.time()
+                    page_start_cpu = time.thread_time()
+                    output_str, _, tess_data = self._process_pooled_image(img, img_id)
+                results[img_id] = (output_str, tess_data)
+                page_done(img_id, "ocr", output_str, tess_data["confidence"], time.time() - page_start_time,
+                          time.thread_time() - page_start_cpu)
             except Exception as worker_exception:
-                raise Exception("OCR exception generated by worker: "
-                                + str(traceback.format_exc())) from worker_exception
+                errors.append(worker_exception)
+                stop_event.set()
             finally:
-                for tess_api in tess_api_q.queue:
-                    tess_api.End()
+                self._release_page(img)
+
+    @staticmethod
+    def _merge_pages(page_texts: dict[int, str], ocr_texts: dict[int, str]) -> str:
+        if not page_texts:
+            return "".join(str(ocr_texts[page_num]) for page_num in sorted(ocr_texts))
+
+        merged = []
+        for page_num in sorted(page_texts.keys() | ocr_texts.keys()):
+            page_text = str(page_texts[page_num] if page_num in page_texts else ocr_texts[page_num])
+            merged.append(page_text if page_text.endswith("\n") else page_text + "\n")
+        return "".join(merged)
+
+    def _page_reporter(self, ctx: ProcessContext, page_count: int) -> Callable[..., None]:
+        """Return a thread-safe hook reporting each finished page to `ctx.page_callback` as a `PageResult`
+        and recording the recognition time of OCR'd pages in `ctx.timings`.
+
+        The hook takes `(page_num, source, text="", confidence=None, elapsed_time=0.0, cpu_time=None)` with a
+        zero-based page number.
+        """
+        pages_total = page_count + len(ctx.page_texts)
+        progress = {"done": 0}
+        lock = Lock()
+
+        def page_done(page_num: int, source: str, text: str = "", confidence: float | None = None,
+                      elapsed_time: float = 0.0, cpu_time: float | None = None) -> None:
+            if source == "ocr":
+                ctx.timings.add_page(page_num, elapsed_time, cpu_time, metric=STAGE_OCR_PAGE)
+            if ctx.page_callback is None:
+                return
+            with lock:
+                progress["done"] += 1
+                try:
+                    ctx.page_callback(PageResult(page=page_num + 1,
+                                                 source=source,
+                                                 text=text,
+                                                 confidence=confidence,
+                                                 elapsed_time=round(elapsed_time, 4),
+                                                 pages_done=progress["done"],
+                                                 pages_total=pages_total))
+                except Exception:
+                    self.log.exception("Page callback failed")
+
+        return page_done
+
+    def run(self, ctx: ProcessContext, pages: Iterable[tuple[int, Any]] | None = None) -> None:
+        """OCR `ctx.images` plus any lazily rendered `pages` through a bounded producer/consumer queue.
+
+        Pages are recognised as soon as they are rendered by `CPU_THREADS` consumer threads, while at most
+        `PAGE_QUEUE_SIZE` rendered pages wait in memory. Pages take a Tesseract handle through the lane of
+        the document (`ctx.lane`), shared with the other documents of the worker. Output text is assembled
+        in page order, together with any pages already taken from the PDF text layer (`ctx.page_texts`).
+        """
+        page_count = len(ctx.images) + len(ctx.render_pages)
+        page_done = self._page_reporter(ctx, page_count)
+
+        # pages taken from the text layer are done before OCR starts
+        for page_num in sorted(ctx.page_texts):
+            page_done(page_num, "text", ctx.page_texts[page_num])
+
+        if page_count == 0:
+            ctx.output_text += self._merge_pages(ctx.page_texts, {})
+            return
+
+        self.log.info("A total of " + str(page_count) + " images have been queued for OCR from " + ctx.file_name)
+        ocr_start_time = time.time()
+
+        page_source: Iterator[tuple[int, Any]] = iter(enumerate(ctx.images))
+        if pages is not None and ctx.images:
+            page_source = chain(page_source, pages)
+        elif pages is not None:
+            page_source = iter(pages)
+
+        page_queue: Queue = Queue(maxsize=settings.PAGE_QUEUE_SIZE)
+        results: dict[int, tuple[str, dict]] = {}
+        errors: list[BaseException] = []
+        blank_pages: list[int] = []
+        stop_event = Event()
+        consumer_count = max(1, min(settings.CPU_THREADS, page_count))
+
+        producer = Thread(target=self._produce_pages,
+                          args=(page_source, page_queue, stop_event, errors, consumer_count, blank_pages, page_done),
+                          name="ocr_page_producer",
+                          daemon=True)
+        consumers = [
+            Thread(target=self._consume_pages,
+                   args=(page_queue, results, stop_event, errors, page_done, ctx.lane),
+                   name=f"ocr_page_consumer_{i}",
+                   daemon=True)
+            for i in range(consumer_count)
+        ]
+
+        producer.start()
+        for consumer in consumers:
+            consumer.start()
+        producer.join()
+        for consumer in consumers:
+            consumer.join()
+
+        if errors:
+            raise Exception("OCR exception generated by worker: " + repr(errors[0])) from errors[0]
+
+        ordered_results = [results[img_id] for img_id in sorted(results)]
+        ctx.output_text += self._merge_pages(ctx.page_texts, {img_id: text for img_id, (text, _) in results.items()})
 
         ocr_end_time = time.time()
 
         self.log.info(f"OCR processing finished | Elapsed : {ocr_end_time - ocr_start_time:.4f} seconds")
 
-        ctx.metadata["pages"] = image_count
-        ctx.metadata["confidence"] = round(sum([page["confidence"] for page in tess_data]) / image_count, 4)
+        ocr_page_count = max(1, len(ordered_results))
+        ctx.metadata.setdefault("pages", page_count)
+        ctx.metadata["blank_pages_skipped"] = len(blank_pages)
+        if "page_sources" in ctx.metadata:
+            for img_id in blank_pages:
+                ctx.metadata["page_sources"][img_id] = "blank"
+        ctx.metadata["confidence"] = round(sum([data["confidence"] for _, data in ordered_results]) / ocr_page_count, 4)
+
+    def close(self) -> None:
+        self.api_pool.close()
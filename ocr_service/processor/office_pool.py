@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import contextlib
+import logging
+import time
+from collections import deque
+from collections.abc import Iterator
+from threading import Condition
+from typing import Any
+
+from ocr_service.utils.metrics import ERRORS, LIBREOFFICE_INSTANCES
+
+# waiters re-check the instances at least this often, the monitor thread replaces restarted
+# instances in `loffice_process_list` without notifying the pool
+_RECHECK_INTERVAL = 1.0
+
+
+class LibreOfficePool:
+    """Checkout of the unoserver/soffice instances started for this worker.
+
+    Instances are the entries of the shared `loffice_process_list` (port -> process metadata), which the
+    LibreOffice monitor thread keeps up to date. Callers wait in strict FIFO order for a free, healthy
+    instance; instances marked unhealthy are skipped until the monitor thread has restarted them.
+    """
+
+    def __init__(self, log: logging.Logger, loffice_process_list: dict[str, Any]) -> None:
+        self.log = log
+        self.loffice_process_list = loffice_process_list
+        self._condition = Condition()
+        self._waiters: deque[object] = deque()
+        self._busy: set[str] = set()
+        self._started_at = time.monotonic()
+        self._checkouts = 0
+        self._timeouts = 0
+        self._wait_seconds = 0.0
+        self._instance_stats: dict[str, dict[str, float]] = {}
+
+    def _instance(self, port: str) -> dict[str, float]:
+        return self._instance_stats.setdefault(port, {"conversions": 0, "failures": 0, "busy_seconds": 0.0})
+
+    def _free_port(self) -> str | None:
+        for port, loffice_process in self.loffice_process_list.items():
+            if str(port) not in self._busy and not loffice_process.get("unhealthy"):
+                return str(port)
+        return None
+
+    def _publish_instances(self) -> None:
+        LIBREOFFICE_INSTANCES.labels("busy").set(len(self._busy))
+        LIBREOFFICE_INSTANCES.labels("total").set(len(self.loffice_process_list))
+
+    def _checkout(self, timeout: float) -> str:
+        ticket = object()
+        deadline = time.monotonic() + timeout
+        wait_start = time.monotonic()
+
+        with self._condition:
+            self._waiters.append(ticket)
+            try:
+                while True:
+                    if self._waiters[0] is ticket:
+                        port = self._free_port()
+                        if port is not None:
+                            break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise TimeoutError(f"No LibreOffice instance became available within {timeout} seconds")
+                    self._condition.wait(min(remaining, _RECHECK_INTERVAL))
+            finally:
+                self._waiters.remove(ticket)
+                # let the next caller in line check for a free instance
+                self._condition.notify_all()
+
+            self._busy.add(port)
+            self.loffice_process_list[port]["used"] = True
+            self._checkouts += 1
+            self._wait_seconds += time.monotonic() - wait_start
+            self._publish_instances()
+        return port
+
+    def _checkin(self, port: str, busy_seconds: float) -> None:
+        with self._condition:
+            self._busy.discard(port)
+            if port in self.loffice_process_list:
+                self.loffice_process_list[port]["used"] = False
+            instance = self._instance(port)
+            instance["conversions"] += 1
+            instance["busy_seconds"] += busy_seconds
+            self._publish_instances()
+            self._condition.notify_all()
+
+    @contextlib.contextmanager
+    def acquire(self, timeout: float) -> Iterator[str]:
+        """Wait up to `timeout` seconds (FIFO) for a free healthy instance and yield its port."""
+        port = self._checkout(timeout)
+        checkout_time = time.monotonic()
+        try:
+            yield port
+        finally:
+            self._checkin(port, time.monotonic() - checkout_time)
+
+    def report_failure(self, port: str, unhealthy: bool = False) -> None:
+        """Count a failed conversion; `unhealthy` takes the instance out of rotation until it is restarted."""
+        ERRORS.labels("libreoffice").inc()
+        with self._condition:
+            self._instance(port)["failures"] += 1
+            if unhealthy and port in self.loffice_process_list:
+                self.loffice_process_list[port]["unhealthy"] = True
+
+    def stats(self) -> dict[str, Any]:
+        with self._condition:
+            self._publish_instances()
+            size = len(self.loffice_process_list)
+            uptime = max(time.monotonic() - self._started_at, 1e-9)
+            busy_seconds = sum(instance["busy_seconds"] for instance in self._instance_stats.values())
+            instances = {}
+            for port, loffice_process in self.loffice_process_list.items():
+                instance = self._instance(str(port))
+                instances[str(port)] = {
+                    "in_use": str(port) in self._busy,
+                    "unhealthy": bool(loffice_process.get("unhealthy")),
+                    "conversions": int(instance["conversions"]),
+                    "failures": int(instance["failures"]),
+                    "utilisation": round(instance["busy_seconds"] / uptime, 4),
+                }
+            return {
+                "size": size,
+                "in_use": len(self._busy),
+                "waiting": len(self._waiters),
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "avg_wait_seconds": round(self._wait_seconds / self._checkouts, 4) if self._checkouts else 0.0,
+                "utilisation": round(busy_seconds / (uptime * size), 4) if size else 0.0,
+                "instances": instances,
+            }
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import contextlib
+import logging
+import os
+import uuid
+from dataclasses import dataclass
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+
+import numpy as np
+import psutil
+
+# every segment name carries the pid of the gunicorn worker that owns it, so segments left behind by a
+# crashed worker can be told apart from live ones: ocr_svc_<owner pid>_<random>_<page number>
+SEGMENT_PREFIX = "ocr_svc_"
+SHM_DIR = "/dev/shm"
+
+logger = logging.getLogger(__name__)
+
+
+def new_segment_name(page_num: int) -> str:
+    return f"{SEGMENT_PREFIX}{os.getpid()}_{uuid.uuid4().hex[:8]}_{page_num}"
+
+
+def unlink_segments(segment_names: list[str]) -> None:
+    """Remove shared memory segments by name, ignoring the ones that were never created or already removed."""
+    for segment_name in segment_names:
+        try:
+            shm = SharedMemory(name=segment_name)
+        except FileNotFoundError:
+            continue
+        shm.close()
+        with contextlib.suppress(FileNotFoundError):
+            shm.unlink()
+
+
+@dataclass(frozen=True)
+class PageBitmap:
+    """Descriptor of a raw page bitmap stored in a named shared memory segment.
+
+    Render processes write the bitmap and return only this descriptor, the owning worker reads the pixels
+    in place and unlinks the segment once the page has been OCR'd (see `SharedPageBitmap`).
+    """
+
+    segment_name: str
+    width: int
+    height: int
+    stride: int
+    bytes_per_pixel: int
+
+    @property
+    def size(self) -> int:
+        return self.stride * self.height
+
+
+def write_page_bitmap(segment_name: str, buffer: memoryview, width: int, height: int,
+                      stride: int, bytes_per_pixel: int) -> PageBitmap:
+    """Copy a rendered bitmap into a new shared memory segment (runs inside a render process)."""
+    page_bitmap = PageBitmap(segment_name, width, height, stride, bytes_per_pixel)
+    shm = SharedMemory(name=segment_name, create=True, size=page_bitmap.size)
+    try:
+        shm.buf[:page_bitmap.size] = buffer.cast("B")[:page_bitmap.size]
+    except Exception:
+        shm.close()
+        shm.unlink()
+        raise
+    shm.close()
+    return page_bitmap
+
+
+class SharedPageBitmap:
+    """Worker side handle on a `PageBitmap`, the segment stays attached until `release()` unlinks it."""
+
+    def __init__(self, page_bitmap: PageBitmap) -> None:
+        self.page_bitmap = page_bitmap
+        self._shm: SharedMemory | None = SharedMemory(name=page_bitmap.segment_name)
+
+    @property
+    def width(self) -> int:
+        return self.page_bitmap.width
+
+    @property
+    def height(self) -> int:
+        return self.page_bitmap.height
+
+    def _buffer(self) -> memoryview:
+        if self._shm is None:
+            raise ValueError(f"Page bitmap {self.page_bitmap.segment_name} has been released")
+        return self._shm.buf[:self.page_bitmap.size]
+
+    def to_array(self) -> np.ndarray:
+        """Zero-copy `(height, width)` or `(height, width, channels)` uint8 view of the pixels.
+
+        The view must not outlive `release()`.
+        """
+        page_bitmap = self.page_bitmap
+        rows = np.ndarray((page_bitmap.height, page_bitmap.stride), dtype=np.uint8, buffer=self._buffer())
+        pixels = rows[:, :page_bitmap.width * page_bitmap.bytes_per_pixel]
+        if page_bitmap.bytes_per_pixel == 1:
+            return pixels
+        return pixels.reshape(page_bitmap.height, page_bitmap.width, page_bitmap.bytes_per_pixel)
+
+    def to_bytes(self) -> bytes:
+        with self._buffer() as buffer:
+            return buffer.tobytes()
+
+    def release(self) -> None:
+        if self._shm is None:
+            return
+        shm, self._shm = self._shm, None
+        shm.close()
+        with contextlib.suppress(FileNotFoundError):
+            shm.unlink()
+
+
+def cleanup_stale_page_bitmaps(shm_dir: str = SHM_DIR) -> None:
+    """Remove page bitmap segments owned by workers that are no longer running.
+
+    Args:
+        shm_dir: Directory backing POSIX shared memory.
+    """
+    base = Path(shm_dir)
+    if not base.exists():
+        return
+
+    for segment in base.glob(f"{SEGMENT_PREFIX}*"):
+        try:
+            owner_pid = int(segment.name[len(SEGMENT_PREFIX):].split("_", 1)[0])
+            if psutil.pid_exists(owner_pid):
+                continue
+            segment.unlink()
+            logger.info("Removed stale page bitmap segment: %s", segment.name)
+        except FileNotFoundError:
+            continue
+        except Exception as exc:
+            logger.warning("Failed to remove stale page bitmap segment %s: %s", segment.name, exc)
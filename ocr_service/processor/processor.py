@@ -1,15 +1,35 @@
 from __future__ import annotations
 
+import asyncio
 import sys
 import time
 import traceback
+from collections.abc import Callable
+from concurrent.futures import Future
 from typing import Any
 
+from ocr_service.dto.page_result import PageResult
 from ocr_service.dto.process_context import ProcessContext
+from ocr_service.processor.admission import AdmissionController, AdmissionTicket
+from ocr_service.processor.batch import BatchExecutor
 from ocr_service.processor.converter import DocumentConverter
+from ocr_service.processor.jobs import JobScheduler
+from ocr_service.processor.lanes import lane_for
 from ocr_service.processor.ocr_engine import OcrEngine
+from ocr_service.processor.result_cache import ResultCache
 from ocr_service.settings import settings
-from ocr_service.utils.utils import detect_file_type, normalise_file_name_with_ext, setup_logging
+from ocr_service.utils.metrics import (
+    CACHE_LOOKUPS,
+    DOCUMENTS_IN_FLIGHT,
+    ERRORS,
+    PAGES,
+    STAGE_DETECTION,
+    STAGE_TEXT_FINALISATION,
+)
+from ocr_service.utils.request_body import DocumentBuffer, release_buffer
+from ocr_service.utils.sniffer import sniff_content
+from ocr_service.utils.timings import StageTimings
+from ocr_service.utils.utils import normalise_file_name_with_ext, setup_logging
 
 
 class Processor:
@@ -21,30 +41,49 @@ class Processor:
         self.loffice_process_list = {}
         self.converter = DocumentConverter(self.log, self.loffice_process_list)
         self.ocr_engine = OcrEngine(self.log)
-
-    def _process(self, stream: bytes, file_name: str) -> tuple[str, dict]:
+        self.result_cache = ResultCache(self.log)
+        self.batch_executor = BatchExecutor(self.log, self.process_stream)
+        self.job_scheduler = JobScheduler(self.log, self.process_stream)
+        self.admission = AdmissionController(self.log)
+
+    def _process(self,
+                 stream: DocumentBuffer,
+                 file_name: str,
+                 page_callback: Callable[[PageResult], None] | None = None,
+                 timings: StageTimings | None = None) -> tuple[str, dict]:
         """Process a document stream into extracted text and metadata.
 
         Flow:
-          1) Detect file type + normalize filename for downstream converters.
+          1) Classify the content once (bounded sniff) + normalize filename for downstream converters.
           2) Convert/prepare content via DocumentConverter (LO/PDF/XML handling, fallback text extraction).
-          3) Run OCR on images via OcrEngine when images are present.
+             Office/RTF/XML documents whose converted PDF fails to render or OCR fall back to text extraction.
+          3) Run OCR via OcrEngine on images and on PDF pages streamed from the renderer as they are produced,
+             sharing the OCR and render pools with the worker's other documents by lane (small or large,
+             from the pages left to OCR).
 
         Notes:
           - In NO_OCR mode, PDFs are text-extracted and image inputs skip OCR (empty text + metadata.ocr_skipped).
+          - Memory-mapped PDFs are rendered and text-extracted without copying them into memory,
+            other memory-mapped documents are read into bytes for the converters.
 
         Args:
-            stream: Raw document bytes.
+            stream: Raw document bytes, or a memory-mapped spool of them.
             file_name: Caller-supplied name; used for temp files and type normalization.
+            page_callback: Optional hook called with the `PageResult` of each page as soon as it is done.
 
         Returns:
             (text, metadata): Extracted text plus metadata such as content-type, pages, confidence, elapsed_time.
         """
 
-        file_type = detect_file_type(stream)
-        file_name = normalise_file_name_with_ext(file_name, stream, file_type)
-        ctx = ProcessContext(stream=stream, file_name=file_name, file_type=file_type)
-        ctx.metadata["content-type"] = self.converter.resolve_content_type(file_type)
+        timings = StageTimings() if timings is None else timings
+        with timings.stage("sniff", STAGE_DETECTION):
+            content = sniff_content(stream)
+            if not isinstance(stream, bytes) and not content.is_pdf:
+                stream = bytes(stream)
+            file_name = normalise_file_name_with_ext(file_name, stream, content=content)
+            timings.metadata = {"content-type": self.converter.resolve_content_type(content.file_type)}
+        ctx = ProcessContext(stream=stream, file_name=file_name, file_type=content.file_type, content=content,
+                             metadata=timings.metadata, page_callback=page_callback, timings=timings)
 
         try:
             self.converter.prepare(ctx)
@@ -53,23 +92,48 @@ class Processor:
                 "Detected file type for doc id: " + ctx.file_name + " | " + str(ctx.metadata["content-type"])
             )
 
-            self.ocr_engine.run(ctx)
-            ctx.output_text = self.converter.finalize_output_text(ctx.output_text)
+            ctx.lane = lane_for(len(ctx.images) + len(ctx.render_pages))
+            try:
+                self.ocr_engine.run(ctx, pages=self.converter.iter_pdf_pages(ctx.pdf_stream, ctx.render_pages,
+                                                                             lane=ctx.lane, timings=ctx.timings))
+            except Exception:
+                # PDFs are rendered while they are OCR'd, so their render failures surface here: converted
+                # documents fall back to their text, other PDFs keep their metadata with no text
+                if ctx.text_fallback is not None:
+                    self.converter.apply_converted_pdf_fallback(ctx)
+                elif ctx.pdf_stream:
+                    self.log.exception("PDF rendering/OCR failed for %s", ctx.file_name)
+                    ctx.output_text = ""
+                else:
+                    raise
+            with ctx.timings.stage("finalise", STAGE_TEXT_FINALISATION):
+                ctx.output_text = self.converter.finalize_output_text(ctx.output_text)
         except Exception as converter_exception:
             raise Exception("Failed to convert/generate image content: "
                             + str(traceback.format_exc())) from converter_exception
 
         return ctx.output_text, ctx.metadata
 
-    def process_stream(self, stream: bytes, file_name: str = "") -> tuple[str, dict]:
-        """Public entry point that wraps _process with timing and logging.
+    @staticmethod
+    def _is_cacheable(output_text: str, doc_metadata: dict) -> bool:
+        # failed conversions and text fallbacks (e.g. LibreOffice unavailable) may succeed on a retry
+        return (len(output_text) > 0 or bool(doc_metadata.get("ocr_skipped"))) and "fallback_reason" not in doc_metadata
+
+    def process_stream(self,
+                       stream: DocumentBuffer,
+                       file_name: str = "",
+                       page_callback: Callable[[PageResult], None] | None = None) -> tuple[str, dict]:
+        """Public entry point that wraps _process with timing, logging and the result cache.
 
         Args:
-            stream: Raw document bytes.
+            stream: Raw document bytes, or a memory-mapped spool of them (owned and released by the caller).
             file_name: Optional original filename.
+            page_callback: Optional progress hook, see `_process`.
 
         Returns:
-            (text, metadata): Extracted text and metadata, including elapsed_time.
+            (text, metadata): Extracted text and metadata, including elapsed_time, when the result
+            cache is enabled `cache` ("hit" or "miss") and, when `OCR_SERVICE_STAGE_TIMINGS` is on,
+            `timings` (see `StageTimings.as_dict`).
 
         Behavior:
             Exceptions are logged to stdout and the method returns best-effort output/metadata.
@@ -78,19 +142,89 @@ class Processor:
         output_text = ""
         doc_metadata: dict[str, Any] = {}
         elapsed_time: float = 0.0
+        timings = StageTimings()
 
+        DOCUMENTS_IN_FLIGHT.inc()
         try:
             self.log.info("Processing file name:" + file_name)
             start_time = time.time()
-            output_text, doc_metadata = self._process(stream, file_name=file_name)
+
+            with timings.stage("cache"):
+                cache_key = self.result_cache.key(stream, file_name) if self.result_cache.enabled else None
+                cached_result = self.result_cache.get(cache_key) if cache_key else None
+
+            if cached_result is not None:
+                output_text, doc_metadata = cached_result
+            else:
+                output_text, doc_metadata = self._process(stream, file_name=file_name, page_callback=page_callback,
+                                                          timings=timings)
+                PAGES.labels(doc_metadata.get("content-type") or "unknown",
+                             settings.OPERATION_MODE).inc(doc_metadata.get("pages") or 0)
+                if cache_key and self._is_cacheable(output_text, doc_metadata):
+                    self.result_cache.put(cache_key, output_text, doc_metadata)
+
+            if cache_key:
+                doc_metadata["cache"] = "hit" if cached_result is not None else "miss"
+                CACHE_LOOKUPS.labels(doc_metadata["cache"]).inc()
 
             end_time = time.time()
             elapsed_time = float(round(float(end_time - start_time), 4))
             doc_metadata["elapsed_time"] = elapsed_time
+            if settings.STAGE_TIMINGS:
+                doc_metadata["timings"] = timings.as_dict()
 
             self.log.info("Finished processing file: " + file_name + " | Elapsed time: " + str(elapsed_time)
                           + " seconds")
         except Exception:
+            ERRORS.labels("process").inc()
             traceback.print_exc(file=sys.stdout)
+        finally:
+            DOCUMENTS_IN_FLIGHT.dec()
 
         return output_text, doc_metadata
+
+    def submit_stream(self,
+                      stream: DocumentBuffer,
+                      file_name: str = "",
+                      page_callback: Callable[[PageResult], None] | None = None,
+                      ticket: AdmissionTicket | None = None,
+                      pages: int | None = None) -> Future:
+        """Queue `process_stream` on the worker's document executor, the future resolves to `(text, metadata)`.
+
+        Takes ownership of `stream` and of the admission `ticket`: both are released once processing
+        finishes (or when the document cannot be queued), whether or not anyone still waits for the result
+        (e.g. the client disconnected while the document is still being processed). Callers must not
+        release them themselves. `pages` is the admission estimate of the document, it picks the document's
+        lane without probing the document again on the event loop.
+        """
+        def processed(_: Future | None = None) -> None:
+            release_buffer(stream)
+            if ticket is not None:
+                ticket.release()
+
+        try:
+            future = self.batch_executor.submit(stream, file_name, page_callback=page_callback, pages=pages)
+        except BaseException:
+            processed()
+            raise
+
+        future.add_done_callback(processed)
+        return future
+
+    async def process_stream_async(self,
+                                   stream: DocumentBuffer,
+                                   file_name: str = "",
+                                   page_callback: Callable[[PageResult], None] | None = None,
+                                   ticket: AdmissionTicket | None = None,
+                                   pages: int | None = None) -> tuple[str, dict]:
+        """Run `process_stream` on the worker's document executor without blocking the event loop, see
+        `submit_stream` for the ownership of `stream` and `ticket`."""
+        return await asyncio.wrap_future(self.submit_stream(stream, file_name, page_callback=page_callback,
+                                                            ticket=ticket, pages=pages))
+
+    def close(self) -> None:
+        """Release long-lived per-worker resources (pooled Tesseract handles, PDF render processes)."""
+        self.batch_executor.shutdown()
+        self.job_scheduler.shutdown()
+        self.ocr_engine.close()
+        self.converter.close()
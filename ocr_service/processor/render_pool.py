@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import atexit
+import logging
+import multiprocessing
+import os
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from threading import Lock
+
+import pypdfium2 as pdfium
+
+from ocr_service.processor.lanes import LANE_SMALL, LaneScheduler
+from ocr_service.processor.page_bitmap import PageBitmap, write_page_bitmap
+from ocr_service.settings import settings
+from ocr_service.utils.request_body import DocumentBuffer
+
+# documents kept open by each render process, keyed by path; pdfium documents are not thread-safe,
+# every render process is single threaded so this cache is private to the process
+_OPEN_DOCUMENTS: OrderedDict[str, pdfium.PdfDocument] = OrderedDict()
+_MAX_OPEN_DOCUMENTS = 2
+
+
+def _close_open_documents() -> None:
+    while _OPEN_DOCUMENTS:
+        _, pdf = _OPEN_DOCUMENTS.popitem(last=False)
+        pdf.close()
+
+
+def _init_render_worker() -> None:
+    atexit.register(_close_open_documents)
+
+
+def _open_document(doc_path: str) -> pdfium.PdfDocument:
+    pdf = _OPEN_DOCUMENTS.get(doc_path)
+    if pdf is not None:
+        _OPEN_DOCUMENTS.move_to_end(doc_path)
+        return pdf
+
+    pdf = pdfium.PdfDocument(doc_path)
+    _OPEN_DOCUMENTS[doc_path] = pdf
+    while len(_OPEN_DOCUMENTS) > _MAX_OPEN_DOCUMENTS:
+        _, evicted_pdf = _OPEN_DOCUMENTS.popitem(last=False)
+        evicted_pdf.close()
+    return pdf
+
+
+def render_pdf_pages(doc_path: str,
+                     page_numbers: list[int],
+                     segment_names: list[str],
+                     scale: float,
+                     grayscale: bool) -> list[PageBitmap]:
+    """Render a range of pages of the PDF stored at `doc_path` (runs inside a render process).
+
+    Each page bitmap is written to the shared memory segment of the same index in `segment_names`,
+    only the bitmap descriptors are sent back to the worker.
+    """
+    pdf = _open_document(doc_path)
+    page_bitmaps = []
+
+    for page_num, segment_name in zip(page_numbers, segment_names, strict=True):
+        page = pdf.get_page(page_num)
+        try:
+            bitmap = page.render(
+                scale=scale,
+                may_draw_forms=False,
+                no_smoothtext=True,
+                no_smoothimage=True,
+                no_smoothpath=True,
+                rotation=0,
+                crop=(0, 0, 0, 0),
+                grayscale=grayscale,
+                # RGB byte order, as expected by Tesseract, instead of pdfium's native BGR
+                rev_byteorder=True,
+            )
+            try:
+                page_bitmaps.append(write_page_bitmap(segment_name,
+                                                      memoryview(bitmap.buffer),
+                                                      bitmap.width,
+                                                      bitmap.height,
+                                                      bitmap.stride,
+                                                      bitmap.n_channels))
+            finally:
+                bitmap.close()
+        finally:
+            page.close()
+
+    return page_bitmaps
+
+
+class PdfRenderPool:
+    """Persistent pool of spawned PDF render processes, started once per gunicorn worker.
+
+    Documents are handed over by reference (a temp file under `TMP_FILE_DIR`) instead of being pickled to
+    every process, each process keeps recently used documents open and renders page ranges on demand into
+    shared memory segments named by the caller. A pool broken by a crashed render process is replaced on
+    the next submission.
+    """
+
+    def __init__(self, log: logging.Logger, size: int | None = None) -> None:
+        self.log = log
+        self.size = max(1, int(size if size is not None else settings.CONVERTER_THREAD_NUM))
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = Lock()
+        self.restarts = 0
+        # pages queued or rendering, shared between the lanes (two per process keeps every process busy)
+        self.lanes = LaneScheduler(2 * self.size)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.size,
+                                                     mp_context=multiprocessing.get_context("spawn"),
+                                                     initializer=_init_render_worker)
+                self.log.info("Started PDF render pool with %s process(es)", self.size)
+            return self._executor
+
+    def start(self) -> None:
+        """Spawn the render processes ahead of the first PDF so requests don't pay the start-up cost."""
+        executor = self._get_executor()
+        for _ in range(self.size):
+            executor.submit(os.getpid)
+
+    def restart(self) -> None:
+        """Replace the executor if a render process crashed; no-op when another thread already did."""
+        with self._lock:
+            if self._executor is not None and getattr(self._executor, "_broken", False):
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+                self.restarts += 1
+                self.log.warning("PDF render pool restarted (restarts: %s)", self.restarts)
+
+    def submit(self,
+               doc_path: str,
+               page_numbers: list[int],
+               segment_names: list[str],
+               lane: str = LANE_SMALL) -> Future:
+        """Render `page_numbers` into the `segment_names` shared memory segments, the future yields their
+        `PageBitmap` descriptors. The caller owns the segments and must unlink them (see `unlink_segments`).
+
+        Blocks until the document's `lane` is granted a render slot, held until the render finishes.
+        """
+        args = (doc_path, page_numbers, segment_names,
+                int(settings.OCR_SERVICE_IMAGE_DPI / 72), settings.OCR_CONVERT_GRAYSCALE_IMAGES)
+
+        self.lanes.acquire(lane)
+        try:
+            try:
+                future = self._get_executor().submit(render_pdf_pages, *args)
+            except BrokenProcessPool:
+                self.restart()
+                future = self._get_executor().submit(render_pdf_pages, *args)
+        except BaseException:
+            self.lanes.release(lane)
+            raise
+
+        future.add_done_callback(lambda _: self.lanes.release(lane))
+        return future
+
+    @staticmethod
+    def store_document(stream: DocumentBuffer) -> str:
+        """Write the PDF once to `TMP_FILE_DIR` so render processes can open it by path."""
+        doc_path = os.path.join(settings.TMP_FILE_DIR, f"{uuid.uuid4().hex}_render.pdf")
+        with open(file=doc_path, mode="wb") as tmp_pdf_file:
+            tmp_pdf_file.write(stream)
+        return doc_path
+
+    def stats(self) -> dict[str, int | bool]:
+        return {"size": self.size, "started": self._executor is not None, "restarts": self.restarts}
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
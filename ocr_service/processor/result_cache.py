@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import contextlib
+import copy
+import hashlib
+import logging
+import os
+import uuid
+from collections import OrderedDict
+from threading import Lock
+from typing import Any
+
+import orjson
+
+from ocr_service.settings import settings
+
+# settings that change the text/metadata produced for the same input bytes
+FINGERPRINT_SETTINGS = (
+    "OCR_SERVICE_VERSION",
+    "OPERATION_MODE",
+    "OCR_SERVICE_IMAGE_DPI",
+    "TESSERACT_LANGUAGE",
+    "TESSERACT_CUSTOM_CONFIG_FLAGS",
+    "OCR_CONVERT_GRAYSCALE_IMAGES",
+    "OCR_SERVICE_BLANK_PAGE_INK_RATIO",
+    "OCR_SERVICE_BLANK_PAGE_MIN_STDDEV",
+    "OCR_SERVICE_HYBRID_MIN_PAGE_CHARS",
+    "OCR_SERVICE_HYBRID_MIN_PRINTABLE_RATIO",
+    "OCR_SERVICE_HYBRID_MIN_GLYPH_COVERAGE",
+)
+
+
+def settings_fingerprint() -> bytes:
+    return orjson.dumps({name: getattr(settings, name) for name in FINGERPRINT_SETTINGS}, default=str)
+
+
+class ResultCache:
+    """Content-addressed cache of processing results, keyed by the input bytes and the output-affecting settings.
+
+    The in-memory tier is a per-worker LRU bounded by entry count. The optional disk tier under
+    `RESULT_CACHE_DIR` is shared by all workers and evicts the least recently used files once it grows
+    past `max_disk_bytes`.
+    """
+
+    def __init__(self,
+                 log: logging.Logger,
+                 max_entries: int | None = None,
+                 max_disk_bytes: int | None = None,
+                 disk_dir: str | None = None) -> None:
+        self.log = log
+        self.max_entries = settings.RESULT_CACHE_ENTRIES if max_entries is None else max_entries
+        self.max_disk_bytes = settings.RESULT_CACHE_DISK_BYTES if max_disk_bytes is None else max_disk_bytes
+        self.disk_dir = disk_dir or settings.RESULT_CACHE_DIR
+        self._entries: OrderedDict[str, tuple[str, dict[str, Any]]] = OrderedDict()
+        self._lock = Lock()
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+
+        if self.max_disk_bytes > 0:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 or self.max_disk_bytes > 0
+
+    def key(self, stream: bytes, file_name: str = "") -> str:
+        # the extension is part of the key, it drives type detection for ambiguous content
+        digest = hashlib.sha256(settings_fingerprint())
+        digest.update(os.path.splitext(file_name)[1].lower().encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(stream)
+        return digest.hexdigest()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _remember(self, key: str, entry: tuple[str, dict[str, Any]]) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _read_disk(self, key: str) -> tuple[str, dict[str, Any]] | None:
+        if self.max_disk_bytes <= 0:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "rb") as cache_file:
+                record = orjson.loads(cache_file.read())
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            self.log.warning("Discarding unreadable result cache file %s", path)
+            with contextlib.suppress(OSError):
+                os.remove(path)
+            return None
+        return record["text"], record["metadata"]
+
+    def _write_disk(self, key: str, entry: tuple[str, dict[str, Any]]) -> None:
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, "wb") as cache_file:
+                cache_file.write(orjson.dumps({"text": entry[0], "metadata": entry[1]}))
+            os.replace(tmp_path, path)
+        except Exception:
+            self.log.exception("Failed to write result cache file %s", path)
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+            return
+        self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        cached_files = []
+        with os.scandir(self.disk_dir) as dir_entries:
+            for dir_entry in dir_entries:
+                if not dir_entry.name.endswith(".json"):
+                    continue
+                with contextlib.suppress(FileNotFoundError):
+                    stat = dir_entry.stat()
+                    cached_files.append((stat.st_mtime, stat.st_size, dir_entry.path))
+
+        total_bytes = sum(size for _, size, _ in cached_files)
+        for _, size, path in sorted(cached_files):
+            if total_bytes <= self.max_disk_bytes:
+                break
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+            total_bytes -= size
+
+    def get(self, key: str) -> tuple[str, dict[str, Any]] | None:
+        """Return a copy of the cached `(text, metadata)` for `key`, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+
+        if entry is None:
+            entry = self._read_disk(key)
+            with self._lock:
+                if entry is None:
+                    self._misses += 1
+                    return None
+                self._hits += 1
+                self._disk_hits += 1
+            self._remember(key, entry)
+
+        return entry[0], copy.deepcopy(entry[1])
+
+    def put(self, key: str, text: str, metadata: dict[str, Any]) -> None:
+        entry = (text, copy.deepcopy(metadata))
+        self._remember(key, entry)
+        if self.max_disk_bytes > 0:
+            self._write_disk(key, entry)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+            }
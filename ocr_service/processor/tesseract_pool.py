@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import contextlib
+import logging
+from collections.abc import Iterator
+from queue import Empty, LifoQueue
+from threading import Lock
+
+from tesserocr import PyTessBaseAPI
+
+from ocr_service.settings import settings
+
+
+class TesseractApiPool:
+    """Bounded, long-lived pool of initialised Tesseract handles shared by the OCR threads of a worker.
+
+    Loading traineddata is the most expensive part of building a `PyTessBaseAPI`, so handles are created
+    lazily (up to `size`), checked out per page, reset with `Clear()` when returned and rebuilt if they fail.
+    """
+
+    def __init__(self, log: logging.Logger, size: int | None = None) -> None:
+        self.log = log
+        self.size = max(1, int(size if size is not None else settings.CPU_THREADS))
+        # LIFO keeps recently used (cache-warm) handles in rotation
+        self._idle: LifoQueue[PyTessBaseAPI] = LifoQueue(maxsize=self.size)
+        self._lock = Lock()
+        self._created = 0
+        self._in_use = 0
+        self._checkouts = 0
+        self._rebuilt = 0
+        self._failures = 0
+        self._closed = False
+
+    def _create_api(self) -> PyTessBaseAPI:
+        tesseract_api = PyTessBaseAPI(path=settings.TESSDATA_PREFIX, lang=settings.TESSERACT_LANGUAGE)  # type: ignore
+        self.log.debug("Initialised pytesseract api worker for language:" + str(settings.TESSERACT_LANGUAGE))
+        return tesseract_api
+
+    def _reserve_slot(self) -> bool:
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                return True
+        return False
+
+    def _release_slot(self) -> None:
+        with self._lock:
+            self._created -= 1
+
+    def _checkout(self, timeout: float | None) -> PyTessBaseAPI:
+        if self._closed:
+            raise RuntimeError("Tesseract api pool is closed")
+
+        try:
+            return self._idle.get_nowait()
+        except Empty:
+            pass
+
+        if self._reserve_slot():
+            try:
+                return self._create_api()
+            except Exception:
+                self._release_slot()
+                raise
+
+        try:
+            return self._idle.get(timeout=timeout)
+        except Empty as exc:
+            raise TimeoutError(f"No Tesseract api handle became available within {timeout} seconds") from exc
+
+    def _checkin(self, tesseract_api: PyTessBaseAPI, healthy: bool) -> None:
+        if healthy and not self._closed:
+            try:
+                tesseract_api.Clear()
+                self._idle.put_nowait(tesseract_api)
+                return
+            except Exception:
+                self.log.exception("Failed to reset Tesseract api handle; rebuilding it")
+
+        with contextlib.suppress(Exception):
+            tesseract_api.End()
+
+        if self._closed:
+            self._release_slot()
+            return
+
+        with self._lock:
+            self._failures += 1
+
+        try:
+            replacement = self._create_api()
+        except Exception:
+            # free the slot so the next checkout retries the initialisation
+            self.log.exception("Failed to rebuild Tesseract api handle")
+            self._release_slot()
+            return
+
+        with self._lock:
+            self._rebuilt += 1
+        self._idle.put_nowait(replacement)
+
+    @contextlib.contextmanager
+    def acquire(self, timeout: float | None = None) -> Iterator[PyTessBaseAPI]:
+        """Check out a handle for the duration of the block; handles that raise are rebuilt."""
+        tesseract_api = self._checkout(timeout)
+        with self._lock:
+            self._in_use += 1
+            self._checkouts += 1
+
+        healthy = False
+        try:
+            yield tesseract_api
+            healthy = True
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._checkin(tesseract_api, healthy)
+
+    def stats(self) -> dict[str, int | bool]:
+        with self._lock:
+            return {
+                "size": self.size,
+                "created": self._created,
+                "idle": self._idle.qsize(),
+                "in_use": self._in_use,
+                "checkouts": self._checkouts,
+                "rebuilt": self._rebuilt,
+                "failures": self._failures,
+                "closed": self._closed,
+            }
+
+    def close(self) -> None:
+        self._closed = True
+        while True:
+            try:
+                tesseract_api = self._idle.get_nowait()
+            except Empty:
+                break
+            with contextlib.suppress(Exception):
+                tesseract_api.End()
+            self._release_slot()
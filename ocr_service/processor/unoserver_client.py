@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import http.client
+from threading import Lock
+from typing import Any, cast
+from xmlrpc.client import Binary, Fault, ProtocolError, ServerProxy, Transport
+
+# XML-RPC API version spoken by unoserver 3.x
+UNOSERVER_API_VERSION = "3"
+
+
+class _TimeoutTransport(Transport):
+    """XML-RPC transport applying a socket timeout to every call made over its (reused) connection."""
+
+    def __init__(self, timeout: float) -> None:
+        super().__init__()
+        self.timeout = timeout
+
+    def make_connection(self, host: Any) -> http.client.HTTPConnection:
+        connection = super().make_connection(host)
+        connection.timeout = self.timeout
+        return connection
+
+
+class UnoserverClient:
+    """In-process XML-RPC client for a single unoserver instance.
+
+    The proxy (and its HTTP connection) is kept between conversions; documents are sent as bytes and the
+    converted document comes back in the response, so no temp files or client subprocess are involved.
+    A connection that fails is dropped and reopened once; a conversion that exceeds `timeout` raises
+    `TimeoutError` and leaves the instance to be restarted by the caller.
+    """
+
+    def __init__(self, host: str, port: str | int, timeout: float) -> None:
+        self.url = f"http://{host}:{port}"
+        self.timeout = timeout
+        self._proxy: ServerProxy | None = None
+        self._lock = Lock()
+        self.import_filters: set[str] = set()
+
+    def _connect(self) -> ServerProxy:
+        if self._proxy is None:
+            proxy = ServerProxy(self.url, transport=_TimeoutTransport(self.timeout), allow_none=True)
+            # XML-RPC results are untyped, unoserver's info() is a struct
+            info = cast(dict[str, Any], proxy.info())
+            if info.get("api") != UNOSERVER_API_VERSION:
+                proxy("close")()
+                raise RuntimeError(f"unoserver at {self.url} speaks API {info.get('api')}, "
+                                   f"expected {UNOSERVER_API_VERSION}")
+            self.import_filters = set(info.get("import_filters", []))
+            self._proxy = proxy
+        return self._proxy
+
+    def _disconnect(self) -> None:
+        if self._proxy is not None:
+            proxy, self._proxy = self._proxy, None
+            proxy("close")()
+
+    def _convert(self, stream: bytes, convert_to: str, input_filter: str | None) -> bytes:
+        proxy = self._connect()
+        if input_filter and input_filter not in self.import_filters:
+            input_filter = None
+        # positional arguments: inpath, indata, outpath, convert_to, filtername, filter_options,
+        # update_index, infiltername
+        result = cast(Binary | None,
+                      proxy.convert(None, Binary(stream), None, convert_to, None, [], True, input_filter))
+        return result.data if result is not None else b""
+
+    def convert(self, stream: bytes, convert_to: str = "pdf", input_filter: str | None = None) -> bytes:
+        """Convert a document held in memory, returning the converted document bytes.
+
+        Raises:
+            TimeoutError: unoserver did not answer within `timeout` seconds.
+            xmlrpc.client.Fault: unoserver (LibreOffice) failed to convert the document.
+        """
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    return self._convert(stream, convert_to, input_filter)
+                except Fault:
+                    raise
+                except TimeoutError:
+                    self._disconnect()
+                    raise
+                except (OSError, ProtocolError, http.client.HTTPException):
+                    # stale keep-alive connection or restarted unoserver, reconnect once
+                    self._disconnect()
+                    if attempt:
+                        raise
+        return b""
+
+    def close(self) -> None:
+        with self._lock:
+            self._disconnect()
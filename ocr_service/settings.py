@@ -3,11 +3,10 @@
 import ast
 from enum import Enum
 import logging
-import multiprocessing
 import os
 from pathlib import Path
 from sys import platform
-from typing import Any, Literal
+from typing import Annotated, Any, Literal
 
 from pydantic import AliasChoices, Field, computed_field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -25,7 +24,7 @@ class Settings(BaseSettings):
     OCR_SERVICE_DEBUG_MODE: bool = Field(False)
     OCR_TMP_DIR: str | None = None
 
-    OCR_SERVICE_OPERATION_MODE: Literal["OCR", "NO_OCR"] = Field("OCR")
+    OCR_SERVICE_OPERATION_MODE: Literal["OCR", "NO_OCR", "HYBRID"] = Field("OCR")
     OCR_SERVICE_PORT: int = Field(8090, ge=1, le=65535)
 
     OCR_TESSDATA_PREFIX: str = Field("/opt/homebrew/share/tessdata", min_length=1)
@@ -37,12 +36,44 @@ class Settings(BaseSettings):
     OCR_WEB_SERVICE_THREADS: int = Field(1, ge=1)
     OCR_WEB_SERVICE_WORKERS: int = Field(1, ge=1)
 
-    OCR_SERVICE_CPU_THREADS: int = Field(1, ge=1)
-    OCR_SERVICE_CONVERTER_THREADS: int = Field(1, ge=1)
+    # a count, or "auto" to size from the CPUs of the container (cgroup quota and cpuset)
+    OCR_SERVICE_CPU_THREADS: Annotated[int, Field(ge=1)] | Literal["auto"] = Field(1)
+    OCR_SERVICE_CONVERTER_THREADS: Annotated[int, Field(ge=1)] | Literal["auto"] = Field(1)
     OCR_SERVICE_IMAGE_DPI: int = Field(200, gt=0)
+    OCR_SERVICE_PAGE_QUEUE_SIZE: int = Field(0, ge=0)
+    OCR_SERVICE_BLANK_PAGE_INK_RATIO: float = Field(0.00005, ge=0.0, le=1.0)
+    OCR_SERVICE_BLANK_PAGE_MIN_STDDEV: float = Field(2.0, ge=0.0)
+
+    OCR_SERVICE_HYBRID_MIN_PAGE_CHARS: int = Field(20, ge=0)
+    OCR_SERVICE_HYBRID_MIN_PRINTABLE_RATIO: float = Field(0.9, ge=0.0, le=1.0)
+    OCR_SERVICE_HYBRID_MIN_GLYPH_COVERAGE: float = Field(0.5, ge=0.0, le=1.0)
     OCR_CONVERT_GRAYSCALE_IMAGES: bool = Field(True)
 
+    OCR_SERVICE_BULK_CONCURRENCY: int = Field(0, ge=0)
+    OCR_SERVICE_BULK_FILE_TIMEOUT: int = Field(0, ge=0)
+
+    OCR_SERVICE_JOB_CONCURRENCY: int = Field(1, ge=1)
+    OCR_SERVICE_JOB_QUEUE_SIZE: int = Field(32, ge=1)
+    OCR_SERVICE_JOB_RETENTION: int = Field(3600, gt=0)
+
+    OCR_SERVICE_RESULT_CACHE_ENTRIES: int = Field(128, ge=0)
+    OCR_SERVICE_RESULT_CACHE_DISK_MB: int = Field(0, ge=0)
+
+    OCR_SERVICE_REQUEST_SPOOL_MB: int = Field(8, ge=0)
+
+    OCR_SERVICE_ADMISSION_PAGE_BUDGET: int = Field(0, ge=0)
+    OCR_SERVICE_ADMISSION_MAX_RETRY_AFTER: int = Field(60, ge=1)
+
+    OCR_SERVICE_LANE_LARGE_PAGES: int = Field(20, ge=1)
+    OCR_SERVICE_LANE_SMALL_WEIGHT: int = Field(3, ge=1)
+    OCR_SERVICE_LANE_LARGE_WEIGHT: int = Field(1, ge=1)
+    OCR_SERVICE_LANE_SMALL_RESERVED: int = Field(1, ge=0)
+
+    OCR_SERVICE_STAGE_TIMINGS: bool = Field(False)
+
     OCR_SERVICE_LIBRE_OFFICE_PROCESS_TIMEOUT: int = Field(100, gt=0)
+    OCR_SERVICE_LIBRE_OFFICE_INSTANCES: int = Field(1, ge=1)
+    OCR_SERVICE_LIBRE_OFFICE_CHECKOUT_TIMEOUT: int = Field(0, ge=0)
     OCR_SERVICE_LIBRE_OFFICE_LISTENER_PORT_RANGE: str | None = None
     DEFAULT_LIBRE_OFFICE_SERVER_PORT: int = Field(9900, ge=1, le=65535)
     LIBRE_OFFICE_NETWORK_INTERFACE: str = Field("localhost", min_length=1)
@@ -62,6 +93,11 @@ class Settings(BaseSettings):
     def normalize_operation_mode(cls, value: str) -> str:
         return str(value).upper()
 
+    @field_validator("OCR_SERVICE_CPU_THREADS", "OCR_SERVICE_CONVERTER_THREADS", mode="before")
+    @classmethod
+    def normalize_thread_count(cls, value: Any) -> Any:
+        return value.strip().lower() if isinstance(value, str) else value
+
     @field_validator("OCR_WEB_SERVICE_THREADS")
     @classmethod
     def clamp_threads(cls, value: int) -> int:
@@ -161,7 +197,7 @@ class Settings(BaseSettings):
     @computed_field  # type: ignore[prop-decorator]
     @property
     def OPERATION_MODE(self) -> str:
-        # possible vals : "OCR", "NO_OCR"
+        # possible vals : "OCR", "NO_OCR", "HYBRID"
         return self.OCR_SERVICE_OPERATION_MODE
 
     @computed_field  # type: ignore[prop-decorator]
@@ -189,25 +225,167 @@ class Settings(BaseSettings):
     def TESSERACT_CUSTOM_CONFIG_FLAGS(self) -> str:
         return self.OCR_SERVICE_TESSERACT_CUSTOM_CONFIG_FLAGS
 
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def AVAILABLE_CPUS(self) -> int:
+        # imported here, ocr_service.utils imports these settings
+        from ocr_service.utils.cpu import cpu_limits
+
+        # CPUs of the container: the host's, capped by its cpuset and CFS quota
+        return cpu_limits().available
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def WORKER_CPUS(self) -> int:
+        # share of the available CPUs of each gunicorn worker
+        return max(1, self.AVAILABLE_CPUS // self.OCR_WEB_SERVICE_WORKERS)
+
     @computed_field  # type: ignore[prop-decorator]
     @property
     def CPU_THREADS(self) -> int:
-        if self.OCR_SERVICE_CPU_THREADS is not None:
-            return int(self.OCR_SERVICE_CPU_THREADS)
-        return int(multiprocessing.cpu_count() / self.OCR_WEB_SERVICE_WORKERS)
+        # "auto": one OCR thread per CPU of the worker
+        if self.OCR_SERVICE_CPU_THREADS == "auto":
+            return self.WORKER_CPUS
+        return int(self.OCR_SERVICE_CPU_THREADS)
 
     @computed_field  # type: ignore[prop-decorator]
     @property
     def CONVERTER_THREAD_NUM(self) -> int:
-        if self.OCR_SERVICE_CONVERTER_THREADS is not None:
-            return int(self.OCR_SERVICE_CONVERTER_THREADS)
-        return int(multiprocessing.cpu_count() / self.OCR_WEB_SERVICE_WORKERS)
+        # "auto": the CPUs of the worker left over by its LibreOffice instances, at least one
+        if self.OCR_SERVICE_CONVERTER_THREADS == "auto":
+            return max(1, self.WORKER_CPUS - self.LIBRE_OFFICE_INSTANCES_PER_WORKER)
+        return int(self.OCR_SERVICE_CONVERTER_THREADS)
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def PAGE_QUEUE_SIZE(self) -> int:
+        # rendered pages allowed to wait for OCR, 0 means twice the OCR threads
+        if self.OCR_SERVICE_PAGE_QUEUE_SIZE > 0:
+            return int(self.OCR_SERVICE_PAGE_QUEUE_SIZE)
+        return 2 * self.CPU_THREADS
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def BULK_CONCURRENCY(self) -> int:
+        # documents processed at once per worker by bulk requests, 0 means one per OCR thread
+        if self.OCR_SERVICE_BULK_CONCURRENCY > 0:
+            return int(self.OCR_SERVICE_BULK_CONCURRENCY)
+        return self.CPU_THREADS
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def BULK_FILE_TIMEOUT(self) -> int:
+        # per document deadline of bulk requests, 0 means the conversion plus the OCR timeout
+        if self.OCR_SERVICE_BULK_FILE_TIMEOUT > 0:
+            return int(self.OCR_SERVICE_BULK_FILE_TIMEOUT)
+        return self.LIBRE_OFFICE_PROCESS_TIMEOUT + self.TESSERACT_TIMEOUT
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def JOB_CONCURRENCY(self) -> int:
+        return self.OCR_SERVICE_JOB_CONCURRENCY
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def JOB_QUEUE_SIZE(self) -> int:
+        return self.OCR_SERVICE_JOB_QUEUE_SIZE
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def JOB_RETENTION(self) -> int:
+        # seconds finished jobs and their results are kept
+        return self.OCR_SERVICE_JOB_RETENTION
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def JOBS_DIR(self) -> str:
+        return os.path.join(self.TMP_FILE_DIR, "jobs")
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def RESULT_CACHE_ENTRIES(self) -> int:
+        return self.OCR_SERVICE_RESULT_CACHE_ENTRIES
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def RESULT_CACHE_DISK_BYTES(self) -> int:
+        return self.OCR_SERVICE_RESULT_CACHE_DISK_MB * 1024 * 1024
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def RESULT_CACHE_DIR(self) -> str:
+        return os.path.join(self.TMP_FILE_DIR, "result_cache")
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def METRICS_DIR(self) -> str:
+        # Prometheus multiprocess metric files shared by the gunicorn workers, used unless
+        # PROMETHEUS_MULTIPROC_DIR is set
+        return os.path.join(self.TMP_FILE_DIR, "prometheus")
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def REQUEST_SPOOL_THRESHOLD(self) -> int:
+        # request bodies (and decoded base64 payloads) above this many bytes are spooled to mapped temp files
+        return self.OCR_SERVICE_REQUEST_SPOOL_MB * 1024 * 1024
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def ADMISSION_PAGE_BUDGET(self) -> int:
+        # estimated pages a worker accepts in flight before answering 429, 0 disables admission control
+        return self.OCR_SERVICE_ADMISSION_PAGE_BUDGET
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def ADMISSION_MAX_RETRY_AFTER(self) -> int:
+        return self.OCR_SERVICE_ADMISSION_MAX_RETRY_AFTER
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def LANE_LARGE_PAGES(self) -> int:
+        # documents above this many pages (at 200 DPI, scaled by the square of the DPI) run in the large lane
+        return self.OCR_SERVICE_LANE_LARGE_PAGES
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def LANE_SMALL_WEIGHT(self) -> int:
+        return self.OCR_SERVICE_LANE_SMALL_WEIGHT
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def LANE_LARGE_WEIGHT(self) -> int:
+        return self.OCR_SERVICE_LANE_LARGE_WEIGHT
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def LANE_SMALL_RESERVED(self) -> int:
+        # slots of each shared pool that large documents never take
+        return self.OCR_SERVICE_LANE_SMALL_RESERVED
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def STAGE_TIMINGS(self) -> bool:
+        # report per-stage wall/CPU times, queue wait and worker in metadata.timings
+        return self.OCR_SERVICE_STAGE_TIMINGS
 
     @computed_field  # type: ignore[prop-decorator]
     @property
     def LIBRE_OFFICE_PROCESS_TIMEOUT(self) -> int:
         return self.OCR_SERVICE_LIBRE_OFFICE_PROCESS_TIMEOUT
 
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def LIBRE_OFFICE_INSTANCES_PER_WORKER(self) -> int:
+        return self.OCR_SERVICE_LIBRE_OFFICE_INSTANCES
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def LIBRE_OFFICE_CHECKOUT_TIMEOUT(self) -> int:
+        # seconds a document waits for a free LibreOffice instance, 0 means the conversion timeout
+        if self.OCR_SERVICE_LIBRE_OFFICE_CHECKOUT_TIMEOUT > 0:
+            return int(self.OCR_SERVICE_LIBRE_OFFICE_CHECKOUT_TIMEOUT)
+        return self.LIBRE_OFFICE_PROCESS_TIMEOUT
+
     @computed_field  # type: ignore[prop-decorator]
     @property
     def LIBRE_OFFICE_PORT_CAP(self) -> int:
@@ -216,7 +394,10 @@ class Settings(BaseSettings):
             port_cap = self.DEFAULT_LIBRE_OFFICE_SERVER_PORT + self.OCR_WEB_SERVICE_THREADS
         if self.OCR_WEB_SERVICE_WORKERS > 1:
             port_cap = self.DEFAULT_LIBRE_OFFICE_SERVER_PORT + self.OCR_WEB_SERVICE_WORKERS
-        return port_cap
+        # each worker owns LIBRE_OFFICE_INSTANCES_PER_WORKER consecutive ports
+        return self.DEFAULT_LIBRE_OFFICE_SERVER_PORT + (
+            (port_cap - self.DEFAULT_LIBRE_OFFICE_SERVER_PORT) * self.LIBRE_OFFICE_INSTANCES_PER_WORKER
+        )
 
     @computed_field  # type: ignore[prop-decorator]
     @property
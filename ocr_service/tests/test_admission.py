@@ -0,0 +1,129 @@
+import unittest
+from unittest.mock import Mock, patch
+
+import pypdfium2 as pdfium
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from ocr_service.api.process import process_api
+from ocr_service.processor.admission import BYTES_PER_PAGE, AdmissionController, AdmissionRejectedError
+from ocr_service.processor.batch import BatchExecutor
+from ocr_service.tests.utils_helpers import get_file
+
+
+class DummyProcessor:
+    def __init__(self, page_budget: int) -> None:
+        self.processed: list[str] = []
+        self.batch_executor = BatchExecutor(Mock(), self.process_stream, concurrency=1)
+        self.admission = AdmissionController(Mock(), page_budget=page_budget)
+
+    def process_stream(self, stream, file_name: str = "") -> tuple[str, dict]:
+        self.processed.append(file_name)
+        return "text", {"pages": 1}
+
+    async def process_stream_async(self, stream, file_name: str = "", page_callback=None, ticket=None, pages=None):
+        try:
+            return self.process_stream(stream, file_name)
+        finally:
+            ticket.release()
+
+
+class TestAdmissionController(unittest.TestCase):
+    def test_cost_is_estimated_from_cheap_probes(self):
+        controller = AdmissionController(Mock(), page_budget=10)
+
+        pdf = pdfium.PdfDocument(get_file("docs/pdf/ex1.pdf"))
+        self.addCleanup(pdf.close)
+
+        self.assertEqual(controller.estimate_cost(get_file("docs/pdf/ex1.pdf")), len(pdf))
+        self.assertEqual(controller.estimate_cost(get_file("docs/generic/pat_id_1.png")), 1)
+        self.assertEqual(controller.estimate_cost(b"plain text " * (BYTES_PER_PAGE // 4)), 3)
+        self.assertEqual(controller.estimate_cost(b"%PDF-1.7 truncated"), 1)
+
+    def test_busy_worker_rejects_work_past_its_page_budget(self):
+        controller = AdmissionController(Mock(), page_budget=4)
+        with patch.object(controller, "estimate_cost", side_effect=lambda stream: len(stream)):
+            first = controller.admit([b"xxx"])
+            second = controller.admit([b"x"])
+
+            with self.assertRaises(AdmissionRejectedError) as rejected:
+                controller.admit([b"xx"])
+            self.assertGreaterEqual(rejected.exception.retry_after, 1)
+
+            first.release()
+            first.release()
+            controller.admit([b"xx"]).release()
+            second.release()
+            # an idle worker takes any request, however large
+            controller.admit([b"x" * 10]).release()
+
+        self.assertEqual(controller.stats()["pages_in_flight"], 0)
+        self.assertEqual((controller.stats()["admitted"], controller.stats()["rejected"]), (4, 1))
+
+    def test_retry_after_follows_measured_throughput(self):
+        controller = AdmissionController(Mock(), page_budget=10)
+        controller._completed.extend([(0.0, 5), (1.0, 5), (2.0, 5)])
+
+        self.assertEqual(controller.pages_per_second(), 5.0)
+        with patch.object(controller, "estimate_cost", return_value=10):
+            controller.admit([b"x"])
+            with self.assertRaises(AdmissionRejectedError) as rejected:
+                controller.admit([b"x"] * 4)
+
+        # 40 pages past the budget at 5 pages per second
+        self.assertEqual(rejected.exception.retry_after, 8)
+
+    def test_split_ticket_returns_the_pages_of_each_document(self):
+        controller = AdmissionController(Mock(), page_budget=10)
+        ticket = controller.admit([b"x" * (2 * BYTES_PER_PAGE), b"", b"one page"])
+
+        first, empty, last = ticket.split()
+        ticket.release()
+        self.assertEqual(controller.stats()["pages_in_flight"], 3)
+
+        first.release()
+        empty.release()
+        self.assertEqual(controller.stats()["pages_in_flight"], 1)
+        last.release()
+        self.assertEqual(controller.stats()["pages_in_flight"], 0)
+
+    def test_zero_budget_disables_admission_control(self):
+        controller = AdmissionController(Mock(), page_budget=0)
+
+        for _ in range(3):
+            ticket = controller.admit([get_file("docs/generic/pat_id_1.png"), b""])
+
+        self.assertEqual(controller.stats()["pages_in_flight"], 0)
+        # the estimates are still carried for the scheduling lanes
+        self.assertEqual(ticket.costs, [1, 0])
+
+
+class TestAdmissionApi(unittest.TestCase):
+    def setUp(self) -> None:
+        self.app = FastAPI()
+        self.app.include_router(process_api)
+        self.app.state.processor = DummyProcessor(page_budget=2)
+        self.client = TestClient(self.app)
+
+    def tearDown(self) -> None:
+        self.client.close()
+        self.app.state.processor.batch_executor.shutdown()
+
+    def test_saturated_worker_answers_429_with_retry_after(self):
+        in_flight = self.app.state.processor.admission.admit([b"a document being processed"])
+
+        response = self.client.post("/api/process", content=b"x" * (2 * BYTES_PER_PAGE))
+
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response.headers["Retry-After"]), 1)
+        self.assertEqual(self.app.state.processor.processed, [])
+
+        in_flight.release()
+        response = self.client.post("/api/process", content=b"x" * (2 * BYTES_PER_PAGE))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.app.state.processor.admission.stats()["pages_in_flight"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
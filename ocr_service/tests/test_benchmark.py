@@ -0,0 +1,209 @@
+import contextlib
+import io
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from typing import Any
+from unittest.mock import Mock, patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from ocr_service.api.health import health_api
+from ocr_service.api.process import process_api
+from ocr_service.benchmark import BenchmarkRunner, format_report, read_report, select_documents, write_report
+from ocr_service.benchmark.calibrate import (
+    ENV_TEMPLATE_PATH,
+    Candidate,
+    calibrate_capacity,
+    candidate_grid,
+    render_env_file,
+)
+from ocr_service.benchmark.cli import main
+from ocr_service.benchmark.load import (
+    LoadGenerator,
+    build_requests,
+    scrape_metrics,
+    server_metrics,
+    summarise_load,
+)
+from ocr_service.benchmark.perf_check import calibrate, compare, format_comparisons
+from ocr_service.benchmark.runner import percentile
+from ocr_service.processor.processor import Processor
+from ocr_service.settings import settings
+
+
+class TestBenchmark(unittest.TestCase):
+    def setUp(self) -> None:
+        for name, value in (("OCR_SERVICE_STAGE_TIMINGS", True), ("OCR_SERVICE_RESULT_CACHE_ENTRIES", 0)):
+            self.addCleanup(setattr, settings, name, getattr(settings, name))
+            setattr(settings, name, value)
+
+        def prepare(ctx):
+            ctx.output_text = "text of " + ctx.file_name
+            ctx.metadata["pages"] = 2
+
+        self.processor = Processor()
+        self.addCleanup(self.processor.close)
+        self.processor.converter = Mock()
+        self.processor.converter.prepare.side_effect = prepare
+        self.processor.converter.resolve_content_type.return_value = "text/plain"
+        self.processor.converter.finalize_output_text.side_effect = lambda output_text: output_text
+        self.processor.ocr_engine = Mock()
+
+        app = FastAPI()
+        app.include_router(process_api)
+        app.include_router(health_api)
+        app.state.processor = self.processor
+        self.client = TestClient(app)
+        self.addCleanup(self.client.close)
+
+    def test_percentiles_are_interpolated(self):
+        self.assertEqual(percentile([3.0, 1.0, 2.0], 50), 2.0)
+        self.assertAlmostEqual(percentile([1.0, 2.0], 95), 1.95)
+        self.assertEqual(percentile([], 99), 0.0)
+
+    def test_scenarios_are_run_directly_and_over_http(self):
+        runner = BenchmarkRunner(self.processor, self.client, iterations=2, warmup=0)
+        report = runner.run(select_documents(["html", "rtf"]), modes=["NO_OCR"], paths=["direct", "http"])
+
+        self.assertEqual(set(report["scenarios"]), {"html/NO_OCR/direct", "rtf/NO_OCR/direct",
+                                                    "html/NO_OCR/http", "rtf/NO_OCR/http"})
+        for scenario in report["scenarios"].values():
+            self.assertEqual((scenario["runs"], scenario["errors"], scenario["pages"]), (2, 0, 2))
+            self.assertGreater(scenario["pages_per_sec"], scenario["docs_per_sec"])
+            self.assertLessEqual(scenario["latency"]["p50"], scenario["latency"]["p99"])
+            self.assertTrue({"cache", "sniff", "finalise"}.issubset(scenario["stages"]))
+            self.assertGreater(scenario["peak_rss_mb"], 0)
+        self.assertIn("html/NO_OCR/http", format_report(report))
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            report_path = Path(tmp_dir) / "benchmark.json"
+            write_report(report, report_path)
+            self.assertEqual(read_report(report_path), json.loads(report_path.read_text()))
+
+    def test_synthetic_corpus_is_replayed_at_fixed_concurrency(self):
+        requests = build_requests(20, seed=7, document_weights={"html": 1, "rtf": 1})
+
+        self.assertEqual(requests, build_requests(20, seed=7, document_weights={"html": 1, "rtf": 1}))
+        self.assertEqual({request.kind for request in requests}, {"record", "array", "multipart"})
+        record = json.loads(next(request.content for request in requests if request.kind == "record"))
+        self.assertIn(record["footer"]["file_name"], ("pat_id_1.html", "pat_id_1.rtf"))
+
+        metrics_before = scrape_metrics(self.client)
+        generator = LoadGenerator(self.client, requests, concurrency=3, max_requests=12)
+        wall_time = generator.run(duration=60)
+        summary = summarise_load(generator.results, wall_time)
+        server = server_metrics(metrics_before, scrape_metrics(self.client))
+
+        documents = sum(len(request.documents) for request in requests[:12])
+        self.assertEqual(summary["requests"], 12)
+        self.assertEqual(summary["statuses"], {"200": 12})
+        self.assertEqual(summary["latency_histogram"]["le_inf"], 12)
+        self.assertAlmostEqual(summary["pages_per_sec"], 2 * summary["docs_per_sec"], places=2)
+        self.assertEqual(server["stages"]["detection"]["count"], documents)
+
+    def test_open_loop_reports_rejections(self):
+        def sender(client, request):
+            return 503, 0
+
+        generator = LoadGenerator(Mock(), build_requests(5), rate=200.0, max_requests=10, sender=sender)
+        summary = summarise_load(generator.results, generator.run(duration=60))
+
+        self.assertEqual(summary["requests"], 10)
+        self.assertEqual((summary["rate_503"], summary["error_rate"]), (1.0, 0.0))
+
+    def test_unknown_documents_are_rejected(self):
+        with self.assertRaises(ValueError):
+            select_documents(["xlsx"])
+
+
+class TestPerfCheck(unittest.TestCase):
+    BASELINE: dict[str, Any] = {
+        "calibration_seconds": 0.05,
+        "scenarios": {"pdf/OCR/direct": {"latency_p50": 10.0, "latency_p95": 12.0, "peak_rss_mb": 400.0,
+                                         "errors": 0}},
+        "tolerances": {"latency_p95": {"relative": 1.0}},
+    }
+
+    def current(self, **metrics: float) -> dict[str, Any]:
+        return {"scenarios": {"pdf/OCR/direct": {**self.BASELINE["scenarios"]["pdf/OCR/direct"], **metrics}}}
+
+    def test_metrics_beyond_their_tolerance_regress(self):
+        statuses = {comparison.metric: comparison.status
+                    for comparison in compare(self.current(latency_p50=13.5, latency_p95=20.0, errors=1),
+                                              self.BASELINE)}
+
+        # 10 * 1.25 + 0.5 for p50, 12 * 2 from the overridden tolerance for p95
+        self.assertEqual(statuses, {"latency_p50": "REGRESSION", "latency_p95": "ok", "peak_rss_mb": "ok",
+                                    "errors": "REGRESSION"})
+
+    def test_scenarios_missing_from_the_run_regress(self):
+        comparisons = compare({"scenarios": {"png/OCR/direct": {"latency_p50": 1.0}}}, self.BASELINE)
+
+        self.assertTrue(all(comparison.is_regression for comparison in comparisons
+                            if comparison.scenario == "pdf/OCR/direct"))
+        self.assertEqual({comparison.status for comparison in comparisons
+                          if comparison.scenario == "png/OCR/direct"}, {"NO BASELINE"})
+        self.assertIn("NO BASELINE", format_comparisons(comparisons))
+
+    def test_check_exits_non_zero_on_regressions(self):
+        self.assertGreater(calibrate(rounds=1), 0)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            baseline_path = Path(tmp_dir) / "baseline.json"
+            write_report(self.BASELINE, baseline_path)
+            service = contextlib.nullcontext((Mock(), Mock()))
+
+            for current, exit_code in ((self.current(), 0), (self.current(latency_p50=20.0), 1)):
+                with patch("ocr_service.benchmark.cli.in_process_service", return_value=service), \
+                        patch("ocr_service.benchmark.cli.run_perf_scenarios", return_value=current), \
+                        contextlib.redirect_stdout(io.StringIO()) as stdout, \
+                        contextlib.redirect_stderr(io.StringIO()):
+                    self.assertEqual(main(["check", "--baseline", str(baseline_path)]), exit_code)
+                self.assertIn("pdf/OCR/direct", stdout.getvalue())
+
+
+class TestCalibrate(unittest.TestCase):
+    def test_combinations_fit_the_cores(self):
+        grid = candidate_grid(4)
+
+        self.assertIn(Candidate(1, 4, 4), grid)
+        self.assertIn(Candidate(4, 1, 1), grid)
+        self.assertNotIn(Candidate(2, 4, 1), grid)
+        self.assertTrue(all(candidate.cores <= 4 for candidate in grid))
+        self.assertEqual(candidate_grid(4, workers=[2], cpu_threads=[2], converter_threads=[1, 2]),
+                         [Candidate(2, 2, 1), Candidate(2, 2, 2)])
+
+    def test_fastest_combination_within_the_limits_is_recommended(self):
+        figures = {
+            Candidate(1, 4, 4): {"docs_per_sec": 2.0, "p95": 3.0, "rate_503": 0.0, "peak_rss_mb": 700.0},
+            Candidate(2, 2, 2): {"docs_per_sec": 3.0, "p95": 9.0, "rate_503": 0.0, "peak_rss_mb": 1100.0},
+            Candidate(4, 1, 1): {"docs_per_sec": 4.0, "p95": 4.0, "rate_503": 0.2, "peak_rss_mb": 1900.0},
+        }
+
+        def measure(candidate, requests, concurrency, duration, warmup):
+            return {"name": candidate.name, "workers": candidate.workers, "cpu_threads": candidate.cpu_threads,
+                    "converter_threads": candidate.converter_threads, "cores": candidate.cores,
+                    "error_rate": 0.0, "rate_429": 0.0, **figures[candidate]}
+
+        report = calibrate_capacity(list(figures), [], concurrency=8, duration=1, warmup=0, max_p95=5.0,
+                                    measure=measure)
+
+        recommendation = report["recommendation"]
+        self.assertEqual(recommendation["candidate"], Candidate(1, 4, 4).name)
+        self.assertTrue(recommendation["constraints_met"])
+        self.assertEqual(recommendation["resources"], {"limits": {"cpu": "4", "memory": "1280Mi"},
+                                                       "requests": {"cpu": "4", "memory": "1024Mi"}})
+
+        env_file = render_env_file(ENV_TEMPLATE_PATH.read_text(), recommendation["env"], "# calibrated\n")
+        self.assertTrue(env_file.startswith("# calibrated\n"))
+        for line in ("OCR_WEB_SERVICE_WORKERS=1", "OCR_SERVICE_CPU_THREADS=4", "OCR_SERVICE_CONVERTER_THREADS=4",
+                     "OCR_SERVICE_DOCKER_CPU_MAX=4.0", "OCR_SERVICE_DOCKER_RAM_MAX=1280m"):
+            self.assertIn(line + "\n", env_file)
+        self.assertEqual(env_file.count("OCR_WEB_SERVICE_WORKERS="), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from ocr_service.api.health import health_api
+from ocr_service.settings import Settings
+from ocr_service.utils.cpu import CpuLimits, cgroup_cpu_quota
+
+
+class TestCgroupCpuQuota(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.root = Path(self.directory.name) / "cgroup"
+        self.proc_cgroup = Path(self.directory.name) / "proc_cgroup"
+
+    def write(self, relative_path: str, text: str) -> None:
+        path = self.root / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+
+    def test_v2_takes_the_lowest_quota_of_the_hierarchy(self):
+        self.proc_cgroup.write_text("0::/kubepods/pod1/ocr\n")
+        self.write("kubepods/cpu.max", "max 100000\n")
+        self.write("kubepods/pod1/cpu.max", "150000 100000\n")
+        self.write("kubepods/pod1/ocr/cpu.max", "400000 100000\n")
+
+        self.assertEqual(cgroup_cpu_quota(self.root, self.proc_cgroup), 1.5)
+
+    def test_v2_unlimited_and_container_root(self):
+        # in a container the cgroup path is not mounted, its limits are at the root
+        self.proc_cgroup.write_text("0::/kubepods/pod1/ocr\n")
+        self.write("cpu.max", "max 100000\n")
+        self.assertIsNone(cgroup_cpu_quota(self.root, self.proc_cgroup))
+
+        self.write("cpu.max", "200000 100000\n")
+        self.assertEqual(cgroup_cpu_quota(self.root, self.proc_cgroup), 2.0)
+
+    def test_v1_quota(self):
+        self.proc_cgroup.write_text("12:memory:/docker/abc\n3:cpu,cpuacct:/docker/abc\n0::/\n")
+        self.write("cpu,cpuacct/docker/abc/cpu.cfs_quota_us", "250000\n")
+        self.write("cpu,cpuacct/docker/abc/cpu.cfs_period_us", "100000\n")
+        self.assertEqual(cgroup_cpu_quota(self.root, self.proc_cgroup), 2.5)
+
+        self.write("cpu,cpuacct/docker/abc/cpu.cfs_quota_us", "-1\n")
+        self.assertIsNone(cgroup_cpu_quota(self.root, self.proc_cgroup))
+
+    def test_no_cgroups(self):
+        self.assertIsNone(cgroup_cpu_quota(self.root, self.proc_cgroup))
+
+    def test_available_cpus(self):
+        self.assertEqual(CpuLimits(host=64).available, 64)
+        self.assertEqual(CpuLimits(host=64, cpuset=8).available, 8)
+        self.assertEqual(CpuLimits(host=64, cpuset=8, quota=2.5).available, 3)
+        self.assertEqual(CpuLimits(host=64, quota=0.5).available, 1)
+
+
+class TestAutoThreads(unittest.TestCase):
+    def setUp(self) -> None:
+        patcher = patch("ocr_service.utils.cpu.cpu_limits", return_value=CpuLimits(host=64, quota=8.0))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_auto_threads_split_the_container_cpus(self):
+        settings = Settings(OCR_WEB_SERVICE_WORKERS=2,
+                            OCR_SERVICE_LIBRE_OFFICE_INSTANCES=1,
+                            OCR_SERVICE_CPU_THREADS="AUTO",
+                            OCR_SERVICE_CONVERTER_THREADS="auto")
+
+        self.assertEqual(settings.AVAILABLE_CPUS, 8)
+        self.assertEqual(settings.WORKER_CPUS, 4)
+        self.assertEqual(settings.CPU_THREADS, 4)
+        self.assertEqual(settings.CONVERTER_THREAD_NUM, 3)
+
+    def test_fixed_threads_are_kept(self):
+        settings = Settings(OCR_SERVICE_CPU_THREADS="2", OCR_SERVICE_CONVERTER_THREADS=5)
+
+        self.assertEqual(settings.CPU_THREADS, 2)
+        self.assertEqual(settings.CONVERTER_THREAD_NUM, 5)
+
+        with self.assertRaises(ValueError):
+            Settings(OCR_SERVICE_CPU_THREADS="0")
+
+    def test_info_reports_the_sizing(self):
+        app = FastAPI()
+        app.include_router(health_api)
+        auto_settings = Settings(OCR_WEB_SERVICE_WORKERS=4, OCR_SERVICE_CPU_THREADS="auto")
+
+        with patch("ocr_service.utils.utils.settings", auto_settings), \
+                patch("ocr_service.utils.utils.cpu_limits", return_value=CpuLimits(host=64, quota=8.0)):
+            sizing = TestClient(app).get("/api/info").json()["sizing"]
+
+        self.assertEqual(sizing["available_cpus"], 8)
+        self.assertEqual(sizing["cpu_quota"], 8.0)
+        self.assertEqual(sizing["cpu_threads"], 2)
+        self.assertEqual(sizing["cpu_threads_mode"], "auto")
+        self.assertEqual(sizing["converter_threads_mode"], "fixed")
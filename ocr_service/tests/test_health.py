@@ -1,10 +1,11 @@
 import unittest
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
 
 from ocr_service.api.health import health_api
+from ocr_service.processor.lanes import LaneScheduler
 
 
 class DummySubprocess:
@@ -89,3 +90,26 @@ class TestHealthApi(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json(), {"status": "ready", "libreoffice_processes": 1})
 
+    @patch("ocr_service.api.health.psutil.Process")
+    @patch("ocr_service.api.health.psutil.pid_exists", return_value=True)
+    def test_ready_reports_tesseract_pool_state(self, _pid_exists, process_mock):
+        process_mock.return_value = DummyPsutilProcess(running=True, process_status="sleeping")
+        processor = DummyProcessor(
+            {
+                "9900": {
+                    "process": DummySubprocess(pid=12345, returncode=None),
+                    "pid": 12345,
+                    "unhealthy": False,
+                }
+            }
+        )
+        processor.ocr_engine = Mock()
+        processor.ocr_engine.api_pool.stats.return_value = {"size": 2, "created": 1, "idle": 1, "in_use": 0}
+        processor.ocr_engine.lanes = LaneScheduler(2)
+        self.app.state.processor = processor
+
+        response = self.client.get("/api/ready")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["tesseract_pool"], {"size": 2, "created": 1, "idle": 1, "in_use": 0})
+        self.assertEqual(response.json()["lanes"]["ocr"]["running"], {"small": 0, "large": 0})
+
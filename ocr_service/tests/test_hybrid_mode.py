@@ -0,0 +1,83 @@
+import unittest
+from unittest.mock import Mock
+
+from PIL import Image
+
+from ocr_service.dto.process_context import ProcessContext
+from ocr_service.processor.converter import DocumentConverter
+from ocr_service.processor.ocr_engine import OcrEngine
+from ocr_service.settings import settings
+from ocr_service.tests.utils_helpers import get_file
+
+
+class TestHybridMode(unittest.TestCase):
+    def setUp(self) -> None:
+        self.previous_mode = settings.OCR_SERVICE_OPERATION_MODE
+        settings.OCR_SERVICE_OPERATION_MODE = "HYBRID"
+        self.converter = DocumentConverter(Mock(), {})
+
+    def tearDown(self) -> None:
+        settings.OCR_SERVICE_OPERATION_MODE = self.previous_mode
+
+    def test_born_digital_pdf_pages_use_text_layer(self):
+        stream = get_file("docs/pdf/ex1.pdf")
+        ctx = ProcessContext(stream=stream, file_name="ex1.pdf", file_type=None, pdf_stream=stream)
+
+        self.converter._handle_pdf_stream(ctx)
+
+        self.assertEqual(ctx.render_pages, [])
+        self.assertEqual(len(ctx.page_texts), ctx.metadata["pages"])
+        self.assertEqual(set(ctx.metadata["page_sources"]), {"text"})
+
+    def test_scanned_pdf_pages_are_sent_to_ocr(self):
+        stream = get_file("docs/pdf/ex2_ocr.pdf")
+        ctx = ProcessContext(stream=stream, file_name="ex2_ocr.pdf", file_type=None, pdf_stream=stream)
+
+        self.converter._handle_pdf_stream(ctx)
+
+        self.assertEqual(ctx.page_texts, {})
+        self.assertEqual(ctx.render_pages, list(range(ctx.metadata["pages"])))
+        self.assertEqual(set(ctx.metadata["page_sources"]), {"ocr"})
+
+    def test_text_layer_thresholds(self):
+        usable = {"chars": 500, "printable_ratio": 1.0, "glyph_coverage": 0.9}
+        self.assertTrue(DocumentConverter._is_text_layer_usable(usable))
+        self.assertFalse(DocumentConverter._is_text_layer_usable({**usable, "chars": 3}))
+        self.assertFalse(DocumentConverter._is_text_layer_usable({**usable, "printable_ratio": 0.2}))
+        # e.g. a fax header stamped on top of a full-page scan
+        self.assertFalse(DocumentConverter._is_text_layer_usable({**usable, "glyph_coverage": 0.02}))
+
+    def test_text_and_ocr_pages_are_merged_in_page_order(self):
+        engine = OcrEngine(Mock())
+        engine._process_pooled_image = Mock(return_value=("ocr page 2\n", 1, {"confidence": 80}))  # type: ignore
+        ctx = ProcessContext(
+            stream=b"",
+            file_name="mixed.pdf",
+            file_type=None,
+            render_pages=[1],
+            page_texts={0: "text page 1", 2: "text page 3\n"},
+            metadata={"pages": 3},
+        )
+
+        scanned_page = Image.new("L", (200, 280), color=255)
+        scanned_page.paste(0, (20, 20, 180, 60))
+
+        engine.run(ctx, pages=iter([(1, scanned_page)]))
+
+        self.assertEqual(ctx.output_text, "text page 1\nocr page 2\ntext page 3\n")
+        self.assertEqual(ctx.metadata["pages"], 3)
+        self.assertEqual(ctx.metadata["confidence"], 80)
+
+    def test_text_only_pages_skip_ocr(self):
+        engine = OcrEngine(Mock())
+        engine._process_pooled_image = Mock()  # type: ignore[method-assign]
+        ctx = ProcessContext(stream=b"", file_name="letter.pdf", file_type=None, page_texts={0: "letter"})
+
+        engine.run(ctx, pages=iter([]))
+
+        engine._process_pooled_image.assert_not_called()
+        self.assertEqual(ctx.output_text, "letter\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
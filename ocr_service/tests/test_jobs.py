@@ -0,0 +1,138 @@
+import tempfile
+import time
+import unittest
+from threading import Event
+from unittest.mock import Mock, patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from ocr_service.api.jobs import jobs_api
+from ocr_service.dto.page_result import PageResult
+from ocr_service.processor.jobs import JOB_DONE, JOB_FAILED, JOB_RUNNING, JobScheduler, JobStore
+
+
+class DummyProcessor:
+    def __init__(self, job_scheduler: JobScheduler) -> None:
+        self.job_scheduler = job_scheduler
+
+
+class TestJobStore(unittest.TestCase):
+    def setUp(self) -> None:
+        self.jobs_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.jobs_dir.cleanup)
+        self.store = JobStore(self.jobs_dir.name, retention=60)
+
+    def test_finished_jobs_expire_after_retention(self):
+        job = self.store.create("letter.pdf")
+        self.store.save_result(job["job_id"], {"text": "text", "metadata": {}, "footer": {}})
+        finished = self.store.update(job["job_id"], status=JOB_DONE)
+        self.assertAlmostEqual(finished["expires_at"], finished["updated_at"] + 60)
+
+        self.store.purge_expired()
+        self.assertIsNotNone(self.store.get(job["job_id"]))
+
+        with patch("ocr_service.processor.jobs.time.time", return_value=finished["expires_at"] + 1):
+            self.store.purge_expired()
+        self.assertIsNone(self.store.get(job["job_id"]))
+        self.assertIsNone(self.store.get_result(job["job_id"]))
+
+    def test_jobs_of_dead_workers_are_failed(self):
+        job = self.store.create("letter.pdf")
+        self.store.update(job["job_id"], status=JOB_RUNNING, worker_pid=999999999)
+
+        lost_job = self.store.get(job["job_id"])
+
+        self.assertEqual(lost_job["status"], JOB_FAILED)
+        self.assertEqual(lost_job["error"], "worker_lost")
+
+    def test_invalid_job_ids_are_not_looked_up(self):
+        self.assertIsNone(self.store.get("../../settings"))
+
+
+class TestJobsApi(unittest.TestCase):
+    def setUp(self) -> None:
+        jobs_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(jobs_dir.cleanup)
+        self.release = Event()
+        self.progress_reported = Event()
+
+        def process_stream(stream, file_name, page_callback):
+            page_callback(PageResult(page=1, source="ocr", pages_done=1, pages_total=2))
+            self.progress_reported.set()
+            self.release.wait(timeout=5)
+            page_callback(PageResult(page=2, source="ocr", pages_done=2, pages_total=2))
+            return "text of " + file_name, {"pages": 2}
+
+        self.scheduler = JobScheduler(Mock(), process_stream, store=JobStore(jobs_dir.name),
+                                      concurrency=1, queue_size=2)
+        self.addCleanup(self.finish_jobs)
+        self.app = FastAPI()
+        self.app.include_router(jobs_api)
+        self.app.state.processor = DummyProcessor(self.scheduler)
+        self.client = TestClient(self.app)
+        self.addCleanup(self.client.close)
+
+    def finish_jobs(self) -> None:
+        self.release.set()
+        if self.scheduler._executor is not None:
+            self.scheduler._executor.shutdown(wait=True)
+
+    def submit(self, file_name: str = "scan.pdf"):
+        return self.client.post("/api/jobs", files={"file": (file_name, b"%PDF-1.7", "application/pdf")})
+
+    def wait_for_status(self, job_id: str, status: str) -> dict:
+        for _ in range(100):
+            job = self.client.get(f"/api/jobs/{job_id}").json()
+            if job["status"] == status:
+                return job
+            time.sleep(0.05)
+        self.fail(f"job {job_id} never reached {status}")
+
+    def test_job_is_accepted_polled_and_its_result_fetched(self):
+        response = self.submit()
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json()["job_id"]
+        self.assertEqual(response.json()["result_url"], f"/api/jobs/{job_id}/result")
+
+        self.assertTrue(self.progress_reported.wait(timeout=5))
+        running_job = self.wait_for_status(job_id, JOB_RUNNING)
+        self.assertEqual((running_job["pages_done"], running_job["pages_total"]), (1, 2))
+        self.assertEqual(self.client.get(f"/api/jobs/{job_id}/result").status_code, 409)
+
+        self.release.set()
+        done_job = self.wait_for_status(job_id, JOB_DONE)
+        self.assertEqual((done_job["pages_done"], done_job["pages_total"]), (2, 2))
+
+        result = self.client.get(f"/api/jobs/{job_id}/result")
+        self.assertEqual(result.status_code, 200)
+        self.assertEqual(result.json()["result"]["text"], "text of scan.pdf")
+
+    def test_job_without_text_is_failed(self):
+        self.scheduler.process_stream = lambda stream, file_name, page_callback: ("", {"pages": 1})
+        job_id = self.submit().json()["job_id"]
+
+        failed_job = self.wait_for_status(job_id, JOB_FAILED)
+        self.assertEqual(failed_job["error"], "no_text_generated")
+
+        result = self.client.get(f"/api/jobs/{job_id}/result")
+        self.assertEqual(result.status_code, 500)
+        self.assertEqual(result.json()["result"]["success"], "False")
+
+    def test_full_job_queue_is_rejected(self):
+        self.assertEqual(self.submit().status_code, 202)
+        self.assertEqual(self.submit().status_code, 202)
+
+        response = self.submit()
+        self.release.set()
+
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("Retry-After", response.headers)
+
+    def test_unknown_job_returns_404(self):
+        self.assertEqual(self.client.get("/api/jobs/" + "0" * 32).status_code, 404)
+        self.assertEqual(self.client.get("/api/jobs/" + "0" * 32 + "/result").status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import threading
+import unittest
+from unittest.mock import Mock, patch
+
+from ocr_service.processor.admission import BYTES_PER_PAGE
+from ocr_service.processor.batch import BatchExecutor
+from ocr_service.processor.lanes import LANE_LARGE, LANE_SMALL, LaneScheduler, lane_for
+from ocr_service.settings import settings
+
+
+class TestLaneScheduler(unittest.TestCase):
+    def grant_sequence(self, scheduler: LaneScheduler, grants: int) -> list[str]:
+        sequence = []
+        for _ in range(grants):
+            lane = scheduler.try_acquire([LANE_SMALL, LANE_LARGE])
+            if lane is None:
+                self.fail("no lane was granted a free slot")
+            sequence.append(lane)
+            scheduler.release(lane)
+        return sequence
+
+    def test_contended_slots_are_shared_by_weight(self):
+        scheduler = LaneScheduler(1, weights={LANE_SMALL: 3, LANE_LARGE: 1}, reserved=0)
+
+        sequence = self.grant_sequence(scheduler, 40)
+
+        self.assertEqual((sequence.count(LANE_SMALL), sequence.count(LANE_LARGE)), (30, 10))
+        # large work keeps making progress, never more than three small grants in a row
+        self.assertNotIn([LANE_SMALL] * 4, [sequence[i:i + 4] for i in range(len(sequence) - 3)])
+
+    def test_reserved_slots_are_kept_for_small_work(self):
+        scheduler = LaneScheduler(3, reserved=1)
+
+        self.assertEqual(scheduler.try_acquire([LANE_LARGE]), LANE_LARGE)
+        self.assertEqual(scheduler.try_acquire([LANE_LARGE]), LANE_LARGE)
+        self.assertIsNone(scheduler.try_acquire([LANE_LARGE]))
+        self.assertEqual(scheduler.try_acquire([LANE_SMALL, LANE_LARGE]), LANE_SMALL)
+        self.assertIsNone(scheduler.try_acquire([LANE_SMALL]))
+
+        # a single slot is shared by both lanes
+        self.assertEqual(LaneScheduler(1, reserved=1).try_acquire([LANE_LARGE]), LANE_LARGE)
+
+    def test_idle_lane_does_not_bank_unused_slots(self):
+        scheduler = LaneScheduler(2, weights={LANE_SMALL: 1, LANE_LARGE: 1}, reserved=0)
+        held = scheduler.try_acquire([LANE_LARGE])
+        for _ in range(10):
+            scheduler.release(scheduler.try_acquire([LANE_LARGE]))
+
+        # small work arriving later is not owed the ten slots large work used alone
+        sequence = self.grant_sequence(scheduler, 4)
+        scheduler.release(held)
+
+        self.assertEqual(sequence.count(LANE_LARGE), 2)
+
+    def test_blocked_acquire_times_out(self):
+        scheduler = LaneScheduler(1)
+        scheduler.acquire(LANE_SMALL)
+
+        with self.assertRaises(TimeoutError):
+            scheduler.acquire(LANE_LARGE, timeout=0.05)
+
+        scheduler.release(LANE_SMALL)
+        with scheduler.slot(LANE_LARGE, timeout=1):
+            self.assertEqual(scheduler.stats()["running"], {LANE_SMALL: 0, LANE_LARGE: 1})
+
+    def test_documents_are_classified_by_dpi_weighted_pages(self):
+        previous_dpi = settings.OCR_SERVICE_IMAGE_DPI
+        self.addCleanup(setattr, settings, "OCR_SERVICE_IMAGE_DPI", previous_dpi)
+
+        settings.OCR_SERVICE_IMAGE_DPI = 200
+        self.assertEqual(lane_for(settings.LANE_LARGE_PAGES), LANE_SMALL)
+        self.assertEqual(lane_for(settings.LANE_LARGE_PAGES + 1), LANE_LARGE)
+
+        settings.OCR_SERVICE_IMAGE_DPI = 400
+        self.assertEqual(lane_for(settings.LANE_LARGE_PAGES // 2), LANE_LARGE)
+
+
+class TestLaneBatchExecutor(unittest.TestCase):
+    def test_small_documents_start_ahead_of_queued_large_ones(self):
+        started = []
+        release_first = threading.Event()
+
+        def process_stream(stream: bytes, file_name: str) -> tuple[str, dict]:
+            started.append(file_name)
+            if file_name == "large-1":
+                release_first.wait(5)
+            return file_name, {}
+
+        executor = BatchExecutor(Mock(), process_stream, concurrency=1)
+        self.addCleanup(executor.shutdown)
+        large_document = b"x" * (BYTES_PER_PAGE * (settings.LANE_LARGE_PAGES + 5))
+
+        futures = [executor.submit(large_document, "large-1")]
+        futures += [executor.submit(large_document, f"large-{i}") for i in (2, 3)]
+        futures.append(executor.submit(b"one page letter", "small"))
+        release_first.set()
+        for future in futures:
+            future.result(timeout=5)
+
+        self.assertEqual(started, ["large-1", "small", "large-2", "large-3"])
+        self.assertEqual(executor.lanes.stats()["granted"], {LANE_SMALL: 1, LANE_LARGE: 3})
+
+    def test_given_page_estimate_picks_the_lane_without_probing(self):
+        executor = BatchExecutor(Mock(), lambda stream, file_name: (file_name, {}), concurrency=1)
+        self.addCleanup(executor.shutdown)
+
+        with patch("ocr_service.processor.batch.estimate_pages") as estimate_pages:
+            executor.submit(b"%PDF-1.7", "admitted", pages=settings.LANE_LARGE_PAGES + 5).result(timeout=5)
+            results = list(executor.iter_results([("a", b"x"), ("b", b"y")], pages=[1, 1]))
+
+        estimate_pages.assert_not_called()
+        self.assertEqual(len(results), 2)
+        self.assertEqual(executor.lanes.stats()["granted"], {LANE_SMALL: 2, LANE_LARGE: 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client.parser import text_string_to_metric_families
+
+from ocr_service.api.health import health_api
+from ocr_service.settings import settings
+from ocr_service.utils.metrics import FALLBACKS, STAGE_OCR_PAGE, observe_stage
+
+WORKER_SCRIPT = """
+from ocr_service.utils.metrics import FALLBACKS, STAGE_OCR_PAGE, observe_stage
+FALLBACKS.labels("no_pdf_produced").inc()
+observe_stage(STAGE_OCR_PAGE, 0.2, "application/pdf")
+"""
+
+SCRAPE_SCRIPT = """
+import sys
+from ocr_service.utils.metrics import render_metrics
+sys.stdout.write(render_metrics()[0].decode())
+"""
+
+
+def samples(exposition: str) -> dict[tuple[str, tuple], float]:
+    return {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for family in text_string_to_metric_families(exposition)
+        for sample in family.samples
+    }
+
+
+class TestMetrics(unittest.TestCase):
+    def test_stage_latencies_and_counters_are_exposed(self):
+        app = FastAPI()
+        app.include_router(health_api)
+        labels = {"stage": STAGE_OCR_PAGE, "content_type": "image/png", "mode": settings.OPERATION_MODE}
+
+        observe_stage(STAGE_OCR_PAGE, 0.5, "image/png")
+        FALLBACKS.labels("converted_pdf_handling_failed").inc()
+
+        with TestClient(app) as client:
+            response = client.get("/api/metrics")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("text/plain"))
+        exposed = samples(response.text)
+        self.assertGreater(exposed[("ocr_service_stage_duration_seconds_count", tuple(sorted(labels.items())))], 0)
+        self.assertGreaterEqual(exposed[("ocr_service_fallbacks_total",
+                                         (("reason", "converted_pdf_handling_failed"),))], 1)
+
+    def test_metrics_of_all_worker_processes_are_aggregated(self):
+        with tempfile.TemporaryDirectory() as metrics_dir:
+            env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": metrics_dir}
+            for _ in range(2):
+                subprocess.run([sys.executable, "-c", WORKER_SCRIPT], env=env, check=True)
+            scrape = subprocess.run([sys.executable, "-c", SCRAPE_SCRIPT], env=env, check=True,
+                                    capture_output=True, text=True)
+
+        exposed = samples(scrape.stdout)
+        ocr_page = (("content_type", "application/pdf"), ("mode", settings.OPERATION_MODE),
+                    ("stage", STAGE_OCR_PAGE))
+        self.assertEqual(exposed[("ocr_service_fallbacks_total", (("reason", "no_pdf_produced"),))], 2)
+        self.assertEqual(exposed[("ocr_service_stage_duration_seconds_count", ocr_page)], 2)
+        self.assertAlmostEqual(exposed[("ocr_service_stage_duration_seconds_sum", ocr_page)], 0.4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import time
+import unittest
+from threading import Thread
+from unittest.mock import Mock, patch
+
+from ocr_service.app import app as app_module
+from ocr_service.processor.office_pool import LibreOfficePool
+from ocr_service.settings import settings
+
+
+def make_process_list(*ports: str) -> dict:
+    return {port: {"used": False, "unhealthy": False} for port in ports}
+
+
+class TestLibreOfficePool(unittest.TestCase):
+    def test_waiting_callers_are_served_in_fifo_order(self):
+        pool = LibreOfficePool(Mock(), make_process_list("9900"))
+        served: list[int] = []
+
+        def convert(caller: int) -> None:
+            with pool.acquire(timeout=5):
+                served.append(caller)
+                time.sleep(0.02)
+
+        with pool.acquire(timeout=5):
+            threads = []
+            for caller in range(5):
+                thread = Thread(target=convert, args=(caller,))
+                thread.start()
+                threads.append(thread)
+                # queue the callers one after the other
+                while pool.stats()["waiting"] != caller + 1:
+                    time.sleep(0.005)
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(served, list(range(5)))
+
+    def test_busy_instances_are_spread_and_checkout_times_out(self):
+        loffice_process_list = make_process_list("9900", "9901")
+        pool = LibreOfficePool(Mock(), loffice_process_list)
+
+        with pool.acquire(timeout=1) as first_port, pool.acquire(timeout=1) as second_port:
+            self.assertEqual({first_port, second_port}, {"9900", "9901"})
+            self.assertTrue(loffice_process_list["9900"]["used"])
+            with self.assertRaises(TimeoutError), pool.acquire(timeout=0.05):
+                pass
+
+        stats = pool.stats()
+        self.assertEqual(stats["checkouts"], 2)
+        self.assertEqual(stats["timeouts"], 1)
+        self.assertEqual(stats["in_use"], 0)
+        self.assertFalse(loffice_process_list["9900"]["used"])
+
+    def test_unhealthy_instances_are_skipped_until_restarted(self):
+        loffice_process_list = make_process_list("9900", "9901")
+        pool = LibreOfficePool(Mock(), loffice_process_list)
+
+        with pool.acquire(timeout=1) as port:
+            pool.report_failure(port, unhealthy=True)
+
+        self.assertEqual(pool.stats()["instances"][port]["failures"], 1)
+        for _ in range(3):
+            with pool.acquire(timeout=1) as next_port:
+                self.assertNotEqual(next_port, port)
+
+        # the monitor thread replaces a restarted instance with fresh metadata
+        loffice_process_list[port] = {"used": False, "unhealthy": False}
+        with pool.acquire(timeout=1) as first_port, pool.acquire(timeout=1) as second_port:
+            self.assertIn(port, {first_port, second_port})
+
+    def test_worker_starts_configured_instances_on_consecutive_ports(self):
+        previous_instances = settings.OCR_SERVICE_LIBRE_OFFICE_INSTANCES
+        settings.OCR_SERVICE_LIBRE_OFFICE_INSTANCES = 3
+        self.addCleanup(setattr, settings, "OCR_SERVICE_LIBRE_OFFICE_INSTANCES", previous_instances)
+        first_port = settings.LIBRE_OFFICE_LISTENER_PORT_RANGE[0]
+
+        with patch.object(app_module, "get_assigned_port", return_value=first_port), \
+                patch.object(app_module, "start_office_server", side_effect=lambda port: {"port": port}):
+            loffice_processes = app_module.start_office_converter_servers()
+
+        self.assertEqual(list(loffice_processes), [str(first_port + i) for i in range(3)])
+
+
+if __name__ == "__main__":
+    unittest.main()
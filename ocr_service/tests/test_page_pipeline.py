@@ -0,0 +1,253 @@
+import os
+import time
+import unittest
+from contextlib import contextmanager
+from pathlib import Path
+from threading import Lock
+from unittest.mock import Mock, patch
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from ocr_service.dto.process_context import ProcessContext
+from ocr_service.processor.converter import DocumentConverter
+from ocr_service.processor.ocr_engine import OcrEngine
+from ocr_service.processor.page_bitmap import SEGMENT_PREFIX, SHM_DIR
+from ocr_service.processor.processor import Processor
+from ocr_service.settings import settings
+from ocr_service.tests.utils_helpers import get_file
+from ocr_service.utils.utils import is_blank_image
+
+
+def make_page(page_num: int) -> Image.Image:
+    page = Image.new("L", (200, 280), color=255)
+    page.paste(0, (20, 20, 180, 60))
+    page.info["page"] = page_num
+    return page
+
+
+class FakeTesseractApi:
+    def SetImage(self, img):
+        self.img = img
+
+    def Recognize(self, timeout=0):
+        # later pages finish first so completion order differs from page order
+        time.sleep(0.02 * (5 - self.img.info["page"]))
+        return True
+
+    def GetUTF8Text(self):
+        return f"page {self.img.info['page']}\n"
+
+    def AllWordConfidences(self):
+        return [90]
+
+
+class FakeApiPool:
+    @contextmanager
+    def acquire(self, timeout=None):
+        yield FakeTesseractApi()
+
+    def close(self):
+        pass
+
+
+class TestPagePipeline(unittest.TestCase):
+    def setUp(self) -> None:
+        self.previous_cpu_threads = settings.OCR_SERVICE_CPU_THREADS
+        settings.OCR_SERVICE_CPU_THREADS = 3
+        with patch("ocr_service.processor.ocr_engine.TesseractApiPool", return_value=FakeApiPool()):
+            self.engine = OcrEngine(Mock())
+
+    def tearDown(self) -> None:
+        settings.OCR_SERVICE_CPU_THREADS = self.previous_cpu_threads
+
+    def test_streamed_pages_are_assembled_in_page_order(self):
+        ctx = ProcessContext(stream=b"", file_name="scan.pdf", file_type=None, render_pages=list(range(5)))
+        pages = ((page_num, make_page(page_num)) for page_num in range(5))
+
+        self.engine.run(ctx, pages=pages)
+
+        self.assertEqual(ctx.output_text, "".join(f"page {page_num}\n" for page_num in range(5)))
+        self.assertEqual(ctx.metadata["pages"], 5)
+        self.assertEqual(ctx.metadata["confidence"], 90)
+
+    def test_page_results_are_reported_as_pages_complete(self):
+        progress = []
+        ctx = ProcessContext(stream=b"", file_name="scan.pdf", file_type=None, render_pages=list(range(5)),
+                             page_callback=progress.append)
+        pages = ((page_num, make_page(page_num)) for page_num in range(5))
+
+        self.engine.run(ctx, pages=pages)
+
+        self.assertEqual([page_result.pages_done for page_result in progress], [1, 2, 3, 4, 5])
+        self.assertTrue(all(page_result.pages_total == 5 for page_result in progress))
+        # pages are reported in completion order, each with its own text
+        self.assertNotEqual([page_result.page for page_result in progress], [1, 2, 3, 4, 5])
+        self.assertEqual(sorted(page_result.page for page_result in progress), [1, 2, 3, 4, 5])
+        for page_result in progress:
+            self.assertEqual(page_result.text, f"page {page_result.page - 1}\n")
+            self.assertEqual((page_result.source, page_result.confidence), ("ocr", 90))
+
+    def test_rendered_pages_in_memory_are_bounded_by_queue_depth(self):
+        page_total = 40
+        ctx = ProcessContext(stream=b"", file_name="scan.pdf", file_type=None, render_pages=list(range(page_total)))
+        lock = Lock()
+        counters = {"rendered": 0, "recognised": 0, "peak": 0}
+
+        def pages():
+            for page_num in range(page_total):
+                with lock:
+                    counters["rendered"] += 1
+                    counters["peak"] = max(counters["peak"], counters["rendered"] - counters["recognised"])
+                yield page_num, make_page(4)
+
+        def recognise(img, img_id):
+            with lock:
+                counters["recognised"] += 1
+            return "", img_id, {"confidence": 0}
+
+        self.engine._process_pooled_image = recognise  # type: ignore[method-assign]
+        self.engine.run(ctx, pages=pages())
+
+        # queued pages + one page per consumer + one page held by the producer
+        self.assertLessEqual(counters["peak"], settings.PAGE_QUEUE_SIZE + settings.CPU_THREADS + 1)
+
+    def test_render_failure_stops_pipeline_and_raises(self):
+        ctx = ProcessContext(stream=b"", file_name="scan.pdf", file_type=None, render_pages=[0, 1])
+
+        def pages():
+            yield 0, make_page(0)
+            raise RuntimeError("render failed")
+
+        with self.assertRaisesRegex(Exception, "render failed"):
+            self.engine.run(ctx, pages=pages())
+
+    def test_converted_pdf_render_failure_falls_back_to_text(self):
+        processor = Processor()
+        self.addCleanup(processor.close)
+
+        def pages(*args, **kwargs):
+            raise RuntimeError("render failed")
+            yield
+
+        with patch.object(processor.converter, "_preprocess_doc", return_value=get_file("docs/pdf/ex1.pdf")), \
+                patch.object(processor.converter, "iter_pdf_pages", side_effect=pages):
+            output_text, doc_metadata = processor._process(get_file("docs/generic/pat_id_1.docx"), "pat_id_1.docx")
+
+        self.assertEqual(doc_metadata["fallback_reason"], "converted_pdf_handling_failed")
+        self.assertEqual(doc_metadata["content-type"], "text/plain")
+        self.assertIn("Bart Davidson", output_text)
+
+        # a PDF without a text fallback keeps its metadata, with no text
+        with patch.object(processor.converter, "iter_pdf_pages", side_effect=pages):
+            output_text, doc_metadata = processor._process(get_file("docs/pdf/ex1.pdf"), "ex1.pdf")
+
+        self.assertEqual(output_text, "")
+        self.assertEqual(doc_metadata["content-type"], "application/pdf")
+        self.assertNotIn("fallback_reason", doc_metadata)
+
+    def test_unreadable_pdf_keeps_its_metadata(self):
+        processor = Processor()
+        self.addCleanup(processor.close)
+
+        for operation_mode in ("OCR", "HYBRID"):
+            with self.subTest(operation_mode=operation_mode), \
+                    patch.object(settings, "OCR_SERVICE_OPERATION_MODE", operation_mode):
+                output_text, doc_metadata = processor.process_stream(b"%PDF-1.4\n garbage", "x.pdf")
+
+                self.assertEqual(output_text, "")
+                self.assertEqual(doc_metadata["content-type"], "application/pdf")
+                self.assertIn("elapsed_time", doc_metadata)
+
+    def test_blank_pages_are_skipped_before_ocr(self):
+        blank_page = Image.new("L", (800, 1100), color=255)
+        text_page = Image.new("L", (800, 1100), color=255)
+        text_page.paste(0, (100, 100, 700, 160))
+        ctx = ProcessContext(stream=b"", file_name="scan.pdf", file_type=None, render_pages=[0, 1, 2],
+                             metadata={"page_sources": ["ocr", "ocr", "ocr"]})
+        recognised = []
+
+        def recognise(img, img_id):
+            recognised.append(img_id)
+            return f"page {img_id}\n", img_id, {"confidence": 90}
+
+        self.engine._process_pooled_image = recognise  # type: ignore[method-assign]
+        self.engine.run(ctx, pages=iter([(0, text_page), (1, blank_page), (2, text_page)]))
+
+        self.assertEqual(sorted(recognised), [0, 2])
+        self.assertEqual(ctx.output_text, "page 0\npage 2\n")
+        self.assertEqual(ctx.metadata["blank_pages_skipped"], 1)
+        self.assertEqual(ctx.metadata["page_sources"], ["ocr", "blank", "ocr"])
+
+    def test_blank_image_check(self):
+        white = np.full((2000, 1600), 255, dtype=np.uint8)
+        self.assertTrue(is_blank_image(white))
+
+        speckled = white.copy()
+        speckled[np.random.default_rng(0).random(white.shape) < 0.00002] = 0
+        self.assertTrue(is_blank_image(speckled))
+
+        one_line = white.copy()
+        one_line[400:440, 200:1400] = 0
+        self.assertFalse(is_blank_image(one_line))
+        self.assertFalse(is_blank_image(white, ink_ratio=0))
+
+        self.assertTrue(is_blank_image(Image.new("RGB", (100, 100), color=(250, 250, 250))))
+
+    def test_sparse_text_page_is_not_blank(self):
+        # an A4 page at 200 DPI carrying only its page number
+        page = Image.new("L", (1654, 2339), color=255)
+        ImageDraw.Draw(page).text((760, 2200), "Page 2 of 3", fill=0, font=ImageFont.load_default(size=28))
+
+        self.assertFalse(is_blank_image(page))
+
+    def test_converter_renders_pdf_pages_in_order(self):
+        stream = get_file("docs/pdf/ex1.pdf")
+        converter = DocumentConverter(Mock(), {})
+        self.addCleanup(converter.close)
+        page_count = converter._pdf_page_count(stream)
+
+        rendered = list(converter.iter_pdf_pages(stream, list(range(page_count))))
+        for _, page_bitmap in rendered:
+            self.addCleanup(page_bitmap.release)
+
+        self.assertEqual([page_num for page_num, _ in rendered], list(range(page_count)))
+        self.assertTrue(all(page_bitmap.width > 0 for _, page_bitmap in rendered))
+
+    def test_abandoned_pdf_rendering_unlinks_pending_page_bitmaps(self):
+        stream = get_file("docs/pdf/ex1.pdf")
+        converter = DocumentConverter(Mock(), {})
+        page_count = converter._pdf_page_count(stream)
+
+        pages = converter.iter_pdf_pages(stream, list(range(page_count)))
+        _, page_bitmap = next(pages)
+        page_bitmap.release()
+        pages.close()
+        converter.close()
+
+        self.assertEqual(list(Path(SHM_DIR).glob(f"{SEGMENT_PREFIX}{os.getpid()}_*")), [])
+
+    def test_shared_page_bitmaps_are_passed_to_tesseract_as_raw_bytes(self):
+        stream = get_file("docs/pdf/ex1.pdf")
+        converter = DocumentConverter(Mock(), {})
+        self.addCleanup(converter.close)
+        tesseract_api = Mock()
+        tesseract_api.Recognize.return_value = True
+        tesseract_api.GetUTF8Text.return_value = "text"
+        tesseract_api.AllWordConfidences.return_value = [80]
+
+        _, page_bitmap = next(iter(converter.iter_pdf_pages(stream, [0])))
+        try:
+            self.engine._process_image(page_bitmap, 0, tesseract_api)
+        finally:
+            page_bitmap.release()
+
+        tesseract_api.SetImage.assert_not_called()
+        image_bytes, width, height, bytes_per_pixel, stride = tesseract_api.SetImageBytes.call_args.args
+        self.assertEqual((width, height), (page_bitmap.width, page_bitmap.height))
+        self.assertEqual(len(image_bytes), stride * height)
+        self.assertIn(bytes_per_pixel, (1, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -93,6 +93,11 @@ class TestOcrServiceProcessor(unittest.TestCase):
         data = response.json()
         self.log.info(data)
         self.assertEqual(response.status_code, 200)
+        if isinstance(orjson.loads(payload), list):
+            # an array of records is answered with an array of results
+            self.assertEqual(len(data), 1)
+            self.assertEqual(data[0]["status"], 200)
+            data = data[0]
         self.assertIn("result", data)
         self.assertIn("text", data["result"])
         output_text = str(data["result"]["text"]).strip()
@@ -0,0 +1,138 @@
+import threading
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+import orjson
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from ocr_service.api.process import process_api
+from ocr_service.processor.admission import AdmissionController
+from ocr_service.processor.batch import BatchExecutor
+from ocr_service.settings import settings
+
+
+def fake_process_stream(stream: bytes, file_name: str) -> tuple[str, dict]:
+    # the stream holds the processing time in seconds
+    time.sleep(float(stream))
+    return f"text of {file_name}", {"pages": 1}
+
+
+class DummyProcessor:
+    def __init__(self, concurrency: int = 2) -> None:
+        self.batch_executor = BatchExecutor(Mock(), fake_process_stream, concurrency=concurrency)
+        self.admission = AdmissionController(Mock(), page_budget=0)
+
+
+class TestBatchExecutor(unittest.TestCase):
+    def test_results_are_yielded_as_documents_finish(self):
+        executor = BatchExecutor(Mock(), fake_process_stream, concurrency=3)
+        self.addCleanup(executor.shutdown)
+
+        results = list(executor.iter_results([("slow", b"0.3"), ("fast", b"0.01"), ("medium", b"0.1")]))
+
+        self.assertEqual([result.file_name for result in results], ["fast", "medium", "slow"])
+        self.assertEqual({result.index for result in results}, {0, 1, 2})
+        self.assertEqual(results[0].text, "text of fast")
+
+    def test_concurrency_budget_is_shared_and_respected(self):
+        lock = threading.Lock()
+        counters = {"running": 0, "peak": 0}
+
+        def process_stream(stream: bytes, file_name: str) -> tuple[str, dict]:
+            with lock:
+                counters["running"] += 1
+                counters["peak"] = max(counters["peak"], counters["running"])
+            time.sleep(0.05)
+            with lock:
+                counters["running"] -= 1
+            return "text", {}
+
+        executor = BatchExecutor(Mock(), process_stream, concurrency=2)
+        self.addCleanup(executor.shutdown)
+        batches = [executor.iter_results([(f"{batch}-{i}", b"") for i in range(4)]) for batch in range(2)]
+        threads = [threading.Thread(target=list, args=(batch,)) for batch in batches]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(counters["peak"], 2)
+
+    def test_documents_past_their_deadline_are_reported_as_timed_out(self):
+        executor = BatchExecutor(Mock(), fake_process_stream, concurrency=2)
+        self.addCleanup(executor.shutdown)
+
+        results = {result.file_name: result for result in executor.iter_results(
+            [("stuck", b"1"), ("quick", b"0.01")], file_timeout=0.2)}
+
+        self.assertTrue(results["stuck"].timed_out)
+        self.assertFalse(results["quick"].timed_out)
+
+
+class TestProcessBulkApi(unittest.TestCase):
+    def setUp(self) -> None:
+        self.app = FastAPI()
+        self.app.include_router(process_api)
+        self.app.state.processor = DummyProcessor()
+        self.client = TestClient(self.app)
+
+    def tearDown(self) -> None:
+        self.client.close()
+        self.app.state.processor.batch_executor.shutdown()
+
+    def test_process_bulk_streams_one_ndjson_line_per_file(self):
+        files = [
+            ("files", ("slow.txt", b"0.2", "application/octet-stream")),
+            ("files", ("fast.txt", b"0.01", "application/octet-stream")),
+        ]
+
+        response = self.client.post("/api/process_bulk", files=files)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("application/x-ndjson"))
+        lines = [orjson.loads(line) for line in response.content.splitlines()]
+        self.assertEqual([line["file_name"] for line in lines], ["fast.txt", "slow.txt"])
+        self.assertEqual([line["index"] for line in lines], [1, 0])
+        self.assertTrue(all(line["status"] == 200 for line in lines))
+        self.assertEqual(lines[0]["result"]["text"], "text of fast.txt")
+
+    def test_timed_out_documents_hold_their_pages_and_buffer_until_they_finish(self):
+        finish = threading.Event()
+
+        def process_stream(stream: bytes, file_name: str) -> tuple[str, dict]:
+            if file_name == "stuck.txt":
+                finish.wait(timeout=5)
+            return "text", {"pages": 1}
+
+        processor = self.app.state.processor
+        processor.batch_executor.shutdown()
+        processor.batch_executor = BatchExecutor(Mock(), process_stream, concurrency=2)
+        processor.admission = AdmissionController(Mock(), page_budget=100)
+        files = [
+            ("files", ("stuck.txt", b"stuck", "application/octet-stream")),
+            ("files", ("quick.txt", b"quick", "application/octet-stream")),
+        ]
+
+        with patch.object(settings, "OCR_SERVICE_BULK_FILE_TIMEOUT", 1), \
+                patch("ocr_service.api.process.release_buffer") as release_buffer:
+            response = self.client.post("/api/process_bulk", files=files)
+
+            statuses = {line["file_name"]: line["status"]
+                        for line in map(orjson.loads, response.content.splitlines())}
+            self.assertEqual(statuses, {"stuck.txt": 504, "quick.txt": 200})
+            self.assertEqual(processor.admission.stats()["pages_in_flight"], 1)
+            self.assertEqual([bytes(call.args[0]) for call in release_buffer.call_args_list], [b"quick"])
+
+            finish.set()
+            for _ in range(100):
+                if processor.admission.stats()["pages_in_flight"] == 0:
+                    break
+                time.sleep(0.05)
+            self.assertEqual(processor.admission.stats()["pages_in_flight"], 0)
+            self.assertEqual([bytes(call.args[0]) for call in release_buffer.call_args_list], [b"quick", b"stuck"])
+
+
+if __name__ == "__main__":
+    unittest.main()
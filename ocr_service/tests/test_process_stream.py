@@ -0,0 +1,66 @@
+import unittest
+from unittest.mock import Mock
+
+import orjson
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from ocr_service.api.process import process_api
+from ocr_service.dto.page_result import PageResult
+from ocr_service.processor.admission import AdmissionController
+from ocr_service.processor.batch import BatchExecutor
+
+
+class DummyProcessor:
+    def __init__(self) -> None:
+        self.batch_executor = BatchExecutor(Mock(), self.process_stream, concurrency=1)
+        self.admission = AdmissionController(Mock(), page_budget=0)
+
+    def process_stream(self, stream, file_name: str = "", page_callback=None) -> tuple[str, dict]:
+        for page_num in (2, 1):
+            page_callback(PageResult(page=page_num, source="ocr", text=f"page {page_num}\n", confidence=91.5,
+                                     elapsed_time=0.1, pages_done=3 - page_num, pages_total=2))
+        return "page 1\npage 2\n", {"pages": 2}
+
+
+class TestProcessStreamApi(unittest.TestCase):
+    def setUp(self) -> None:
+        self.app = FastAPI()
+        self.app.include_router(process_api)
+        self.app.state.processor = DummyProcessor()
+        self.client = TestClient(self.app)
+
+    def tearDown(self) -> None:
+        self.client.close()
+        self.app.state.processor.batch_executor.shutdown()
+
+    def post_file(self, headers: dict | None = None):
+        return self.client.post("/api/process_stream", headers=headers,
+                                files={"file": ("scan.pdf", b"%PDF-1.7", "application/pdf")})
+
+    def test_pages_are_streamed_before_the_summary_as_ndjson(self):
+        response = self.post_file()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("application/x-ndjson"))
+        events = [orjson.loads(line) for line in response.content.splitlines()]
+        self.assertEqual([event["event"] for event in events], ["page", "page", "summary"])
+        self.assertEqual([event["page"] for event in events[:2]], [2, 1])
+        self.assertEqual(events[0]["text"], "page 2\n")
+        self.assertEqual(events[0]["confidence"], 91.5)
+        self.assertEqual(events[2]["status"], 200)
+        self.assertEqual(events[2]["result"]["text"], "page 1\npage 2\n")
+
+    def test_server_sent_events_are_sent_when_accepted(self):
+        response = self.post_file(headers={"Accept": "text/event-stream"})
+
+        self.assertTrue(response.headers["content-type"].startswith("text/event-stream"))
+        messages = [message for message in response.text.split("\n\n") if message]
+        self.assertEqual([message.split("\n")[0] for message in messages],
+                         ["event: page", "event: page", "event: summary"])
+        summary = orjson.loads(messages[-1].split("\n")[1].removeprefix("data: "))
+        self.assertEqual(summary["result"]["metadata"]["pages"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import unittest
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import Mock
+
+from ocr_service.processor.page_bitmap import (
+    SHM_DIR,
+    SharedPageBitmap,
+    cleanup_stale_page_bitmaps,
+    new_segment_name,
+    unlink_segments,
+)
+from ocr_service.processor.render_pool import PdfRenderPool
+from ocr_service.tests.utils_helpers import get_file
+from ocr_service.utils.utils import delete_tmp_files
+
+
+class TestPdfRenderPool(unittest.TestCase):
+    def setUp(self) -> None:
+        self.render_pool = PdfRenderPool(Mock(), size=1)
+        self.doc_path = self.render_pool.store_document(get_file("docs/pdf/ex1.pdf"))
+
+    def tearDown(self) -> None:
+        self.render_pool.shutdown()
+        delete_tmp_files([self.doc_path])
+
+    def render(self, page_numbers: list[int]) -> list[SharedPageBitmap]:
+        segment_names = [new_segment_name(page_num) for page_num in page_numbers]
+        self.addCleanup(unlink_segments, segment_names)
+        page_bitmaps = self.render_pool.submit(self.doc_path, page_numbers, segment_names).result(timeout=60)
+        return [SharedPageBitmap(page_bitmap) for page_bitmap in page_bitmaps]
+
+    def test_renders_page_ranges_from_document_reference(self):
+        pages = self.render([0, 1])
+
+        self.assertEqual(len(pages), 2)
+        for page in pages:
+            pixels = page.to_array()
+            self.assertEqual(pixels.shape[:2], (page.height, page.width))
+            # rendered text leaves dark pixels on the page
+            self.assertLess(int(pixels.min()), 128)
+            del pixels
+            page.release()
+
+    def test_released_page_bitmaps_are_unlinked(self):
+        page = self.render([0])[0]
+        segment_path = os.path.join(SHM_DIR, page.page_bitmap.segment_name)
+        self.assertTrue(os.path.exists(segment_path))
+
+        page.release()
+
+        self.assertFalse(os.path.exists(segment_path))
+
+    def test_stale_page_bitmaps_of_dead_workers_are_removed(self):
+        live_name = new_segment_name(0)
+        stale_name = live_name.replace(f"_{os.getpid()}_", "_999999999_", 1)
+        for segment_name in (live_name, stale_name):
+            with open(os.path.join(SHM_DIR, segment_name), "wb") as segment:
+                segment.write(b"\0")
+        self.addCleanup(unlink_segments, [live_name, stale_name])
+
+        cleanup_stale_page_bitmaps()
+
+        self.assertTrue(os.path.exists(os.path.join(SHM_DIR, live_name)))
+        self.assertFalse(os.path.exists(os.path.join(SHM_DIR, stale_name)))
+
+    def test_render_processes_are_reused_across_documents(self):
+        executor = self.render_pool._get_executor()
+        first_pid = executor.submit(os.getpid).result(timeout=60)
+        self.render([0])[0].release()
+
+        self.assertEqual(executor.submit(os.getpid).result(timeout=60), first_pid)
+        self.assertIs(self.render_pool._get_executor(), executor)
+
+    def test_pool_is_restarted_after_render_process_crash(self):
+        crash = self.render_pool._get_executor().submit(os._exit, 1)
+        with self.assertRaises(BrokenProcessPool):
+            crash.result(timeout=60)
+
+        pages = self.render([0])
+        pages[0].release()
+
+        self.assertEqual(len(pages), 1)
+        self.assertEqual(self.render_pool.restarts, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,243 @@
+import asyncio
+import base64
+import binascii
+import mmap
+import time
+import unittest
+from io import BytesIO
+from threading import Event
+from unittest.mock import Mock
+
+import orjson
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from ocr_service.api.process import process, process_api
+from ocr_service.processor.admission import AdmissionController
+from ocr_service.processor.batch import BatchExecutor
+from ocr_service.processor.converter import DocumentConverter
+from ocr_service.processor.processor import Processor
+from ocr_service.settings import settings
+from ocr_service.tests.utils_helpers import WSGIEnvironInjector, get_file
+from ocr_service.utils.request_body import decode_base64, parse_json_body, release_buffer, spool_body, spool_body_async
+
+
+class DummyProcessor:
+    submit_stream = Processor.submit_stream
+    process_stream_async = Processor.process_stream_async
+
+    def __init__(self) -> None:
+        self.received: list[tuple[type, bytes]] = []
+        self.batch_executor = BatchExecutor(Mock(), self.process_stream, concurrency=1)
+        self.admission = AdmissionController(Mock(), page_budget=0)
+
+    def process_stream(self, stream, file_name: str = "") -> tuple[str, dict]:
+        self.received.append((type(stream), bytes(stream)))
+        if bytes(stream).startswith(b"corrupt"):
+            raise RuntimeError("conversion failed")
+        return "text of " + bytes(stream).decode(), {"pages": 1}
+
+
+class TestRequestBody(unittest.TestCase):
+    def test_small_bodies_stay_in_memory_and_large_ones_are_mapped(self):
+        body = b"x" * 3000
+
+        self.assertEqual(spool_body(BytesIO(body), threshold=4096), body)
+
+        spooled = spool_body(BytesIO(body), threshold=1024)
+        self.addCleanup(release_buffer, spooled)
+        self.assertIsInstance(spooled, mmap.mmap)
+        self.assertEqual(spooled[:], body)
+
+    def test_chunked_base64_decoding_matches_b64decode(self):
+        document = bytes(range(256)) * 40
+        encoded = b"{" + base64.b64encode(document) + b"}"
+
+        decoded = decode_base64(encoded, 1, len(encoded) - 1, threshold=16)
+        self.addCleanup(release_buffer, decoded)
+
+        self.assertIsInstance(decoded, mmap.mmap)
+        self.assertEqual(decoded[:], document)
+
+    def test_invalid_base64_is_rejected(self):
+        with self.assertRaises(binascii.Error):
+            decode_base64(b"%PDF-1.7 not base64", threshold=4)
+        with self.assertRaises(binascii.Error):
+            decode_base64(b"QQ==" * 2_000_000, threshold=4)
+
+    def test_binary_data_strings_are_located_without_parsing_them(self):
+        body = orjson.dumps([
+            {"footer": {"binary_data": "nested", "note": "a \"quoted\" {value}"}, "binary_data": "QUJD"},
+            {"binary_data": None},
+            {"binary_data": "REVG", "footer": {"id": 3}},
+        ])
+
+        records, spans = parse_json_body(body)
+
+        self.assertEqual(sorted(spans), [0, 2])
+        self.assertEqual(body[slice(*spans[0])], b"QUJD")
+        self.assertEqual(body[slice(*spans[2])], b"REVG")
+        self.assertEqual(records[0]["binary_data"], "")
+        self.assertEqual(records[0]["footer"]["binary_data"], "nested")
+        self.assertEqual(records[2]["footer"], {"id": 3})
+
+    def test_non_json_bodies_are_rejected(self):
+        for body in (b"%PDF-1.7", b"", b'{"binary_data": "QUJD"} trailing'):
+            with self.assertRaises(ValueError):
+                parse_json_body(body)
+
+    def test_async_chunks_are_spooled_like_a_wsgi_input(self):
+        async def chunks():
+            for _ in range(3):
+                yield b"x" * 1000
+
+        self.assertEqual(asyncio.run(spool_body_async(chunks(), threshold=4096)), b"x" * 3000)
+        spooled = asyncio.run(spool_body_async(chunks(), threshold=1024))
+        self.addCleanup(release_buffer, spooled)
+        self.assertIsInstance(spooled, mmap.mmap)
+        self.assertEqual(spooled[:], b"x" * 3000)
+
+    def test_mapped_pdfs_are_opened_in_place(self):
+        spooled = spool_body(BytesIO(get_file("docs/generic/pat_id_1.pdf")), threshold=0)
+        self.addCleanup(release_buffer, spooled)
+
+        self.assertEqual(DocumentConverter._pdf_page_count(spooled), 1)
+
+
+class TestSpooledProcessApi(unittest.TestCase):
+    def setUp(self) -> None:
+        self.previous_spool_mb = settings.OCR_SERVICE_REQUEST_SPOOL_MB
+        settings.OCR_SERVICE_REQUEST_SPOOL_MB = 0
+        self.app = FastAPI()
+        self.app.include_router(process_api)
+        self.app.add_middleware(WSGIEnvironInjector)
+        self.app.state.processor = DummyProcessor()
+        self.client = TestClient(self.app)
+
+    def tearDown(self) -> None:
+        self.client.close()
+        self.app.state.processor.batch_executor.shutdown()
+        settings.OCR_SERVICE_REQUEST_SPOOL_MB = self.previous_spool_mb
+
+    def test_json_record_is_decoded_into_a_mapped_document(self):
+        payload = {"binary_data": base64.b64encode(b"%PDF-1.7 document").decode(), "footer": {"id": 7}}
+
+        response = self.client.post("/api/process", content=orjson.dumps(payload))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["result"]["footer"], {"id": 7})
+        self.assertEqual(self.app.state.processor.received, [(mmap.mmap, b"%PDF-1.7 document")])
+
+    def test_escaped_base64_is_still_decoded(self):
+        encoded = base64.b64encode(b"\xff\xfe\xfd" * 10).decode()
+        self.assertIn("/", encoded)
+        body = b'{"binary_data": "' + encoded.replace("/", "\\/").encode() + b'"}'
+
+        self.client.post("/api/process", content=body)
+
+        self.assertEqual(self.app.state.processor.received[0][1], b"\xff\xfe\xfd" * 10)
+
+    def test_raw_binary_body_is_passed_through(self):
+        self.client.post("/api/process", content=b"%PDF-1.7 raw")
+
+        self.assertEqual(self.app.state.processor.received, [(mmap.mmap, b"%PDF-1.7 raw")])
+
+    def test_every_record_of_a_json_array_is_processed(self):
+        records = [
+            {"binary_data": base64.b64encode(b"first").decode(), "footer": {"id": 1}},
+            {"binary_data": "", "footer": {"id": 2}},
+            {"binary_data": base64.b64encode(b"corrupt").decode(), "footer": {"id": 3}},
+            {"binary_data": None, "footer": {"id": 4}},
+            {"binary_data": base64.b64encode(b"last").decode(), "footer": {"id": 5}},
+        ]
+
+        response = self.client.post("/api/process", content=orjson.dumps(records))
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()
+        self.assertEqual([result["status"] for result in results], [200, 422, 500, 200, 200])
+        self.assertEqual([result["result"]["footer"] for result in results], [record["footer"] for record in records])
+        self.assertEqual(results[0]["result"]["text"], "text of first")
+        self.assertEqual(results[4]["result"]["text"], "text of last")
+        self.assertTrue(results[3]["result"]["metadata"]["ocr_skipped"])
+        self.assertEqual(sorted(data for _, data in self.app.state.processor.received), [b"corrupt", b"first", b"last"])
+
+
+class TestNativeAsgiProcessApi(TestSpooledProcessApi):
+    """Same requests served without the WSGI bridge, the body is read from the ASGI receive channel."""
+
+    def setUp(self) -> None:
+        self.previous_spool_mb = settings.OCR_SERVICE_REQUEST_SPOOL_MB
+        settings.OCR_SERVICE_REQUEST_SPOOL_MB = 0
+        self.app = FastAPI()
+        self.app.include_router(process_api)
+        self.app.state.processor = DummyProcessor()
+        self.client = TestClient(self.app)
+
+
+class TestProcessCancellation(unittest.TestCase):
+    def setUp(self) -> None:
+        self.previous_spool_mb = settings.OCR_SERVICE_REQUEST_SPOOL_MB
+        settings.OCR_SERVICE_REQUEST_SPOOL_MB = 0
+        self.addCleanup(setattr, settings, "OCR_SERVICE_REQUEST_SPOOL_MB", self.previous_spool_mb)
+
+        self.started, self.finish = Event(), Event()
+        self.processed: list[bytes] = []
+
+        def process_stream(stream, file_name: str = "") -> tuple[str, dict]:
+            self.started.set()
+            self.finish.wait(timeout=5)
+            self.processed.append(bytes(stream))
+            return "text", {"pages": 1}
+
+        self.processor = DummyProcessor()
+        self.processor.batch_executor = BatchExecutor(Mock(), process_stream, concurrency=1)
+        self.processor.admission = AdmissionController(Mock(), page_budget=100)
+        self.addCleanup(self.processor.batch_executor.shutdown)
+
+    def cancel_while_processing(self, body: bytes) -> None:
+        app = FastAPI()
+        app.state.processor = self.processor
+
+        async def receive() -> dict:
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def cancel() -> None:
+            request = Request({"type": "http", "method": "POST", "path": "/api/process", "headers": [],
+                               "query_string": b"", "app": app}, receive)
+            task = asyncio.create_task(process(request, None))
+            await asyncio.get_running_loop().run_in_executor(None, self.started.wait, 5)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+        asyncio.run(cancel())
+
+    def wait_for_pages_in_flight(self, pages: int) -> None:
+        for _ in range(100):
+            if self.processor.admission.stats()["pages_in_flight"] == pages:
+                return
+            time.sleep(0.05)
+        self.assertEqual(self.processor.admission.stats()["pages_in_flight"], pages)
+
+    def test_cancelled_request_leaves_the_stream_to_the_processor(self):
+        self.cancel_while_processing(b"%PDF-1.7 spooled")
+        self.finish.set()
+        self.wait_for_pages_in_flight(0)
+
+        # the document was still readable after the request was cancelled
+        self.assertEqual(self.processed, [b"%PDF-1.7 spooled"])
+
+    def test_cancelled_batch_keeps_the_pages_of_running_records_in_flight(self):
+        records = [{"binary_data": base64.b64encode(data).decode()} for data in (b"first", b"second")]
+
+        self.cancel_while_processing(orjson.dumps(records))
+
+        # the queued record was cancelled, the running one holds its page until it is processed
+        self.wait_for_pages_in_flight(1)
+        self.finish.set()
+        self.wait_for_pages_in_flight(0)
+        self.assertEqual(self.processed, [b"first"])
+
+
+if __name__ == "__main__":
+    unittest.main()
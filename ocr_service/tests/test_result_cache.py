@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import Mock
+
+from ocr_service.processor.processor import Processor
+from ocr_service.processor.result_cache import ResultCache
+from ocr_service.settings import settings
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.disk_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.disk_dir.cleanup)
+
+    def test_key_depends_on_content_extension_and_settings(self):
+        cache = ResultCache(Mock(), max_entries=4, max_disk_bytes=0)
+        key = cache.key(b"letter", "a.doc")
+
+        self.assertEqual(cache.key(b"letter", "b.doc"), key)
+        self.assertNotEqual(cache.key(b"letter", "a.rtf"), key)
+        self.assertNotEqual(cache.key(b"letter2", "a.doc"), key)
+
+        previous_dpi = settings.OCR_SERVICE_IMAGE_DPI
+        settings.OCR_SERVICE_IMAGE_DPI = previous_dpi + 100
+        self.addCleanup(setattr, settings, "OCR_SERVICE_IMAGE_DPI", previous_dpi)
+        self.assertNotEqual(cache.key(b"letter", "a.doc"), key)
+
+    def test_memory_tier_evicts_least_recently_used(self):
+        cache = ResultCache(Mock(), max_entries=2, max_disk_bytes=0)
+        cache.put("a", "text a", {"pages": 1})
+        cache.put("b", "text b", {"pages": 1})
+        cache.get("a")
+        cache.put("c", "text c", {"pages": 1})
+
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), ("text a", {"pages": 1}))
+        self.assertEqual(cache.stats()["entries"], 2)
+
+    def test_disk_tier_is_shared_and_bounded_by_size(self):
+        writer = ResultCache(Mock(), max_entries=0, max_disk_bytes=150, disk_dir=self.disk_dir.name)
+        writer.put("old", "x" * 60, {})
+        os.utime(os.path.join(self.disk_dir.name, "old.json"), (1, 1))
+        writer.put("new", "y" * 60, {})
+
+        reader = ResultCache(Mock(), max_entries=4, max_disk_bytes=150, disk_dir=self.disk_dir.name)
+        self.assertIsNone(reader.get("old"))
+        self.assertEqual(reader.get("new"), ("y" * 60, {}))
+        self.assertEqual(reader.stats()["disk_hits"], 1)
+
+
+class TestProcessorResultCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.processor = Processor()
+        self.addCleanup(self.processor.close)
+        self.processor.result_cache = ResultCache(Mock(), max_entries=8, max_disk_bytes=0)
+
+    def test_repeated_documents_are_served_from_cache(self):
+        self.processor._process = Mock(return_value=("text", {"pages": 1}))  # type: ignore[method-assign]
+
+        _, first_metadata = self.processor.process_stream(b"document", "letter.pdf")
+        output_text, second_metadata = self.processor.process_stream(b"document", "letter.pdf")
+
+        self.assertEqual(self.processor._process.call_count, 1)
+        self.assertEqual(output_text, "text")
+        self.assertEqual(first_metadata["cache"], "miss")
+        self.assertEqual(second_metadata["cache"], "hit")
+        self.assertEqual(second_metadata["pages"], 1)
+
+    def test_fallback_and_empty_results_are_not_cached(self):
+        self.processor._process = Mock(side_effect=[  # type: ignore[method-assign]
+            ("text", {"fallback_reason": "libreoffice_conversion_failed"}),
+            ("", {}),
+            ("text", {}),
+        ])
+
+        for _ in range(3):
+            self.processor.process_stream(b"document", "letter.doc")
+
+        self.assertEqual(self.processor._process.call_count, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import mmap
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from ocr_service.tests.utils_helpers import get_file
+from ocr_service.utils.sniffer import CONTAINER_OLE, CONTAINER_ZIP, SNIFF_PREFIX_BYTES, sniff_content
+
+
+class TestContentSniffer(unittest.TestCase):
+    def test_documents_are_classified_in_one_pass(self):
+        expected = {
+            "docs/generic/pat_id_1.pdf": ("pdf", None, False),
+            "docs/generic/pat_id_1.png": ("png", None, False),
+            "docs/generic/pat_id_1.docx": ("docx", CONTAINER_ZIP, False),
+            "docs/generic/pat_id_1.odt": ("odt", CONTAINER_ZIP, False),
+            "docs/generic/pat_id_1.doc": ("doc", CONTAINER_OLE, False),
+            "docs/generic/pat_id_1.html": ("html", None, True),
+            "docs/generic/pat_id_1.rtf": ("rtf", None, True),
+            "docs/generic/pat_id_1.txt": ("txt", None, True),
+        }
+        for path, (extension, container, text_like) in expected.items():
+            with self.subTest(path=path):
+                content = sniff_content(get_file(path))
+                self.assertEqual((content.extension, content.container, content.is_text_like),
+                                 (extension, container, text_like))
+
+        self.assertIsNone(sniff_content(b"\x00\x01\x02\x03").extension)
+
+    def test_encrypted_office_document_is_flagged_from_the_ole_directory(self):
+        stream = get_file("docs/invalid/word_enc_noerror.docx")
+
+        with tempfile.TemporaryFile() as spool:
+            spool.write(stream)
+            spool.flush()
+            with mmap.mmap(spool.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                content = sniff_content(mapped)
+
+        self.assertTrue(content.is_encrypted)
+        self.assertEqual((content.extension, content.container), ("docx", CONTAINER_OLE))
+        with self.assertRaises(AttributeError):
+            content.is_encrypted = False  # type: ignore[misc]
+
+    def test_xml_is_classified_from_a_bounded_prefix(self):
+        large_xml = b'<?xml version="1.0"?><root>' + b"<note>text</note>" * SNIFF_PREFIX_BYTES
+        fed = []
+
+        with patch("xml.sax.expatreader.ExpatParser.feed", autospec=True,
+                   side_effect=lambda parser, data: fed.append(len(data))):
+            sniff_content(large_xml)
+
+        self.assertEqual(fed, [SNIFF_PREFIX_BYTES])
+        self.assertTrue(sniff_content(large_xml).is_xml)
+        # a complete document still has to be well-formed
+        self.assertTrue(sniff_content(b"<root><note>text</note></root>").is_xml)
+        self.assertFalse(sniff_content(b"<root><note>text</root>").is_xml)
+        self.assertFalse(sniff_content(b"<html><body>page</body></html>").is_xml)
+
+
+if __name__ == "__main__":
+    unittest.main()
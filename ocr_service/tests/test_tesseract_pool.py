@@ -0,0 +1,74 @@
+import unittest
+from threading import Thread
+from unittest.mock import Mock, patch
+
+from ocr_service.processor.tesseract_pool import TesseractApiPool
+
+
+class TestTesseractApiPool(unittest.TestCase):
+    def setUp(self) -> None:
+        patcher = patch("ocr_service.processor.tesseract_pool.PyTessBaseAPI", side_effect=lambda **_: Mock())
+        self.api_factory = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_handles_are_reused_and_cleared_between_checkouts(self):
+        pool = TesseractApiPool(Mock(), size=2)
+
+        with pool.acquire() as first_api:
+            pass
+        with pool.acquire() as second_api:
+            pass
+
+        self.assertIs(first_api, second_api)
+        self.assertEqual(self.api_factory.call_count, 1)
+        first_api.Clear.assert_called()
+        self.assertEqual(pool.stats()["checkouts"], 2)
+
+    def test_failed_handle_is_ended_and_rebuilt(self):
+        pool = TesseractApiPool(Mock(), size=1)
+
+        with self.assertRaises(RuntimeError), pool.acquire() as broken_api:
+            raise RuntimeError("recognition failed")
+
+        broken_api.End.assert_called_once_with()
+        with pool.acquire() as rebuilt_api:
+            self.assertIsNot(rebuilt_api, broken_api)
+
+        stats = pool.stats()
+        self.assertEqual(stats["created"], 1)
+        self.assertEqual(stats["rebuilt"], 1)
+        self.assertEqual(stats["failures"], 1)
+
+    def test_checkout_is_bounded_by_pool_size(self):
+        pool = TesseractApiPool(Mock(), size=1)
+
+        with pool.acquire(), self.assertRaises(TimeoutError), pool.acquire(timeout=0.01):
+            pass
+
+        self.assertEqual(self.api_factory.call_count, 1)
+
+    def test_waiting_checkout_receives_returned_handle(self):
+        pool = TesseractApiPool(Mock(), size=1)
+        observed = []
+
+        with pool.acquire() as held_api:
+            waiter = Thread(target=lambda: observed.append(pool.acquire(timeout=5).__enter__()))
+            waiter.start()
+
+        waiter.join(timeout=5)
+        self.assertEqual(observed, [held_api])
+
+    def test_close_ends_idle_handles(self):
+        pool = TesseractApiPool(Mock(), size=1)
+        with pool.acquire() as tesseract_api:
+            pass
+
+        pool.close()
+
+        tesseract_api.End.assert_called_once_with()
+        with self.assertRaises(RuntimeError), pool.acquire():
+            pass
+
+
+if __name__ == "__main__":
+    unittest.main()
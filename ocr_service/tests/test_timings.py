@@ -0,0 +1,62 @@
+import os
+import unittest
+from unittest.mock import Mock
+
+from ocr_service.processor.processor import Processor
+from ocr_service.settings import settings
+from ocr_service.utils.timings import StageTimings, queued_for
+
+
+class TestStageTimings(unittest.TestCase):
+    def test_stages_and_pages_are_accumulated(self):
+        with queued_for(0.25):
+            timings = StageTimings({"content-type": "application/pdf"})
+        with timings.stage("sniff"):
+            sum(range(10000))
+        with timings.stage("convert", cpu=False):
+            pass
+        timings.add_page(1, 0.5, 0.4)
+        timings.add_page(0, 0.25, 0.2)
+        timings.details["libreoffice_port"] = "9900"
+
+        block = timings.as_dict()
+
+        self.assertEqual(set(block["stages"]), {"sniff", "convert", "ocr"})
+        self.assertIn("cpu", block["stages"]["sniff"])
+        self.assertNotIn("cpu", block["stages"]["convert"])
+        self.assertEqual(block["stages"]["ocr"], {"wall": 0.75, "count": 2, "cpu": 0.6})
+        self.assertEqual([page["page"] for page in block["pages"]], [1, 2])
+        self.assertEqual(block["queue_wait"], 0.25)
+        self.assertEqual(block["worker"]["pid"], os.getpid())
+        self.assertEqual(block["worker"]["libreoffice_port"], "9900")
+
+
+class TestProcessorTimings(unittest.TestCase):
+    def setUp(self) -> None:
+        previous = settings.OCR_SERVICE_STAGE_TIMINGS
+        self.addCleanup(setattr, settings, "OCR_SERVICE_STAGE_TIMINGS", previous)
+
+        self.processor = Processor()
+        self.addCleanup(self.processor.close)
+        self.processor.converter = Mock()
+        self.processor.converter.resolve_content_type.return_value = "text/plain"
+        self.processor.converter.finalize_output_text.side_effect = lambda output_text: output_text
+        self.processor.ocr_engine = Mock()
+
+    def test_timing_block_is_opt_in(self):
+        settings.OCR_SERVICE_STAGE_TIMINGS = False
+        _, doc_metadata = self.processor.process_stream(b"plain text", "letter.txt")
+        self.assertNotIn("timings", doc_metadata)
+
+        settings.OCR_SERVICE_STAGE_TIMINGS = True
+        future = self.processor.batch_executor.submit(b"plain text", "letter.txt")
+        _, doc_metadata = future.result(timeout=10)
+
+        timings = doc_metadata["timings"]
+        self.assertTrue({"cache", "sniff", "finalise"}.issubset(timings["stages"]))
+        self.assertGreaterEqual(timings["queue_wait"], 0.0)
+        self.assertEqual(timings["worker"]["pid"], os.getpid())
+
+
+if __name__ == "__main__":
+    unittest.main()
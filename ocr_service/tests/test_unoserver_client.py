@@ -0,0 +1,89 @@
+import time
+import unittest
+from threading import Thread
+from unittest.mock import Mock
+from xmlrpc.client import Fault
+from xmlrpc.server import SimpleXMLRPCServer
+
+from ocr_service.processor.converter import DocumentConverter
+from ocr_service.processor.unoserver_client import UnoserverClient
+
+
+class FakeUnoserver:
+    """Minimal XML-RPC server exposing the unoserver 3.x `info` / `convert` calls."""
+
+    def __init__(self, port: int = 0, delay: float = 0.0) -> None:
+        self.delay = delay
+        self.calls: list[tuple] = []
+        self.server = SimpleXMLRPCServer(("127.0.0.1", port), allow_none=True, logRequests=False)
+        self.server.register_function(self.info, "info")
+        # typeshed only types dispatch functions of up to four arguments (or *args)
+        self.server.register_function(self.convert, "convert")  # type: ignore[arg-type]
+        self.port = self.server.server_address[1]
+        self.thread = Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def info(self):
+        return {"unoserver": "3.7", "api": "3", "import_filters": ["MS Word 97"], "export_filters": []}
+
+    def convert(self, inpath, indata, outpath, convert_to, filtername, filter_options, update_index, infiltername):
+        self.calls.append((inpath, outpath, convert_to, infiltername))
+        time.sleep(self.delay)
+        if indata.data == b"broken":
+            raise RuntimeError("could not load document")
+        return b"%PDF-1.7\n" + indata.data
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class TestUnoserverClient(unittest.TestCase):
+    def setUp(self) -> None:
+        self.unoserver = FakeUnoserver()
+        self.addCleanup(self.unoserver.stop)
+
+    def test_converts_document_bytes_in_memory(self):
+        client = UnoserverClient("127.0.0.1", self.unoserver.port, timeout=5)
+        self.addCleanup(client.close)
+
+        self.assertEqual(client.convert(b"doc", "pdf", "MS Word 97"), b"%PDF-1.7\ndoc")
+        self.assertEqual(client.convert(b"doc", "pdf", "unknown filter"), b"%PDF-1.7\ndoc")
+        self.assertEqual(self.unoserver.calls, [(None, None, "pdf", "MS Word 97"), (None, None, "pdf", None)])
+
+    def test_reconnects_after_unoserver_restart(self):
+        client = UnoserverClient("127.0.0.1", self.unoserver.port, timeout=5)
+        self.addCleanup(client.close)
+        client.convert(b"first")
+
+        port = self.unoserver.port
+        self.unoserver.stop()
+        self.unoserver = FakeUnoserver(port=port)
+
+        self.assertEqual(client.convert(b"second"), b"%PDF-1.7\nsecond")
+
+    def test_conversion_timeout_and_failure_are_raised(self):
+        client = UnoserverClient("127.0.0.1", self.unoserver.port, timeout=0.2)
+        self.addCleanup(client.close)
+
+        with self.assertRaises(Fault):
+            client.convert(b"broken")
+
+        self.unoserver.delay = 1
+        with self.assertRaises(TimeoutError):
+            client.convert(b"slow")
+
+    def test_converter_marks_timed_out_unoserver_unhealthy(self):
+        self.unoserver.delay = 1
+        port = str(self.unoserver.port)
+        loffice_process_list = {port: {"used": False, "unhealthy": False}}
+        converter = DocumentConverter(Mock(), loffice_process_list)
+        self.addCleanup(converter.close)
+        converter.unoserver_clients[port] = UnoserverClient("127.0.0.1", port, timeout=0.2)
+
+        self.assertEqual(converter._preprocess_doc(b"slow", "letter.doc"), b"")
+        self.assertEqual(loffice_process_list[port], {"used": False, "unhealthy": True})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+"""CPUs available to the service, honouring the limits of its container.
+
+`os.cpu_count()` and `multiprocessing.cpu_count()` report the CPUs of the host, while a container is
+usually limited by a CFS quota (the Kubernetes `resources.limits.cpu`, e.g. `cpu: "1"`) or a cpuset. The
+quota is read from the cgroup of the process, cgroup v2 (`cpu.max`, the lowest along the hierarchy) or v1
+(`cpu.cfs_quota_us` / `cpu.cfs_period_us`), and the cpuset from the CPU affinity of the process.
+"""
+
+from __future__ import annotations
+
+import functools
+import math
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+PROC_SELF_CGROUP = "/proc/self/cgroup"
+
+# mount points of the v1 cpu controller, depending on the distribution
+V1_CPU_CONTROLLER_DIRS = ("cpu", "cpu,cpuacct", "cpuacct,cpu")
+
+
+@dataclass(frozen=True)
+class CpuLimits:
+    host: int
+    """CPUs of the host."""
+
+    cpuset: int | None = None
+    """CPUs the process may run on, None when unknown."""
+
+    quota: float | None = None
+    """CFS quota in CPUs (quota / period), None when unlimited or unknown."""
+
+    @property
+    def available(self) -> int:
+        """Whole CPUs the service can use, a fractional quota is rounded up."""
+        cpus = self.cpuset or self.host
+        if self.quota is not None:
+            cpus = min(cpus, math.ceil(self.quota))
+        return max(1, cpus)
+
+
+def _read(path: Path) -> str | None:
+    try:
+        return path.read_text().strip()
+    except OSError:
+        return None
+
+
+def _cgroup_paths(proc_cgroup: Path) -> dict[str, str]:
+    """Controller -> cgroup path of the process, "" is the cgroup v2 (unified) hierarchy."""
+    paths: dict[str, str] = {}
+    for line in (_read(proc_cgroup) or "").splitlines():
+        _, controllers, path = line.split(":", 2)
+        for controller in controllers.split(",") if controllers else [""]:
+            paths[controller] = path
+    return paths
+
+
+def _ancestors(root: Path, path: str) -> list[Path]:
+    """The cgroup directory of `path` under `root` and its parents up to `root`; `root` alone when the
+    directory is not mounted (e.g. a container sees its own cgroup as the root)."""
+    directory = root / path.lstrip("/")
+    if not directory.is_dir():
+        return [root]
+    return [directory, *[parent for parent in directory.parents if parent.is_relative_to(root)]]
+
+
+def _v2_quota(root: Path, path: str) -> float | None:
+    quotas: list[float] = []
+    for directory in _ancestors(root, path):
+        fields = (_read(directory / "cpu.max") or "").split()
+        if len(fields) == 2 and fields[0] != "max":
+            quotas.append(int(fields[0]) / int(fields[1]))
+    return min(quotas, default=None)
+
+
+def _v1_quota(root: Path, path: str) -> float | None:
+    quotas: list[float] = []
+    for controller_dir in V1_CPU_CONTROLLER_DIRS:
+        if not (root / controller_dir).is_dir():
+            continue
+        for directory in _ancestors(root / controller_dir, path):
+            quota = _read(directory / "cpu.cfs_quota_us")
+            period = _read(directory / "cpu.cfs_period_us")
+            # a quota of -1 is unlimited
+            if quota and period and int(quota) > 0 and int(period) > 0:
+                quotas.append(int(quota) / int(period))
+        break
+    return min(quotas, default=None)
+
+
+def cgroup_cpu_quota(root: str | Path = CGROUP_ROOT, proc_cgroup: str | Path = PROC_SELF_CGROUP) -> float | None:
+    """CFS quota of the process's cgroup in CPUs, None when there is none (or no cgroups, e.g. macOS)."""
+    root, paths = Path(root), _cgroup_paths(Path(proc_cgroup))
+    if "cpu" in paths:
+        return _v1_quota(root, paths["cpu"])
+    if "" in paths:
+        return _v2_quota(root, paths[""])
+    return None
+
+
+def cpuset_cpus() -> int | None:
+    if not hasattr(os, "sched_getaffinity"):
+        return None
+    return len(os.sched_getaffinity(0))
+
+
+@functools.cache
+def cpu_limits() -> CpuLimits:
+    """CPU limits of this process, read once."""
+    return CpuLimits(host=os.cpu_count() or 1, cpuset=cpuset_cpus(), quota=cgroup_cpu_quota())
@@ -0,0 +1,70 @@
+"""Prometheus metrics of the OCR service, exposed by `/api/metrics`.
+
+Under gunicorn every worker is a separate process, so the metrics run in the multiprocess mode of
+`prometheus_client`: `gunicorn.conf.py` points `PROMETHEUS_MULTIPROC_DIR` at a directory shared by the
+workers (wiped when the server starts) and marks exited workers dead, and a scrape served by any worker
+aggregates the values of all of them. Without the variable (tests, scripts) the metrics of the current
+process are exposed.
+"""
+
+from __future__ import annotations
+
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+from ocr_service.settings import settings
+
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+STAGE_DETECTION = "detection"
+STAGE_LIBREOFFICE_CONVERSION = "libreoffice_conversion"
+STAGE_PDF_RENDER = "pdf_render"
+STAGE_OCR_PAGE = "ocr_page"
+STAGE_TEXT_FINALISATION = "text_finalisation"
+
+# from sub-millisecond detection up to minutes long LibreOffice conversions and renders of large documents
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+STAGE_SECONDS = Histogram(
+    "ocr_service_stage_duration_seconds",
+    "Duration of the processing stages of a document (per page for ocr_page).",
+    ["stage", "content_type", "mode"],
+    buckets=STAGE_BUCKETS,
+)
+PAGES = Counter("ocr_service_pages", "Pages of the processed documents.", ["content_type", "mode"])
+FALLBACKS = Counter("ocr_service_fallbacks", "Documents answered by the text fallback, by fallback_reason.",
+                    ["reason"])
+CACHE_LOOKUPS = Counter("ocr_service_cache_lookups", "Result cache lookups, by result (hit or miss).", ["result"])
+ERRORS = Counter("ocr_service_errors", "Failed documents (process) and LibreOffice conversions (libreoffice).",
+                 ["stage"])
+DOCUMENTS_IN_FLIGHT = Gauge("ocr_service_documents_in_flight", "Documents being processed.",
+                            multiprocess_mode="livesum")
+QUEUE_DEPTH = Gauge("ocr_service_queue_depth",
+                    "Documents waiting for a document thread (documents) or a job thread (jobs).",
+                    ["queue"], multiprocess_mode="livesum")
+LIBREOFFICE_INSTANCES = Gauge("ocr_service_libreoffice_instances",
+                              "LibreOffice instances of the workers, by state (busy or total).",
+                              ["state"], multiprocess_mode="livesum")
+
+
+def observe_stage(stage: str, seconds: float, content_type: str | None = None) -> None:
+    STAGE_SECONDS.labels(stage, content_type or "unknown", settings.OPERATION_MODE).observe(seconds)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Metrics in the Prometheus text exposition format, with its content type."""
+    if os.environ.get(MULTIPROC_DIR_ENV):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
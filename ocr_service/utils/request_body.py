@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import contextlib
+import io
+import mmap
+import os
+import re
+import tempfile
+from collections.abc import AsyncIterable
+from typing import IO, Any
+
+import orjson
+
+from ocr_service.settings import settings
+
+# documents travel through the pipeline either as bytes (small bodies) or as a read-only memory map of an
+# unlinked temp file (bodies above REQUEST_SPOOL_THRESHOLD), slicing either of them yields bytes
+DocumentBuffer = bytes | mmap.mmap
+
+SPOOL_CHUNK_SIZE = 1024 * 1024
+# must be a multiple of 4 so every chunk holds whole base64 quanta
+BASE64_CHUNK_SIZE = 4 * 1024 * 1024
+
+_JSON_WHITESPACE = re.compile(rb"[ \t\r\n]*")
+_JSON_STRUCTURE = re.compile(rb'["{}\[\],:]')
+_BINARY_DATA_KEY = b'"binary_data"'
+
+
+def _map_temp_file(tmp_file: IO[bytes]) -> DocumentBuffer:
+    size = tmp_file.tell()
+    if size == 0:
+        return b""
+    tmp_file.flush()
+    # the map keeps its own file descriptor, the unlinked file lives until the map is closed
+    return mmap.mmap(tmp_file.fileno(), size, access=mmap.ACCESS_READ)
+
+
+def release_buffer(buffer: DocumentBuffer) -> None:
+    """Close the memory map behind a spooled document, a no-op for bytes."""
+    if isinstance(buffer, mmap.mmap):
+        # a view still exported by a library keeps the map alive until it is garbage collected
+        with contextlib.suppress(BufferError):
+            buffer.close()
+
+
+class BodySpool:
+    """Accumulates a request body in memory, moving it to an unlinked temp file once it outgrows `threshold`."""
+
+    def __init__(self, threshold: int | None = None) -> None:
+        self.threshold = settings.REQUEST_SPOOL_THRESHOLD if threshold is None else threshold
+        self._chunks: list[bytes] = []
+        self._size = 0
+        self._file: IO[bytes] | None = None
+
+    def write(self, chunk: bytes) -> None:
+        if self._file is not None:
+            self._file.write(chunk)
+            return
+
+        self._chunks.append(chunk)
+        self._size += len(chunk)
+        if self._size > self.threshold:
+            self._file = tempfile.TemporaryFile(dir=settings.TMP_FILE_DIR)  # noqa: SIM115 - closed by finish()
+            for spooled_chunk in self._chunks:
+                self._file.write(spooled_chunk)
+            self._chunks.clear()
+
+    def finish(self) -> DocumentBuffer:
+        """Return the body as bytes, or as a read-only `mmap` that the caller releases with `release_buffer`."""
+        if self._file is None:
+            return b"".join(self._chunks)
+        with self._file:
+            return _map_temp_file(self._file)
+
+    def close(self) -> None:
+        """Discard an unfinished body."""
+        self._chunks.clear()
+        if self._file is not None:
+            self._file.close()
+
+
+def spool_body(input_stream: IO[bytes], threshold: int | None = None) -> DocumentBuffer:
+    """Read a request body, bodies larger than `threshold` bytes are spooled to a memory-mapped temp file.
+
+    Args:
+        input_stream: Readable body stream (e.g. `wsgi.input`).
+        threshold: Size in bytes up to which the body is kept in memory, defaults to `REQUEST_SPOOL_THRESHOLD`.
+
+    Returns:
+        DocumentBuffer: The body as bytes, or as a read-only `mmap` that the caller releases with `release_buffer`.
+    """
+    spool = BodySpool(threshold)
+    try:
+        while chunk := input_stream.read(SPOOL_CHUNK_SIZE):
+            spool.write(chunk)
+        return spool.finish()
+    except BaseException:
+        spool.close()
+        raise
+
+
+async def spool_body_async(chunks: AsyncIterable[bytes], threshold: int | None = None) -> DocumentBuffer:
+    """Async variant of `spool_body` for bodies received from an ASGI server, chunk by chunk."""
+    spool = BodySpool(threshold)
+    try:
+        async for chunk in chunks:
+            spool.write(chunk)
+        return spool.finish()
+    except BaseException:
+        spool.close()
+        raise
+
+
+def read_upload(upload: IO[bytes], threshold: int | None = None) -> DocumentBuffer:
+    """Read an uploaded multipart file, mapping it in place when it is larger than `threshold` bytes.
+
+    Multipart uploads are already spooled to temp files by the form parser, so large ones are mapped
+    rather than copied.
+    """
+    threshold = settings.REQUEST_SPOOL_THRESHOLD if threshold is None else threshold
+
+    size = upload.seek(0, os.SEEK_END)
+    upload.seek(0)
+    if size <= threshold:
+        return upload.read()
+
+    return mmap.mmap(upload.fileno(), size, access=mmap.ACCESS_READ)
+
+
+def decode_base64(buffer: DocumentBuffer, start: int = 0, end: int | None = None,
+                  threshold: int | None = None) -> DocumentBuffer:
+    """Strictly base64-decode `buffer[start:end]`, with the rules of `base64.b64decode(..., validate=True)`.
+
+    Payloads above `threshold` bytes are decoded chunk by chunk into a memory-mapped temp file, so neither
+    the encoded nor the decoded document is ever held in memory as a whole.
+
+    Raises:
+        binascii.Error: The data is not valid base64.
+    """
+    threshold = settings.REQUEST_SPOOL_THRESHOLD if threshold is None else threshold
+    end = len(buffer) if end is None else end
+
+    if end - start <= threshold:
+        return base64.b64decode(buffer[start:end], validate=True)
+
+    with tempfile.TemporaryFile(dir=settings.TMP_FILE_DIR) as tmp_file:
+        for chunk_start in range(start, end, BASE64_CHUNK_SIZE):
+            chunk_end = min(chunk_start + BASE64_CHUNK_SIZE, end)
+            chunk = buffer[chunk_start:chunk_end]
+            if chunk_end < end and b"=" in chunk:
+                raise binascii.Error("Padding found before the end of the base64 data")
+            tmp_file.write(base64.b64decode(chunk, validate=True))
+        return _map_temp_file(tmp_file)
+
+
+def _json_string_end(buffer: DocumentBuffer, quote: int) -> int:
+    """Index of the quote closing the JSON string opened at `quote`, skipping escaped quotes."""
+    end = buffer.find(b'"', quote + 1)
+    while end != -1:
+        backslashes = 0
+        while buffer[end - 1 - backslashes] == 0x5C:
+            backslashes += 1
+        if backslashes % 2 == 0:
+            return end
+        end = buffer.find(b'"', end + 1)
+    raise ValueError("Unterminated JSON string")
+
+
+def _skip_whitespace(buffer: DocumentBuffer, pos: int) -> int:
+    match = _JSON_WHITESPACE.match(buffer, pos)
+    # the pattern also matches the empty string, a match is only missing past the end of the buffer
+    return match.end() if match is not None else len(buffer)
+
+
+def _scan_binary_data_spans(buffer: DocumentBuffer) -> dict[int, tuple[int, int]]:
+    """Locate the `binary_data` string of the top-level record(s) without decoding the JSON.
+
+    Strings are skipped with `find`, so the (large) base64 payloads are never looked at byte by byte.
+    """
+    pos = _skip_whitespace(buffer, 0)
+    if pos >= len(buffer) or buffer[pos] not in b"{[":
+        raise ValueError("Body is not a JSON object or array")
+
+    # records are the top-level object, or the elements of a top-level array
+    record_depth = 1 if buffer[pos] == ord("{") else 2
+    spans: dict[int, tuple[int, int]] = {}
+    containers = bytearray()
+    record_index = 0
+    expect_key = False
+
+    while token := _JSON_STRUCTURE.search(buffer, pos):
+        char = buffer[token.start()]
+        pos = token.end()
+
+        if char == ord('"'):
+            end = _json_string_end(buffer, token.start())
+            is_record_key = expect_key and len(containers) == record_depth
+            if is_record_key and buffer[token.start():end + 1] == _BINARY_DATA_KEY:
+                colon = _skip_whitespace(buffer, end + 1)
+                value = _skip_whitespace(buffer, colon + 1)
+                if buffer[colon:colon + 1] == b":" and buffer[value:value + 1] == b'"':
+                    end = _json_string_end(buffer, value)
+                    spans[record_index] = (value + 1, end)
+            expect_key = False
+            pos = end + 1
+        elif char in b"{[":
+            containers.append(char)
+            expect_key = char == ord("{")
+        elif char in b"}]":
+            if containers:
+                containers.pop()
+            expect_key = False
+        elif char == ord(","):
+            expect_key = bool(containers) and containers[-1] == ord("{")
+            if len(containers) == 1 and record_depth == 2:
+                record_index += 1
+        else:
+            expect_key = False
+
+    return spans
+
+
+def parse_json_body(buffer: DocumentBuffer) -> tuple[Any, dict[int, tuple[int, int]]]:
+    """Parse a JSON request body while leaving the records' `binary_data` strings in the buffer.
+
+    Returns:
+        (body, spans): The parsed JSON with every top-level record's `binary_data` string replaced by "",
+        and the `[start, end)` offsets of the original strings in `buffer`, keyed by record index
+        (0 for a single object).
+
+    Raises:
+        ValueError: The body is not a JSON object or array.
+    """
+    spans = _scan_binary_data_spans(buffer)
+
+    parts = []
+    pos = 0
+    for start, end in sorted(spans.values()):
+        parts.append(buffer[pos:start])
+        pos = end
+    parts.append(buffer[pos:])
+
+    return orjson.loads(b"".join(parts)), spans
+
+
+class MappedBufferReader(io.RawIOBase):
+    """Seekable read-only stream over a document buffer, for readers (e.g. pdfium) that need `readinto`."""
+
+    def __init__(self, buffer: DocumentBuffer) -> None:
+        super().__init__()
+        self._buffer = buffer
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: len(self._buffer)}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+
+    def readinto(self, target: Any) -> int:
+        data = self._buffer[self._pos:self._pos + len(target)]
+        target[:len(data)] = data
+        self._pos += len(data)
+        return len(data)
@@ -0,0 +1,270 @@
+"""Single-pass content classification of request documents.
+
+`sniff_content` reads a bounded prefix of the document, plus the central directory of a ZIP container or
+the directory of an OLE container, once per document and returns a frozen `ContentInfo` holding everything
+the processor and converter need to route it: the detected type, the extension LibreOffice should see,
+text-likeness (HTML, XML, RTF, plain text) and the container and encryption hints. The cost of classifying
+a document does not grow with its size.
+"""
+
+from __future__ import annotations
+
+import logging
+import string
+import xml.sax
+import xml.sax.handler
+import xml.sax.xmlreader
+import zipfile
+from dataclasses import dataclass
+from typing import Any, cast
+
+import filetype
+import olefile
+from filetype.types import DOCUMENT, IMAGE, archive
+
+from ocr_service.utils.request_body import DocumentBuffer, MappedBufferReader
+
+logger = logging.getLogger(__name__)
+
+# bytes of the document read by the type and text checks
+SNIFF_PREFIX_BYTES = 64 * 1024
+PLAIN_TEXT_SAMPLE_BYTES = 4096
+HTML_SAMPLE_BYTES = 2048
+RTF_SAMPLE_BYTES = 32
+
+CONTAINER_ZIP = "zip"
+CONTAINER_OLE = "ole"
+
+PRINTABLE = set(bytes(string.printable, "ascii")) | {9, 10, 13}
+OLE_SIGNATURE = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+
+ODF_MIME_EXTENSIONS: dict[str, str] = {
+    "application/vnd.oasis.opendocument.text": "odt",
+    "application/vnd.oasis.opendocument.text-template": "ott",
+    "application/vnd.oasis.opendocument.spreadsheet": "ods",
+    "application/vnd.oasis.opendocument.spreadsheet-template": "ots",
+    "application/vnd.oasis.opendocument.presentation": "odp",
+    "application/vnd.oasis.opendocument.presentation-template": "otp",
+    "application/vnd.oasis.opendocument.graphics": "odg",
+    "application/vnd.oasis.opendocument.formula": "odf",
+}
+
+OOXML_PATH_EXTENSIONS: tuple[tuple[str, str], ...] = (
+    ("word/document.xml", "docx"),
+    ("xl/workbook.xml", "xlsx"),
+    ("ppt/presentation.xml", "pptx"),
+)
+
+OLE_STREAM_EXTENSIONS: tuple[tuple[str, str], ...] = (
+    ("worddocument", "doc"),
+    ("workbook", "xls"),
+    ("book", "xls"),
+    ("powerpoint document", "ppt"),
+)
+ENCRYPTED_OOXML_STREAMS = {"encryptedpackage", "encryptioninfo"}
+
+
+@dataclass(frozen=True)
+class ContentInfo:
+    """Classification of one document, see `sniff_content`."""
+
+    file_type: Any = None
+    """Type detected by the `filetype` library from the document's magic bytes, None if unknown."""
+
+    container: str | None = None
+    """`CONTAINER_ZIP` or `CONTAINER_OLE` when the document is one of these containers."""
+
+    office_extension: str | None = None
+    """Office extension inferred from the container's directory, which generic type sniffing may miss."""
+
+    is_encrypted: bool = False
+    """Encrypted OOXML package stored in an OLE container."""
+
+    is_html: bool = False
+    is_xml: bool = False
+    """Well-formed XML as far as the sniffed prefix goes, excluding HTML."""
+    is_rtf: bool = False
+    is_plain_text: bool = False
+
+    @property
+    def mime(self) -> str | None:
+        return getattr(self.file_type, "mime", None)
+
+    @property
+    def is_pdf(self) -> bool:
+        return type(self.file_type) is archive.Pdf
+
+    @property
+    def is_image(self) -> bool:
+        return self.file_type in IMAGE
+
+    @property
+    def is_document(self) -> bool:
+        return self.file_type in DOCUMENT
+
+    @property
+    def is_text_like(self) -> bool:
+        return self.is_plain_text or self.is_html or self.is_xml or self.is_rtf
+
+    @property
+    def extension(self) -> str | None:
+        """Extension (without the dot) the document should carry, None for unknown binary content."""
+        detected_ext = getattr(self.file_type, "extension", None)
+        if detected_ext and detected_ext != "zip":
+            return str(detected_ext)
+        if self.office_extension:
+            return self.office_extension
+        if detected_ext:
+            return str(detected_ext)
+        if self.is_html:
+            return "html"
+        if self.is_xml:
+            return "xml"
+        if self.is_rtf:
+            return "rtf"
+        if self.is_plain_text:
+            return "txt"
+        return None
+
+
+class _RootElementHandler(xml.sax.handler.ContentHandler):
+    def __init__(self) -> None:
+        super().__init__()
+        self.has_root = False
+
+    def startElement(self, name: str, attrs: Any) -> None:  # noqa: N802
+        self.has_root = True
+
+
+def _is_plain_text(prefix: bytes, threshold: float = 0.95) -> bool:
+    sample = prefix[:PLAIN_TEXT_SAMPLE_BYTES]
+    if not sample:
+        return False
+
+    # If it can't be decoded as UTF-8 at all, treat as binary
+    try:
+        sample.decode("utf-8")
+    except UnicodeDecodeError:
+        return False
+
+    printable = sum(1 for b in sample if b in PRINTABLE)
+    return printable / len(sample) >= threshold
+
+
+def _is_html(prefix: bytes) -> bool:
+    head = prefix[:HTML_SAMPLE_BYTES].decode(errors="ignore").lower()
+    return "<html" in head or "<!doctype html" in head
+
+
+def _is_rtf(prefix: bytes) -> bool:
+    return prefix[:RTF_SAMPLE_BYTES].lstrip().startswith(b"{\\rtf")
+
+
+def _is_xml(prefix: bytes, complete: bool) -> bool:
+    """Feed the prefix to an incremental parser: a complete document has to be well-formed, a truncated
+    one has to parse without errors as far as it goes and open its root element."""
+    handler = _RootElementHandler()
+    # expat's reader is incremental, make_parser() is only typed as returning an XMLReader
+    parser = cast(xml.sax.xmlreader.IncrementalParser, xml.sax.make_parser())
+    parser.setContentHandler(handler)
+    try:
+        parser.feed(prefix)
+        if complete:
+            parser.close()
+    except Exception:
+        logger.debug("Could not determine if file is XML.")
+        return False
+    return handler.has_root
+
+
+def _zip_office_extension(archive_file: zipfile.ZipFile) -> str | None:
+    names = set(archive_file.namelist())
+
+    if "mimetype" in names:
+        mimetype = archive_file.read("mimetype").decode("ascii", "ignore").strip()
+        extension = ODF_MIME_EXTENSIONS.get(mimetype)
+        if extension:
+            return extension
+
+    for marker_path, extension in OOXML_PATH_EXTENSIONS:
+        if marker_path in names:
+            return extension
+
+    lowered_names = {name.lower() for name in names}
+    for prefix, extension in (("word/", "docx"), ("xl/", "xlsx"), ("ppt/", "pptx")):
+        if any(name.startswith(prefix) for name in lowered_names):
+            return extension
+    return None
+
+
+def _sniff_zip(stream: DocumentBuffer) -> str | None:
+    # only the central directory (and the small ODF mimetype member) is read
+    try:
+        with zipfile.ZipFile(MappedBufferReader(stream)) as archive_file:
+            return _zip_office_extension(archive_file)
+    except Exception:
+        logger.debug("Could not infer Office extension from ZIP container.")
+    return None
+
+
+def _sniff_ole(stream: DocumentBuffer) -> tuple[str | None, bool]:
+    try:
+        with olefile.OleFileIO(MappedBufferReader(stream)) as ole:
+            stream_names = {"/".join(path).lower() for path in ole.listdir()}
+    except Exception:
+        logger.debug("Could not inspect OLE streams.")
+        return None, False
+
+    if ENCRYPTED_OOXML_STREAMS.issubset(stream_names):
+        return "docx", True
+
+    leaf_names = {name.rsplit("/", 1)[-1] for name in stream_names}
+    for stream_name, extension in OLE_STREAM_EXTENSIONS:
+        if stream_name in leaf_names:
+            return extension, False
+    return None, False
+
+
+def sniff_content(stream: DocumentBuffer) -> ContentInfo:
+    """Classify a document (bytes or a memory-mapped spool) in a single bounded pass.
+
+    Args:
+        stream: Raw document to inspect.
+
+    Returns:
+        ContentInfo: Detected type, extension, text-likeness and container/encryption hints.
+    """
+    prefix = bytes(stream[:SNIFF_PREFIX_BYTES])
+    complete = len(stream) <= SNIFF_PREFIX_BYTES
+
+    file_type = None
+    try:
+        file_type = filetype.guess(prefix)
+    except Exception:
+        logger.error("Could not determine file Type")
+
+    container = None
+    office_extension = None
+    is_encrypted = False
+    if prefix.startswith(b"PK"):
+        container = CONTAINER_ZIP
+        office_extension = _sniff_zip(stream)
+    elif prefix.startswith(OLE_SIGNATURE):
+        container = CONTAINER_OLE
+        office_extension, is_encrypted = _sniff_ole(stream)
+
+    if type(file_type) is archive.Pdf:
+        # a PDF is never routed as text, skip parsing its prefix
+        return ContentInfo(file_type=file_type)
+
+    is_html = _is_html(prefix)
+    return ContentInfo(
+        file_type=file_type,
+        container=container,
+        office_extension=office_extension,
+        is_encrypted=is_encrypted,
+        is_html=is_html,
+        is_xml=not is_html and _is_xml(prefix, complete),
+        is_rtf=type(file_type) is archive.Rtf or _is_rtf(prefix),
+        is_plain_text=_is_plain_text(prefix),
+    )
@@ -0,0 +1,100 @@
+"""Per-document stage timings, reported in the response metadata when `OCR_SERVICE_STAGE_TIMINGS` is on.
+
+Every stage is timed whether or not the block is reported: timing a stage costs two clock reads per clock,
+and the same measurement feeds the Prometheus stage histogram (see `ocr_service.utils.metrics`). A stage is
+instrumented in one line, `with ctx.timings.stage("convert", STAGE_LIBREOFFICE_CONVERSION, cpu=False):`.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import os
+import socket
+import threading
+import time
+from collections.abc import Iterator
+from typing import Any
+
+from ocr_service.utils.metrics import observe_stage
+
+_queue_wait = threading.local()
+
+
+@contextlib.contextmanager
+def queued_for(seconds: float) -> Iterator[None]:
+    """Mark the document processed by the current thread within the block as having waited `seconds` in a
+    queue (document executor or job queue) before it started."""
+    _queue_wait.seconds = seconds
+    try:
+        yield
+    finally:
+        _queue_wait.seconds = None
+
+
+def current_queue_wait() -> float | None:
+    return getattr(_queue_wait, "seconds", None)
+
+
+class StageTimings:
+    """Wall and CPU time per processing stage of one document, safe to record from several threads.
+
+    CPU time is the time of the recording thread (`time.thread_time`), so it is left out for stages whose
+    work is done by other processes (LibreOffice conversion, PDF rendering), where the thread only waits.
+    `metadata` is the metadata of the document, its content-type labels the Prometheus observations.
+    """
+
+    def __init__(self, metadata: dict[str, Any] | None = None) -> None:
+        self.metadata = metadata if metadata is not None else {}
+        self.queue_wait = current_queue_wait()
+        self.details: dict[str, Any] = {}
+        self._stages: dict[str, dict[str, float]] = {}
+        self._pages: list[dict[str, float | int]] = []
+        self._lock = threading.Lock()
+
+    def add(self, name: str, wall: float, cpu: float | None = None, metric: str | None = None) -> None:
+        """Record one run of stage `name`, also observed as Prometheus stage `metric` when given."""
+        with self._lock:
+            stage = self._stages.setdefault(name, {"wall": 0.0, "count": 0})
+            stage["wall"] += wall
+            stage["count"] += 1
+            if cpu is not None:
+                stage["cpu"] = stage.get("cpu", 0.0) + cpu
+        if metric is not None:
+            observe_stage(metric, wall, self.metadata.get("content-type"))
+
+    def add_page(self, page_num: int, wall: float, cpu: float | None = None, metric: str | None = None) -> None:
+        """Record the OCR of zero-based page `page_num` under the "ocr" stage and in the per-page list."""
+        self.add("ocr", wall, cpu, metric)
+        page: dict[str, float | int] = {"page": page_num + 1, "wall": round(wall, 4)}
+        if cpu is not None:
+            page["cpu"] = round(cpu, 4)
+        with self._lock:
+            self._pages.append(page)
+
+    @contextlib.contextmanager
+    def stage(self, name: str, metric: str | None = None, cpu: bool = True) -> Iterator[None]:
+        """Time the block as a run of stage `name`, whether or not it raises."""
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time() if cpu else 0.0
+        try:
+            yield
+        finally:
+            self.add(name,
+                     time.perf_counter() - wall_start,
+                     time.thread_time() - cpu_start if cpu else None,
+                     metric)
+
+    def as_dict(self) -> dict[str, Any]:
+        """The timing block of the response metadata, times in seconds."""
+        with self._lock:
+            stages = {
+                name: {key: round(value, 4) if key != "count" else int(value) for key, value in stage.items()}
+                for name, stage in self._stages.items()
+            }
+            pages = sorted(self._pages, key=lambda page: page["page"])
+        return {
+            "stages": stages,
+            "pages": pages,
+            "queue_wait": round(self.queue_wait, 4) if self.queue_wait is not None else None,
+            "worker": {"host": socket.gethostname(), "pid": os.getpid(), **self.details},
+        }
@@ -1,9 +1,9 @@
 """Utility helpers for the OCR service.
 
 This module centralizes shared behaviors across the API and processor layers,
-including response shaping, file type detection, text heuristics, LibreOffice
-process management, and logging setup. It also contains a legacy HTML-to-image
-converter kept for reference.
+including response shaping, file naming (content classification lives in
+`sniffer`), LibreOffice process management, and logging setup. It also
+contains a legacy HTML-to-image converter kept for reference.
 """
 
 import contextlib
@@ -12,53 +12,28 @@ import json
 import logging
 import os
 import shutil
-import string
 import sys
-import xml.sax
-import zipfile
+from dataclasses import replace
 from datetime import datetime
-from io import BytesIO
 from pathlib import Path
 from sys import platform
 from typing import Any
 
 import filetype
-import olefile
+import numpy as np
 import psutil
 from html2image import Html2Image
 from PIL import Image
 
 from ocr_service.settings import settings
+from ocr_service.utils.cpu import cpu_limits
+from ocr_service.utils.request_body import DocumentBuffer
+from ocr_service.utils.sniffer import ContentInfo, sniff_content
 
 logger = logging.getLogger(__name__)
 
-PRINTABLE = set(bytes(string.printable, "ascii")) | {9, 10, 13}
-OLE_SIGNATURE = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
-
-ODF_MIME_EXTENSIONS: dict[str, str] = {
-    "application/vnd.oasis.opendocument.text": "odt",
-    "application/vnd.oasis.opendocument.text-template": "ott",
-    "application/vnd.oasis.opendocument.spreadsheet": "ods",
-    "application/vnd.oasis.opendocument.spreadsheet-template": "ots",
-    "application/vnd.oasis.opendocument.presentation": "odp",
-    "application/vnd.oasis.opendocument.presentation-template": "otp",
-    "application/vnd.oasis.opendocument.graphics": "odg",
-    "application/vnd.oasis.opendocument.formula": "odf",
-}
-
-OOXML_PATH_EXTENSIONS: tuple[tuple[str, str], ...] = (
-    ("word/document.xml", "docx"),
-    ("xl/workbook.xml", "xlsx"),
-    ("ppt/presentation.xml", "pptx"),
-)
-
-OLE_STREAM_EXTENSIONS: tuple[tuple[str, str], ...] = (
-    ("worddocument", "doc"),
-    ("workbook", "xls"),
-    ("book", "xls"),
-    ("powerpoint document", "ppt"),
-)
-ENCRYPTED_OOXML_STREAMS = {"encryptedpackage", "encryptioninfo"}
+# grayscale level below which a pixel counts as ink when looking for blank pages
+BLANK_PAGE_INK_LEVEL = 128
 
 INPUT_FILTERS: dict[str, str] = {
     # ── Writer / text ──
@@ -143,12 +118,37 @@ def get_app_info() -> dict:
     Used by the `/api/info` endpoint.
 
     Returns:
-        dict: Application information (name, version, model path, config placeholder).
+        dict: Application information (name, version, model path, config placeholder, CPU sizing).
     """
     return {"service_app_name": "ocr-service",
             "service_version": settings.OCR_SERVICE_VERSION,
             "service_model": settings.TESSDATA_PREFIX,
-            "config": ""}
+            "config": "",
+            "sizing": cpu_sizing()}
+
+
+def cpu_sizing() -> dict[str, Any]:
+    """Return the CPUs the service sees and the thread counts derived from them.
+
+    `auto` thread counts split the available CPUs (the host's, capped by the container's cpuset and
+    CFS quota) between the gunicorn workers, and within a worker between OCR and its LibreOffice
+    instances. Logged at startup and reported by `/api/info`.
+
+    Returns:
+        dict[str, Any]: CPU limits, workers and the per-worker OCR / converter threads with their mode.
+    """
+    limits = cpu_limits()
+    return {"available_cpus": settings.AVAILABLE_CPUS,
+            "host_cpus": limits.host,
+            "cpuset_cpus": limits.cpuset,
+            "cpu_quota": limits.quota,
+            "workers": settings.OCR_WEB_SERVICE_WORKERS,
+            "worker_cpus": settings.WORKER_CPUS,
+            "libre_office_instances": settings.LIBRE_OFFICE_INSTANCES_PER_WORKER,
+            "cpu_threads": settings.CPU_THREADS,
+            "cpu_threads_mode": "auto" if settings.OCR_SERVICE_CPU_THREADS == "auto" else "fixed",
+            "converter_threads": settings.CONVERTER_THREAD_NUM,
+            "converter_threads_mode": "auto" if settings.OCR_SERVICE_CONVERTER_THREADS == "auto" else "fixed"}
 
 
 def build_response(
@@ -207,181 +207,46 @@ def delete_tmp_files(file_paths: list[str]) -> None:
         if os.path.exists(file_path):
             os.remove(file_path)
 
-def is_file_content_plain_text(stream: bytes, threshold: float = 0.95) -> bool:
-    """Heuristic to determine whether a byte stream is likely plain text.
-
-    Args:
-        stream: Raw bytes to inspect.
-        threshold: Ratio of printable ASCII bytes required to treat as text.
-
-    Returns:
-        bool: True if the stream appears to be text-like.
-    """
-    if not stream:
-        return False
-
-    sample = stream[:4096]
-
-    # If it can't be decoded as UTF-8 at all, treat as binary
-    try:
-        sample.decode("utf-8")
-    except UnicodeDecodeError:
-        return False
-
-    printable = sum(1 for b in sample if b in PRINTABLE)
-    return printable / len(sample) >= threshold
+def is_encrypted_office_document(stream: DocumentBuffer) -> bool:
+    """Return True for encrypted OOXML packages stored in an OLE container."""
+    return sniff_content(stream).is_encrypted
 
-def is_file_type_html(stream: bytes) -> bool:
-    """Detect HTML content by scanning the head of the stream.
 
-    Args:
-        stream: Raw bytes to inspect.
-
-    Returns:
-        bool: True if HTML markers are found.
-    """
-    head = stream[:2048].decode(errors="ignore").lower()
-    return "<html" in head or "<!doctype html" in head
+def is_blank_image(image: Image.Image | np.ndarray,
+                   ink_ratio: float | None = None,
+                   min_stddev: float | None = None) -> bool:
+    """Cheap blank / near-blank page check on a rendered page bitmap.
 
-def is_file_type_xml(stream: bytes) -> bool:
-    """Detect XML content by attempting to parse the stream.
+    The bitmap is sampled on a 4px grid; the page is blank when the share of dark (ink) pixels is below
+    `ink_ratio` or when the pixel values barely vary (uniform page, e.g. an empty scan or separator sheet).
 
     Args:
-        stream: Raw bytes to inspect.
+        image: PIL image or uint8 array, grayscale or with the colour channels last.
+        ink_ratio: Minimum share of ink pixels for a page to be OCR'd, 0 disables the check.
+        min_stddev: Minimum pixel standard deviation for a page to be OCR'd.
 
     Returns:
-        bool: True if XML parsing succeeds.
+        bool: True if the page can be skipped.
     """
-    try:
-        xml.sax.parseString(stream, xml.sax.ContentHandler())
-        return True
-    except Exception:
-        logger.debug("Could not determine if file is XML.")
-    return False
-
-def is_file_type_rtf(stream: bytes) -> bool:
-    """Detect RTF content by checking for the RTF header magic bytes.
+    ink_ratio = settings.OCR_SERVICE_BLANK_PAGE_INK_RATIO if ink_ratio is None else ink_ratio
+    min_stddev = settings.OCR_SERVICE_BLANK_PAGE_MIN_STDDEV if min_stddev is None else min_stddev
 
-    Args:
-        stream: Raw bytes to inspect.
-
-    Returns:
-        bool: True if the stream starts with the RTF header.
-    """
-    head = stream[:32].lstrip()
-    return head.startswith(b"{\\rtf")
-
-
-def _infer_zip_office_extension(stream: bytes) -> str | None:
-    try:
-        with zipfile.ZipFile(BytesIO(stream)) as archive:
-            names = set(archive.namelist())
-
-            if "mimetype" in names:
-                mimetype = archive.read("mimetype").decode("ascii", "ignore").strip()
-                extension = ODF_MIME_EXTENSIONS.get(mimetype)
-                if extension:
-                    return extension
-
-            for marker_path, extension in OOXML_PATH_EXTENSIONS:
-                if marker_path in names:
-                    return extension
-
-            lowered_names = {name.lower() for name in names}
-            if any(name.startswith("word/") for name in lowered_names):
-                return "docx"
-            if any(name.startswith("xl/") for name in lowered_names):
-                return "xlsx"
-            if any(name.startswith("ppt/") for name in lowered_names):
-                return "pptx"
-    except Exception:
-        logger.debug("Could not infer Office extension from ZIP container.")
-
-    return None
-
-
-def _ole_stream_names(stream: bytes) -> set[str]:
-    try:
-        with olefile.OleFileIO(BytesIO(stream)) as ole:
-            return {"/".join(path).lower() for path in ole.listdir()}
-    except Exception:
-        logger.debug("Could not inspect OLE streams.")
-
-    return set()
-
-
-def is_encrypted_office_document(stream: bytes) -> bool:
-    """Return True for encrypted OOXML packages stored in an OLE container."""
-    if not stream.startswith(OLE_SIGNATURE):
+    if ink_ratio <= 0:
         return False
 
-    return ENCRYPTED_OOXML_STREAMS.issubset(_ole_stream_names(stream))
-
-
-def _infer_ole_office_extension(stream: bytes) -> str | None:
-    stream_names = _ole_stream_names(stream)
-    leaf_names = {name.rsplit("/", 1)[-1] for name in stream_names}
-
-    if ENCRYPTED_OOXML_STREAMS.issubset(stream_names):
-        return "docx"
-
-    for stream_name, extension in OLE_STREAM_EXTENSIONS:
-        if stream_name in leaf_names:
-            return extension
+    if isinstance(image, Image.Image):
+        image = np.asarray(image if image.mode == "L" else image.convert("L"))
 
-    return None
-
-
-def infer_office_extension_from_content(stream: bytes) -> str | None:
-    """Infer Office extensions for containers that generic file sniffing misses."""
-    if stream.startswith(b"PK"):
-        return _infer_zip_office_extension(stream)
-
-    if stream.startswith(OLE_SIGNATURE):
-        return _infer_ole_office_extension(stream)
-
-    return None
-
-
-class TextChecks:
-    """Lazy, cached text-type detection helpers for a single stream."""
-    __slots__ = ("stream", "_is_html", "_is_xml", "_is_rtf", "_is_plain_text")
-
-    def __init__(self, stream: bytes) -> None:
-        """Initialize with the stream to inspect."""
-        self.stream = stream
-        self._is_html: bool | None = None
-        self._is_xml: bool | None = None
-        self._is_rtf: bool | None = None
-        self._is_plain_text: bool | None = None
-
-    def is_html(self) -> bool:
-        """Return True if the stream appears to be HTML."""
-        if self._is_html is None:
-            self._is_html = is_file_type_html(self.stream)
-        return self._is_html
-
-    def is_xml(self) -> bool:
-        """Return True if the stream appears to be XML."""
-        if self._is_xml is None:
-            self._is_xml = is_file_type_xml(self.stream)
-        return self._is_xml
-
-    def is_rtf(self) -> bool:
-        """Return True if the stream appears to be RTF."""
-        if self._is_rtf is None:
-            self._is_rtf = is_file_type_rtf(self.stream)
-        return self._is_rtf
+    pixels = image[::4, ::4]
+    if pixels.ndim == 3:
+        pixels = pixels.mean(axis=2)
+    if pixels.size == 0:
+        return True
 
-    def is_plain_text(self) -> bool:
-        """Return True if the stream appears to be plain text."""
-        if self._is_plain_text is None:
-            self._is_plain_text = is_file_content_plain_text(self.stream)
-        return self._is_plain_text
+    if float(pixels.std()) < min_stddev:
+        return True
 
-    def is_text_like(self) -> bool:
-        """Return True if the stream is HTML/XML/RTF/plain text."""
-        return self.is_plain_text() or self.is_html() or self.is_xml() or self.is_rtf()
+    return float(np.count_nonzero(pixels < BLANK_PAGE_INK_LEVEL)) / pixels.size < ink_ratio
 
 
 def preprocess_html_to_img(stream: bytes, file_name: str) -> list[Image.Image]:
@@ -435,7 +300,10 @@ def detect_file_type(stream: bytes) -> object | None:
     return file_type
 
 
-def normalise_file_name_with_ext(file_name: str, stream: bytes, file_type: object | None = None) -> str:
+def normalise_file_name_with_ext(file_name: str,
+                                 stream: DocumentBuffer,
+                                 file_type: object | None = None,
+                                 content: ContentInfo | None = None) -> str:
     """Normalize filename and ensure an extension is present.
 
     LibreOffice relies on a reasonable filename with an extension to select
@@ -447,6 +315,7 @@ def normalise_file_name_with_ext(file_name: str, stream: bytes, file_type: objec
         file_name: Original file name (may be empty or extension-less).
         stream: File content used for extension inference.
         file_type: Optional previously detected file type descriptor.
+        content: Optional classification of `stream` by `sniff_content`, sniffed here when missing.
 
     Returns:
         str: Normalized file name with an extension.
@@ -458,45 +327,20 @@ def normalise_file_name_with_ext(file_name: str, stream: bytes, file_type: objec
     if not base:
         base = "document"
 
-    # 1) if caller already provided an extension, keep it
+    # if caller already provided an extension, keep it
     if ext:
         return base + ext
 
-    # 2) prefer an already detected extension when available
-    detected_ext = getattr(file_type, "extension", None)
-    if detected_ext and detected_ext != "zip":
-        return f"{base}.{str(detected_ext)}"
-
-    # 3) inspect Office containers that generic file sniffing may miss
-    office_ext = infer_office_extension_from_content(stream)
-    if office_ext:
-        return f"{base}.{office_ext}"
-
-    if detected_ext:
-        return f"{base}.{str(detected_ext)}"
-
-    # 4) let filetype guess it from content
-    guessed_ext = filetype.guess_extension(stream)
-    if guessed_ext and guessed_ext != "zip":
-        return f"{base}.{guessed_ext}"
-
-    if guessed_ext:
-        return f"{base}.{guessed_ext}"
-
-    # 5) fallbacks for texty formats our filetype may not catch
-    if is_file_type_html(stream):
-        return base + ".html"
-    if is_file_type_xml(stream):
-        return base + ".xml"
-    if is_file_type_rtf(stream):
-        return base + ".rtf"
+    if content is None:
+        content = sniff_content(stream)
+    if file_type is not None:
+        content = replace(content, file_type=file_type)
 
-    # 6) only tag as plain text when the content actually looks like text
-    if is_file_content_plain_text(stream):
-        return base + ".txt"
+    # detected type, then Office containers generic sniffing misses, then texty formats;
+    # unknown/binary content stays extensionless
+    extension = content.extension
+    return f"{base}.{extension}" if extension else base
 
-    # last resort: preserve extensionless names for unknown/binary content
-    return base
 
 def terminate_hanging_process(process_id: int) -> None:
     """Terminate a process tree by PID.
@@ -642,7 +486,10 @@ def sync_port_mapping(worker_id: int = -1, worker_pid: int = -1):
         logger.debug("reaading: " + str(settings.WORKER_PORT_MAP_FILE_PATH) + "....")
         logger.debug("found ports: " + str(port_mapping))
 
-        port_mapping[str(settings.LIBRE_OFFICE_LISTENER_PORT_RANGE[0] + worker_id)] = str(worker_pid)
+        # first of the LIBRE_OFFICE_INSTANCES_PER_WORKER consecutive ports owned by the worker
+        worker_port = (settings.LIBRE_OFFICE_LISTENER_PORT_RANGE[0]
+                       + worker_id * settings.LIBRE_OFFICE_INSTANCES_PER_WORKER)
+        port_mapping[str(worker_port)] = str(worker_pid)
 
         output = json.dumps(port_mapping, indent=1)
         
@@ -4,6 +4,7 @@ set -euo pipefail
 # if ran manually execute "export_env_vars.sh"
 export OCR_SERVICE_HOST="${OCR_SERVICE_HOST:-0.0.0.0}"
 export OCR_SERVICE_PORT="${OCR_SERVICE_PORT:-8090}"
+export OCR_SERVICE_SERVER_MODE="${OCR_SERVICE_SERVER_MODE:-wsgi}"
 export OCR_SERVICE_WORKER_CLASS="${OCR_SERVICE_WORKER_CLASS:-sync}"
 export OCR_WEB_SERVICE_WORKERS="${OCR_WEB_SERVICE_WORKERS:-1}"
 export OCR_SERVICE_LOG_LEVEL="${OCR_SERVICE_LOG_LEVEL:-20}"
@@ -19,6 +20,7 @@ echo "Starting up OCR app using gunicorn OCR_SERVICE ..."
 echo "====================================== OCR Service Configuration =============================="
 echo "OCR_SERVICE_HOST: $OCR_SERVICE_HOST"
 echo "OCR_SERVICE_PORT: $OCR_SERVICE_PORT"
+echo "OCR_SERVICE_SERVER_MODE: $OCR_SERVICE_SERVER_MODE"
 echo "OCR_SERVICE_WORKER_CLASS: $OCR_SERVICE_WORKER_CLASS"
 echo "OCR_WEB_SERVICE_WORKERS: $OCR_WEB_SERVICE_WORKERS"
 echo "OCR_SERVICE_LOG_LEVEL: $OCR_SERVICE_LOG_LEVEL"
@@ -52,13 +54,20 @@ else
   gunicorn_cmd=("$python_cmd" "-m" "gunicorn")
 fi
 
-exec "${gunicorn_cmd[@]}" wsgi:app --worker-class "$OCR_SERVICE_WORKER_CLASS" \
-                                   --bind "$OCR_SERVICE_HOST:$OCR_SERVICE_PORT" \
-                                   --threads "1" \
-                                   --workers "$OCR_WEB_SERVICE_WORKERS" \
-                                   --access-logfile "$OCR_SERVICE_GUNICORN_LOG_FILE_PATH" \
-                                   --log-level "$OCR_SERVICE_GUNICORN_LOG_LEVEL" \
-                                   --max-requests "$OCR_SERVICE_GUNICORN_MAX_REQUESTS" \
-                                   --max-requests-jitter "$OCR_SERVICE_GUNICORN_MAX_REQUESTS_JITTER" \
-                                   --timeout "$OCR_SERVICE_GUNICORN_TIMEOUT" \
-                                   --graceful-timeout "$OCR_SERVICE_GUNICORN_GRACEFUL_TIMEOUT"
+# "asgi" runs the FastAPI app natively on uvicorn workers, gunicorn still supervises them
+app_module="wsgi:app"
+if [[ "$OCR_SERVICE_SERVER_MODE" == "asgi" ]]; then
+  app_module="asgi:app"
+  OCR_SERVICE_WORKER_CLASS="uvicorn.workers.UvicornWorker"
+fi
+
+exec "${gunicorn_cmd[@]}" "$app_module" --worker-class "$OCR_SERVICE_WORKER_CLASS" \
+                                       --bind "$OCR_SERVICE_HOST:$OCR_SERVICE_PORT" \
+                                       --threads "1" \
+                                       --workers "$OCR_WEB_SERVICE_WORKERS" \
+                                       --access-logfile "$OCR_SERVICE_GUNICORN_LOG_FILE_PATH" \
+                                       --log-level "$OCR_SERVICE_GUNICORN_LOG_LEVEL" \
+                                       --max-requests "$OCR_SERVICE_GUNICORN_MAX_REQUESTS" \
+                                       --max-requests-jitter "$OCR_SERVICE_GUNICORN_MAX_REQUESTS_JITTER" \
+                                       --timeout "$OCR_SERVICE_GUNICORN_TIMEOUT" \
+                                       --graceful-timeout "$OCR_SERVICE_GUNICORN_GRACEFUL_TIMEOUT"